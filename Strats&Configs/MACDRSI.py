@@ -1,13 +1,25 @@
 # pragma pylint: disable=missing-docstring, invalid-name, pointless-string-statement
 
+import sys
+from pathlib import Path
 import talib.abstract as ta
 from pandas import DataFrame
 
-import freqtrade.vendor.qtpylib.indicators as qtpylib
-from freqtrade.indicator_helpers import fishers_inverse
 from freqtrade.strategy.interface import IStrategy
 
+# the helper modules, see indicators.py
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from batch import CandleBatch
+from incremental import IncrementalIndicators, MACDState, RSIState
+from crossover import crossed_below
+from indicators import shift
+from profiling import profiled
+from rsi import wilder_rsi
+from shard import sharded
 
+
+@sharded
+@profiled
 class MACDRSI(IStrategy):
     
     # Minimal ROI designed for the strategy
@@ -38,7 +50,17 @@ class MACDRSI(IStrategy):
         'sell': 'gtc',
     } """
 
+    # Indicator state kept between bot loops in live / dry-run
+    incremental = IncrementalIndicators(lambda: [
+        MACDState(5, 15, columns=('macd1', 'macdsignal1', 'macdhist1')),
+        MACDState(12, 26, columns=('macd2', 'macdsignal2', 'macdhist2')),
+        RSIState(14),
+    ])
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        if self.dp and self.dp.runmode.value in ('live', 'dry_run'):
+            # Only the newest candle changed since the last loop
+            return self.incremental.populate(dataframe, metadata['pair'])
         
         # MACD
         macd1 = ta.MACD(dataframe, fastperiod=5, slowperiod=15)
@@ -52,11 +74,42 @@ class MACDRSI(IStrategy):
         dataframe['macdhist2'] = macd2['macdhist']
 
         # RSI
-        dataframe['rsi'] = ta.RSI(dataframe)
+        dataframe['rsi'] = wilder_rsi(dataframe['close'].values)
         
 
         return dataframe
 
+    def populate_batch_indicators(self, batch: CandleBatch) -> CandleBatch:
+        """
+        populate_indicators for all pairs at once (see batch.py), only the columns
+        read by buy_signal / sell_signal
+        """
+        macd1 = batch.macd(fastperiod=5, slowperiod=15)
+        batch['macd1'] = macd1['macd']
+        batch['macdsignal1'] = macd1['macdsignal']
+        batch['macdhist1'] = macd1['macdhist']
+
+        batch['macdhist2'] = batch.macd(fastperiod=12, slowperiod=26)['macdhist']
+
+        batch['rsi'] = batch.rsi()
+        return batch
+
+    @staticmethod
+    def buy_signal(dataframe):
+        return (
+            (dataframe['rsi'] > 30) &
+            (dataframe['rsi'] < 70) &
+            (dataframe['macdhist1'] > 0) &
+            (shift(dataframe['macdhist1'], -1) < 0) &
+            (dataframe['macdhist2'] < 0) &
+            (shift(dataframe['macdhist2'], -1) < dataframe['macdhist2']) &
+            (shift(dataframe['macdhist2'], -2) < shift(dataframe['macdhist2'], -1))
+        )
+
+    @staticmethod
+    def sell_signal(dataframe):
+        return crossed_below(dataframe['macd1'], dataframe['macdsignal1'])
+
     def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Based on TA indicators, populates the buy signal for the given dataframe
@@ -65,15 +118,7 @@ class MACDRSI(IStrategy):
         :return: DataFrame with buy column
         """
         dataframe.loc[
-            (
-                (dataframe['rsi'] > 30) &
-                (dataframe['rsi'] < 70) &
-                (dataframe['macdhist1'] > 0) &
-                (dataframe['macdhist1'].shift(-1) < 0) &
-                (dataframe['macdhist2'] < 0) &
-                (dataframe['macdhist2'].shift(-1) < dataframe['macdhist2']) &
-                (dataframe['macdhist2'].shift(-2) < dataframe['macdhist2'].shift(-1))
-            ),
+            self.buy_signal(dataframe),
             'buy'] = 1
 
         return dataframe
@@ -86,8 +131,6 @@ class MACDRSI(IStrategy):
         :return: DataFrame with buy column
         """
         dataframe.loc[
-            (
-                qtpylib.crossed_below(dataframe['macd1'], dataframe['macdsignal1'])
-            ),
+            self.sell_signal(dataframe),
             'sell'] = 1
         return dataframe
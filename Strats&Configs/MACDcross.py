@@ -6,10 +6,23 @@ from functools import reduce
 from pandas import DataFrame
 # --------------------------------
 
-import talib.abstract as ta
-import freqtrade.vendor.qtpylib.indicators as qtpylib
 
+import sys
+from pathlib import Path
 
+# the helper modules, see indicators.py
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from batch import CandleBatch
+from compact import compact_signals
+from crossover import crossed_above, crossed_below
+from lazy import LazyIndicators
+from macd_cci import populate_macd_cci
+from profiling import profiled
+from shard import sharded
+
+
+@sharded
+@profiled
 class MACDStrategyCrossed(IStrategy):
     """
         buy:
@@ -36,16 +49,44 @@ class MACDStrategyCrossed(IStrategy):
     # Optimal timeframe for the strategy
     timeframe = '5m'
 
-    def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+    # macdhist is not read by the signals, computed for whoever asks for it (plots):
+    # strategy.lazy.ensure(dataframe, ['macdhist'])
+    lazy = LazyIndicators().add('macdhist',
+                                lambda dataframe: dataframe['macd'] - dataframe['macdsignal'])
 
-        macd = ta.MACD(dataframe)
-        dataframe['macd'] = macd['macd']
-        dataframe['macdsignal'] = macd['macdsignal']
-        dataframe['macdhist'] = macd['macdhist']
-        dataframe['cci'] = ta.CCI(dataframe)
+    def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
 
+        # ta.MACD + ta.CCI, shared with MACDStrategy (see macd_cci.py)
+        live = self.dp is not None and self.dp.runmode.value in ('live', 'dry_run')
+        dataframe = populate_macd_cci(dataframe, metadata['pair'], self.timeframe,
+                                      columns=('macd', 'macdsignal', 'cci'), live=live)
         return dataframe
 
+    def populate_batch_indicators(self, batch: CandleBatch) -> CandleBatch:
+        """
+        populate_indicators for all pairs at once (see batch.py), only the columns
+        read by buy_signal / sell_signal
+        """
+        macd = batch.macd()
+        batch['macd'] = macd['macd']
+        batch['macdsignal'] = macd['macdsignal']
+        batch['cci'] = batch.cci()
+        return batch
+
+    @staticmethod
+    def buy_signal(dataframe):
+        return (
+            crossed_above(dataframe['macd'], dataframe['macdsignal']) &
+            (dataframe['cci'] <= -50.0)
+        )
+
+    @staticmethod
+    def sell_signal(dataframe):
+        return (
+            crossed_below(dataframe['macd'], dataframe['macdsignal']) &
+            (dataframe['cci'] >= 100.0)
+        )
+
     def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Based on TA indicators, populates the buy signal for the given dataframe
@@ -53,10 +94,7 @@ class MACDStrategyCrossed(IStrategy):
         :return: DataFrame with buy column
         """
         dataframe.loc[
-            (
-                qtpylib.crossed_above(dataframe['macd'], dataframe['macdsignal']) &
-                (dataframe['cci'] <= -50.0)
-            ),
+            self.buy_signal(dataframe),
             'buy'] = 1
 
         return dataframe
@@ -68,10 +106,7 @@ class MACDStrategyCrossed(IStrategy):
         :return: DataFrame with buy column
         """
         dataframe.loc[
-            (
-                qtpylib.crossed_below(dataframe['macd'], dataframe['macdsignal']) &
-                (dataframe['cci'] >= 100.0)
-            ),
+            self.sell_signal(dataframe),
             'sell'] = 1
 
-        return dataframe
\ No newline at end of file
+        return compact_signals(self, dataframe)
\ No newline at end of file
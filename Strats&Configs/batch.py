@@ -0,0 +1,149 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Multi-pair batch evaluation of the buy / sell signals.
+
+Every pair is stacked into one (pairs x candles) NumPy array per column, right aligned on
+the newest candle and NaN padded in front when a pair has a shorter history. The signal
+expressions are evaluated on those arrays once for the whole whitelist and the buy / sell
+columns are split back out per pair.
+
+Not every indicator is a single 2-D pass:
+ - bollinger_bands: one pandas rolling over all pairs
+ - rsi, ema, cci, macd: talib's C function per pair, on the raw rows. These are
+   recurrences along the candles, a NumPy loop over the candles with all pairs as the
+   vector is slower than talib's loop for any whitelist here. What the batch saves is
+   the DataFrame / Series wrapping of talib.abstract around every call.
+
+A strategy supports batch mode by providing
+    populate_batch_indicators(self, batch: CandleBatch) -> CandleBatch
+    buy_signal(dataframe) / sell_signal(dataframe)
+the signal functions are the ones populate_buy_trend / populate_sell_trend use, written
+with operators and the indicators.py helpers so they accept a DataFrame or a batch.
+
+    signals = evaluate(BBRSI(config), {'ETH/BTC': eth_df, 'LTC/BTC': ltc_df})
+"""
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import talib
+from pandas import DataFrame
+
+from rsi import wilder_rsi
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+
+class CandleBatch:
+    """
+    Column name -> (pairs x candles) float64 array.
+    """
+
+    def __init__(self, pairs: List[str], lengths: np.ndarray, columns: Dict[str, np.ndarray],
+                 indexes: Dict[str, object]):
+        self.pairs = pairs
+        self.lengths = lengths
+        self.width = int(lengths.max()) if len(lengths) else 0
+        self.columns = columns
+        self.indexes = indexes
+
+    @classmethod
+    def from_dataframes(cls, dataframes: Dict[str, DataFrame],
+                        columns: Iterable[str] = OHLCV) -> 'CandleBatch':
+        pairs = list(dataframes)
+        lengths = np.array([len(dataframes[pair]) for pair in pairs], dtype=np.int64)
+        width = int(lengths.max()) if len(lengths) else 0
+        stacked = {}
+        for column in columns:
+            values = np.full((len(pairs), width), np.nan)
+            for row, pair in enumerate(pairs):
+                values[row, width - lengths[row]:] = dataframes[pair][column].values
+            stacked[column] = values
+        indexes = {pair: dataframes[pair].index for pair in pairs}
+        return cls(pairs, lengths, stacked, indexes)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def __setitem__(self, column: str, values: np.ndarray):
+        self.columns[column] = values
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.columns
+
+    def split(self, columns: Sequence[str]) -> Dict[str, DataFrame]:
+        """
+        One DataFrame per pair with the given columns, padding removed
+        """
+        result = {}
+        for row, pair in enumerate(self.pairs):
+            start = self.width - self.lengths[row]
+            result[pair] = DataFrame({column: self.columns[column][row, start:]
+                                      for column in columns}, index=self.indexes[pair])
+        return result
+
+    # Indicators
+    # ------------------------------------
+
+    def _per_pair(self, func, inputs: Sequence[str], outputs: int, **kwargs):
+        # one talib call per row (see the module), without talib.abstract's wrapping
+        results = [np.full((len(self.pairs), self.width), np.nan) for _ in range(outputs)]
+        for row in range(len(self.pairs)):
+            start = self.width - self.lengths[row]
+            values = func(*(self.columns[column][row, start:] for column in inputs), **kwargs)
+            if outputs == 1:
+                values = (values,)
+            for result, value in zip(results, values):
+                result[row, start:] = value
+        return results[0] if outputs == 1 else results
+
+    def rsi(self, timeperiod: int = 14) -> np.ndarray:
+        # per row as well, rsi.py
+        return wilder_rsi(self.columns['close'], timeperiod)
+
+    def ema(self, timeperiod: int = 30) -> np.ndarray:
+        return self._per_pair(talib.EMA, ('close',), 1, timeperiod=timeperiod)
+
+    def cci(self, timeperiod: int = 14) -> np.ndarray:
+        return self._per_pair(talib.CCI, ('high', 'low', 'close'), 1, timeperiod=timeperiod)
+
+    def macd(self, fastperiod: int = 12, slowperiod: int = 26,
+             signalperiod: int = 9) -> Dict[str, np.ndarray]:
+        macd, signal, hist = self._per_pair(talib.MACD, ('close',), 3, fastperiod=fastperiod,
+                                            slowperiod=slowperiod, signalperiod=signalperiod)
+        return {'macd': macd, 'macdsignal': signal, 'macdhist': hist}
+
+    def bollinger_bands(self, window: int = 20,
+                        stds: Iterable[float] = (2,)) -> Dict[float, Dict[str, np.ndarray]]:
+        """
+        Same as indicators.bollinger_bands, one rolling pass over all pairs
+        """
+        typical = (self.columns['high'] + self.columns['low'] + self.columns['close']) / 3.
+        # pandas rolls each column in C and skips the NaN padding, which leaves every pair
+        # with the values it gets on its own
+        rolling = DataFrame(typical.T).rolling(window=window, min_periods=1)
+        mid = rolling.mean().values.T
+        std = rolling.std().values.T
+
+        bands = {}
+        for n in stds:
+            width = std * n
+            bands[n] = {'lower': mid - width, 'mid': mid, 'upper': mid + width}
+        return bands
+
+
+def evaluate(strategy, dataframes: Dict[str, DataFrame]) -> Dict[str, DataFrame]:
+    """
+    Buy / sell signals of all pairs in one vectorized pass
+    :param strategy: strategy instance supporting batch mode (see module docstring)
+    :param dataframes: pair -> candle DataFrame
+    :return: pair -> DataFrame with buy and sell columns (0 / 1), on the input's index
+    """
+    batch = CandleBatch.from_dataframes(dataframes)
+    batch = strategy.populate_batch_indicators(batch)
+    with np.errstate(invalid='ignore'):
+        batch['buy'] = strategy.buy_signal(batch).astype(np.int64)
+        if hasattr(strategy, 'sell_signal'):
+            batch['sell'] = strategy.sell_signal(batch).astype(np.int64)
+        else:
+            batch['sell'] = np.zeros((len(batch.pairs), batch.width), dtype=np.int64)
+    return batch.split(('buy', 'sell'))
@@ -1,13 +1,23 @@
 # --- Do not remove these libs ---
 from freqtrade.strategy.interface import IStrategy
 from pandas import DataFrame
-import talib.abstract as ta
-import freqtrade.vendor.qtpylib.indicators as qtpylib
 
+import sys
+from pathlib import Path
+
+# the helper modules, see indicators.py
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from indicator_service import query_service
+from indicators import bollinger_bands
+from profiling import profiled
+from rsi import wilder_rsi
+from shard import sharded
 
 # --------------------------------
 
 
+@sharded
+@profiled
 class BbandRsi(IStrategy):
     """
 
@@ -35,16 +45,29 @@ class BbandRsi(IStrategy):
     # Optimal timeframe for the strategy
     timeframe = '1h'
 
+    # Queried from the indicator service when the config enables it, shared with BBRSI
+    shared_indicators = [
+        ('rsi', {'timeperiod': 14}),
+        ('bollinger', {'window': 20, 'stds': (1, 3)}),
+    ]
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=14)
+        if self.dp and self.dp.runmode.value in ('live', 'dry_run'):
+            shared = query_service(self.config, dataframe, metadata['pair'], self.timeframe,
+                                   self.shared_indicators)
+            if shared is not None:
+                return shared
+
+        dataframe['rsi'] = wilder_rsi(dataframe['close'].values, 14)
 
         # Bollinger bands
-        bollinger1 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=1)
+        bollinger = bollinger_bands(dataframe, window=20, stds=(1, 3))
+        bollinger1 = bollinger[1]
         dataframe['bb_lowerband1'] = bollinger1['lower']
         dataframe['bb_middleband1'] = bollinger1['mid']
         dataframe['bb_upperband1'] = bollinger1['upper']
 
-        bollinger3 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=3)
+        bollinger3 = bollinger[3]
         dataframe['bb_lowerband3'] = bollinger3['lower']
         dataframe['bb_middleband3'] = bollinger3['mid']
         dataframe['bb_upperband3'] = bollinger3['upper']
@@ -1,13 +1,25 @@
 # pragma pylint: disable=missing-docstring, invalid-name, pointless-string-statement
 
-import talib.abstract as ta
+import sys
+from pathlib import Path
 from pandas import DataFrame
 
-import freqtrade.vendor.qtpylib.indicators as qtpylib
-from freqtrade.indicator_helpers import fishers_inverse
 from freqtrade.strategy.interface import IStrategy
 
+# the helper modules, see indicators.py
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from batch import CandleBatch
+from compact import compact_signals
+from incremental import BollingerState, IncrementalIndicators, RSIState
+from indicator_service import query_service
+from lazy import LazyIndicators
+from profiling import profiled
+from rsi import wilder_rsi
+from shard import sharded
 
+
+@sharded
+@profiled
 class BBRSI(IStrategy):
     """
     Default Strategy provided by freqtrade bot.
@@ -42,6 +54,38 @@ class BBRSI(IStrategy):
         'sell': 'gtc',
     }
 
+    # Signal thresholds, buys below the lower band of buy_std, sells above the sell_band
+    # (lower / upper) of sell_std. sell_rsi None sells on the band alone.
+    buy_rsi = 5
+    buy_std = 3
+    sell_rsi = 88
+    sell_band = 'upper'
+    sell_std = 1
+
+    # Other thresholds, evaluated next to these ones by variants.py
+    variants = {
+        'BBRSI_TEST': {'buy_rsi': 38, 'buy_std': 2, 'sell_rsi': None, 'sell_band': 'lower',
+                       'sell_std': 2},
+    }
+
+    # Indicator state kept between bot loops in live / dry-run, for the thresholds above
+    incremental = IncrementalIndicators(lambda: [
+        RSIState(14),
+        BollingerState(20, stds=(1, 3)),
+    ])
+
+    # Queried from the indicator service when the config enables it, shared with BbandRsi
+    shared_indicators = [
+        ('rsi', {'timeperiod': 14}),
+        ('bollinger', {'window': 20, 'stds': (1, 3)}),
+    ]
+
+    # Full-frame columns, computed when populate_buy/sell_trend asks for them. The
+    # signals read rsi and two of the bands only.
+    lazy = (LazyIndicators()
+            .add('rsi', lambda dataframe: wilder_rsi(dataframe['close'].values))
+            .add_bollinger(window=20, stds=(1, 2, 3)))
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Adds several different TA indicators to the given DataFrame
@@ -53,28 +97,40 @@ class BBRSI(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: a Dataframe with all mandatory indicators for the strategies
         """
-
-        # Momentum Indicator
-        # -----------------------------------
-        # RSI
-        dataframe['rsi'] = ta.RSI(dataframe)
-
-        # Overlap Studies
-        # ------------------------------------
-
-        # Bollinger bands
-        bollinger3 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=3)
-        dataframe['bb_lowerband3'] = bollinger3['lower']
-        dataframe['bb_middleband3'] = bollinger3['mid']
-        dataframe['bb_upperband3'] = bollinger3['upper']
-
-        bollinger1 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=1)
-        dataframe['bb_lowerband1'] = bollinger1['lower']
-        dataframe['bb_middleband1'] = bollinger1['mid']
-        dataframe['bb_upperband1'] = bollinger1['upper']
-
+        if self.dp and self.dp.runmode.value in ('live', 'dry_run'):
+            shared = query_service(self.config, dataframe, metadata['pair'], self.timeframe,
+                                   self.shared_indicators)
+            if shared is not None:
+                return shared
+            # Only the newest candle changed since the last loop
+            return self.incremental.populate(dataframe, metadata['pair'])
+
+        # RSI and Bollinger bands (1, 2 and 3 std), see lazy above
         return dataframe
 
+    def populate_batch_indicators(self, batch: CandleBatch) -> CandleBatch:
+        """
+        populate_indicators for all pairs at once (see batch.py), only the columns
+        read by buy_signal / sell_signal
+        """
+        batch['rsi'] = batch.rsi(timeperiod=14)
+        bollinger = batch.bollinger_bands(window=20, stds=sorted({self.buy_std, self.sell_std}))
+        batch[f'bb_lowerband{self.buy_std}'] = bollinger[self.buy_std]['lower']
+        batch[f'bb_{self.sell_band}band{self.sell_std}'] = bollinger[self.sell_std][self.sell_band]
+        return batch
+
+    def buy_signal(self, dataframe):
+        return (
+            (dataframe['rsi'] > self.buy_rsi) &
+            (dataframe["close"] < dataframe[f'bb_lowerband{self.buy_std}'])
+        )
+
+    def sell_signal(self, dataframe):
+        signal = dataframe["close"] > dataframe[f'bb_{self.sell_band}band{self.sell_std}']
+        if self.sell_rsi is not None:
+            signal = (dataframe['rsi'] > self.sell_rsi) & signal
+        return signal
+
     def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Based on TA indicators, populates the buy signal for the given dataframe
@@ -82,11 +138,9 @@ class BBRSI(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: DataFrame with buy column
         """
+        dataframe = self.lazy.ensure(dataframe, ['rsi', f'bb_lowerband{self.buy_std}'])
         dataframe.loc[
-            (
-                (dataframe['rsi'] > 5) &
-                (dataframe["close"] < dataframe['bb_lowerband3'])
-            ) ,
+            self.buy_signal(dataframe),
             'buy'] = 1
 
         return dataframe
@@ -98,10 +152,9 @@ class BBRSI(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: DataFrame with buy column
         """
+        dataframe = self.lazy.ensure(dataframe,
+                                     ['rsi', f'bb_{self.sell_band}band{self.sell_std}'])
         dataframe.loc[
-            (
-                (dataframe['rsi'] > 88) &
-                (dataframe["close"] > dataframe['bb_upperband1'])
-            ) ,
+            self.sell_signal(dataframe),
             'sell'] = 1
-        return dataframe
+        return compact_signals(self, dataframe)
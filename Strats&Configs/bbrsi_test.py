@@ -1,12 +1,16 @@
 # pragma pylint: disable=missing-docstring, invalid-name, pointless-string-statement
 
-import talib.abstract as ta
+import sys
+from pathlib import Path
 from pandas import DataFrame
 
 import freqtrade.vendor.qtpylib.indicators as qtpylib
-from freqtrade.indicator_helpers import fishers_inverse
 from freqtrade.strategy.interface import IStrategy
 
+# the helper modules, see indicators.py
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from rsi import wilder_rsi
+
 
 class BBRSI_TEST(IStrategy):
     """
@@ -57,7 +61,7 @@ class BBRSI_TEST(IStrategy):
         # Momentum Indicator
         # -----------------------------------
         # RSI
-        dataframe['rsi'] = ta.RSI(dataframe)
+        dataframe['rsi'] = wilder_rsi(dataframe['close'].values)
 
         # Overlap Studies
         # ------------------------------------
@@ -0,0 +1,79 @@
+"""
+Compare indicators.bollinger_bands against the per-sigma qtpylib calls it replaces.
+
+    python benchmarks/bench_bollinger.py --pairs 23 --candles 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from pandas import DataFrame
+
+import freqtrade.vendor.qtpylib.indicators as qtpylib
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from indicators import bollinger_bands  # noqa: E402
+
+
+def synthetic_ohlcv(candles: int, seed: int) -> DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, candles)))
+    spread = np.abs(rng.normal(0, 0.005, candles)) * close
+    return DataFrame({
+        'open': np.roll(close, 1),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(1, 1000, candles),
+    })
+
+
+def per_sigma(dataframe: DataFrame, stds):
+    return {n: qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=n)
+            for n in stds}
+
+
+def shared(dataframe: DataFrame, stds):
+    return bollinger_bands(dataframe, window=20, stds=stds)
+
+
+def run(func, frames, stds, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for dataframe in frames:
+            func(dataframe, stds)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=23)
+    parser.add_argument('--candles', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--stds', type=float, nargs='+', default=[1, 2, 3])
+    args = parser.parse_args()
+
+    frames = [synthetic_ohlcv(args.candles, seed) for seed in range(args.pairs)]
+
+    # sanity check before timing anything, every pair
+    for dataframe in frames:
+        old, new = per_sigma(dataframe, args.stds), shared(dataframe, args.stds)
+        for n in args.stds:
+            for band in ('lower', 'mid', 'upper'):
+                np.testing.assert_array_equal(old[n][band].values, new[n][band])
+
+    old_time = run(per_sigma, frames, args.stds, args.rounds)
+    new_time = run(shared, frames, args.stds, args.rounds)
+    per_candle = args.pairs * args.candles
+    print(f"pairs={args.pairs} candles={args.candles} stds={args.stds}")
+    print(f"qtpylib per sigma : {old_time * 1e3:8.2f} ms  ({old_time / per_candle * 1e9:6.1f} ns/candle)")
+    print(f"shared kernel     : {new_time * 1e3:8.2f} ms  ({new_time / per_candle * 1e9:6.1f} ns/candle)")
+    print(f"speedup           : {old_time / new_time:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Time config_compiler.load_config from its snapshot against the cold path.
+
+Cold is resolve + validate (what a start without the cache does), warm the snapshot
+read with the hash checks. Both are checked to give the same config, the times are
+the best of --rounds, per config.
+
+    python benchmarks/bench_config.py
+    python benchmarks/bench_config.py config/config_bbrsi_live.json config_usdt.json --rounds 50
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+STRATEGY_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(STRATEGY_DIR))
+from config_compiler import compile_config, load_config  # noqa: E402
+
+
+def best(function, rounds: int) -> float:
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        result = elapsed if result is None else min(result, elapsed)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('configs', type=Path, nargs='*',
+                        default=sorted(STRATEGY_DIR.glob('config*.json'))
+                        + sorted(STRATEGY_DIR.glob('config/*.json')))
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache:
+        cold_total = warm_total = 0.0
+        for path in args.configs:
+            cold = best(lambda: compile_config(path), args.rounds)
+            # the first load compiles and writes the snapshot
+            assert load_config(path, Path(cache)) == compile_config(path)[0]
+            warm = best(lambda: load_config(path, Path(cache)), args.rounds)
+            cold_total += cold
+            warm_total += warm
+            print(f'{path.name:32} cold {cold * 1e3:7.2f} ms  warm {warm * 1e3:7.2f} ms  '
+                  f'x{cold / warm:.1f}')
+        print(f'{"all " + str(len(args.configs)):32} cold {cold_total * 1e3:7.2f} ms  '
+              f'warm {warm_total * 1e3:7.2f} ms  x{cold_total / warm_total:.1f}')
+
+
+if __name__ == '__main__':
+    main()
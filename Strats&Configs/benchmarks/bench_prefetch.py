@@ -0,0 +1,88 @@
+"""
+Time a bot loop's fetch and analysis, fetch-everything-first against prefetch.py's pipeline.
+
+prefetch.FakeExchange serves the candles, from a candle_store.py directory (--store) or
+synthetic (bench_bollinger.synthetic_ohlcv, one seed per pair), every request answered
+after --latency +- --jitter seconds. Per strategy both orders analyze the same frames
+with populate_indicators, the results are checked to be the same and the loop times
+printed, best of --rounds.
+
+    python benchmarks/bench_prefetch.py --pairs 40 --candles 1000 --latency 0.3 --jitter 0.2
+    python benchmarks/bench_prefetch.py --store user_data/data/binance-store --timeframe 5m \
+        --strategies Low_BB BBRSI --workers 2 4 8
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+from pandas import DataFrame
+from pandas.testing import assert_frame_equal
+
+STRATEGY_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(STRATEGY_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_strategies import STRATEGIES, load_strategy, synthetic_frames  # noqa: E402
+from prefetch import CandlePipeline, FakeExchange  # noqa: E402
+
+
+def analyzer(strategy):
+    def analyze(pair: str, dataframe: DataFrame) -> DataFrame:
+        return strategy.populate_indicators(dataframe, {'pair': pair})
+    return analyze
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--strategies', nargs='*', default=['BBRSI', 'Low_BB', 'MACDRSI'],
+                        choices=list(STRATEGIES))
+    parser.add_argument('--store', type=Path, help='candle_store.py directory, synthetic if not')
+    parser.add_argument('--timeframe', default='5m')
+    parser.add_argument('--pairs', type=int, default=40)
+    parser.add_argument('--candles', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='*', default=[4])
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.store:
+        from candle_store import CandleStore
+        store = CandleStore(args.store)
+        frames: Dict[str, DataFrame] = {pair: store.load(pair, args.timeframe).iloc[-args.candles:]
+                                        for pair in store.pairs(args.timeframe)[:args.pairs]}
+    else:
+        frames = synthetic_frames(args.pairs, args.candles, args.timeframe)
+    pairs = list(frames)
+    print(f'{len(pairs)} pairs, {args.candles} candles, latency {args.latency}s '
+          f'+- {args.jitter}s, {args.concurrency} requests in flight')
+
+    for name in args.strategies:
+        strategy = load_strategy(name)
+        for workers in args.workers:
+            exchange = FakeExchange(frames, args.latency, args.jitter)
+            with CandlePipeline(exchange, workers=workers,
+                                concurrency=args.concurrency) as pipeline:
+                timings = {}
+                for mode, run in (('serial', pipeline.run_serial), ('pipeline', pipeline.run)):
+                    best = None
+                    for _ in range(args.rounds):
+                        started = time.perf_counter()
+                        results = run(pairs, args.timeframe, analyzer(strategy))
+                        elapsed = time.perf_counter() - started
+                        if best is None or elapsed < best[0]:
+                            best = (elapsed, pipeline.stats['fetched_s'])
+                    timings[mode] = (best, results)
+            (serial, serial_results), (piped, piped_results) = (timings['serial'],
+                                                                 timings['pipeline'])
+            for pair in pairs:
+                assert_frame_equal(serial_results[pair], piped_results[pair])
+            print(f'{name:14} workers {workers:2}: serial {serial[0]:7.3f}s '
+                  f'(fetch {serial[1]:.3f}s)  pipeline {piped[0]:7.3f}s  '
+                  f'x{serial[0] / piped[0]:.2f}  same results')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+Time populate_indicators / populate_buy_trend / populate_sell_trend of every strategy.
+
+Synthetic OHLCV (bench_bollinger.synthetic_ohlcv, one seed per pair) for every
+combination of --pairs and --candles, each strategy and size in a fresh process so
+that neither memory nor the process-local caches (macd_cci kernels, MaskCache) carry
+over from the previous case.
+
+    python benchmarks/bench_strategies.py --pairs 1 10 100 --candles 1000 100000 500000 \
+        --output bench-$(git rev-parse --short HEAD).json
+    python benchmarks/bench_strategies.py --strategies BBRSI Low_BB --compare bench-1a2b3c4.json
+
+Every phase is timed over all pairs (best of --rounds, caches cleared before each
+round) the way a backtest runs it, with no DataProvider, so the full-frame paths. Lazy
+columns (lazy.py) are computed when a populate_*_trend asks for them and count there.
+peak_mb is the most memory allocated while all pairs are analyzed and kept (freqtrade
+keeps every analyzed frame), on top of the candles. The JSON written by --output holds
+the commit and the library versions next to the results; --compare prints the time and
+memory ratios against an earlier file for the cases both contain.
+"""
+import argparse
+import importlib
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import product
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, date_range
+
+from freqtrade.exchange import timeframe_to_minutes
+
+STRATEGY_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(STRATEGY_DIR))
+# after the strategy directory, its bbrsi.py / low_bb.py take precedence
+sys.path.append(str(STRATEGY_DIR / 'strats and configs 2021-06-24'))
+from bench_bollinger import synthetic_ohlcv  # noqa: E402
+import macd_cci  # noqa: E402
+
+# strategy class -> module
+STRATEGIES = {
+    'BBRSI': 'bbrsi',
+    'BBRSI_TEST': 'bbrsi_test',
+    'BbandRsi': 'bbandrsi',
+    'Low_BB': 'low_bb',
+    'Low_BB_TEST': 'low_bb_test',
+    'MACDStrategy': 'MACD',
+    'MACDStrategyCrossed': 'MACDcross',
+    'MACDRSI': 'MACDRSI',
+    'BBRSI_ETH_OPT': 'bbrsi_eth_opt',
+    'Low_BB_ETH': 'low_bb_eth',
+}
+
+PHASES = ('populate_indicators', 'populate_buy_trend', 'populate_sell_trend')
+
+
+def load_strategy(name: str):
+    cls = getattr(importlib.import_module(STRATEGIES[name]), name)
+    strategy = cls({'stake_currency': 'BTC', 'dry_run': True})
+    # no bot around it, full-frame path
+    strategy.dp = None
+    return strategy
+
+
+def synthetic_frames(pairs: int, candles: int, timeframe: str) -> Dict[str, DataFrame]:
+    frames = {}
+    for seed in range(pairs):
+        dataframe = synthetic_ohlcv(candles, seed)
+        dataframe.insert(0, 'date', date_range(
+            '2021-01-01', periods=candles, freq=f'{timeframe_to_minutes(timeframe)}min',
+            tz='UTC'))
+        frames[f'PAIR{seed}/BTC'] = dataframe
+    return frames
+
+
+def clear_caches(strategy):
+    macd_cci.clear()
+    masks = getattr(strategy, 'masks', None)
+    if masks is not None:
+        masks.clear()
+
+
+def analyze(strategy, frames: Dict[str, DataFrame], timings: Dict[str, float]) -> List[DataFrame]:
+    """
+    Runs the three phases over all pairs, adding the time of each phase to timings
+    """
+    analyzed = []
+    for pair, dataframe in frames.items():
+        metadata = {'pair': pair}
+        dataframe = dataframe.copy()
+        for phase in PHASES:
+            start = time.perf_counter()
+            dataframe = getattr(strategy, phase)(dataframe, metadata)
+            timings[phase] += time.perf_counter() - start
+        analyzed.append(dataframe)
+    return analyzed
+
+
+def run_case(case: Tuple[str, int, int, int]) -> dict:
+    """
+    One strategy and size, meant to run in its own process
+    """
+    name, pairs, candles, rounds = case
+    strategy = load_strategy(name)
+    timeframe = getattr(strategy, 'timeframe', None) or getattr(strategy, 'ticker_interval',
+                                                                None) or '5m'
+    frames = synthetic_frames(pairs, candles, timeframe)
+
+    best = {phase: float('inf') for phase in PHASES}
+    for _ in range(rounds):
+        clear_caches(strategy)
+        timings = dict.fromkeys(PHASES, 0.0)
+        analyze(strategy, frames, timings)
+        best = {phase: min(best[phase], timings[phase]) for phase in PHASES}
+
+    # separate untimed pass, tracemalloc slows the allocations down
+    clear_caches(strategy)
+    tracemalloc.start()
+    analyzed = analyze(strategy, frames, dict.fromkeys(PHASES, 0.0))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del analyzed
+
+    total = sum(best.values())
+    return {
+        'strategy': name,
+        'timeframe': timeframe,
+        'pairs': pairs,
+        'candles': candles,
+        'seconds': best,
+        'total_seconds': total,
+        'ns_per_candle': total / (pairs * candles) * 1e9,
+        'peak_mb': peak / 2**20,
+        # ru_maxrss is in kB on Linux
+        'maxrss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10,
+    }
+
+
+def commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=STRATEGY_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result: dict, previous: Optional[dict] = None):
+    line = (f"{result['strategy']:20s} {result['pairs']:4d} pairs {result['candles']:7d} candles"
+            + ''.join(f"  {phase[9:]} {result['seconds'][phase] * 1e3:9.1f} ms"
+                      for phase in PHASES)
+            + f"  {result['ns_per_candle']:7.1f} ns/candle  peak {result['peak_mb']:8.1f} MB")
+    if previous is not None:
+        line += (f"  time x{result['total_seconds'] / previous['total_seconds']:.2f}"
+                 f"  memory x{result['peak_mb'] / max(previous['peak_mb'], 1e-9):.2f}")
+    print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES),
+                        default=list(STRATEGIES))
+    parser.add_argument('--pairs', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--candles', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--output', type=Path, help='write the results as JSON')
+    parser.add_argument('--compare', type=Path, help='JSON results of an earlier run')
+    args = parser.parse_args()
+
+    previous = {}
+    if args.compare:
+        for result in json.loads(args.compare.read_text())['results']:
+            previous[(result['strategy'], result['pairs'], result['candles'])] = result
+
+    cases = [(name, pairs, candles, args.rounds)
+             for name, pairs, candles in product(args.strategies, args.pairs, args.candles)]
+    results = []
+    with Pool(processes=1, maxtasksperchild=1) as pool:
+        for result in pool.imap(run_case, cases):
+            print_result(result, previous.get(
+                (result['strategy'], result['pairs'], result['candles'])))
+            results.append(result)
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            'commit': commit(),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'rounds': args.rounds,
+            'results': results,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
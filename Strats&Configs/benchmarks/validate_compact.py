@@ -0,0 +1,121 @@
+"""
+Check that compact mode (compact.py) keeps the signals of BBRSI, Low_BB and the MACD strategies.
+
+Every strategy runs over the candles in float64, the analyzed frame is compacted and
+ - its flags are compared with the float64 ones (as compact.pack_signals bitmasks)
+ - buy_signal / sell_signal are evaluated again on the float32 columns and compared
+ - the memory of the analyzed frame is reported before and after
+
+    python benchmarks/validate_compact.py --datadir user_data/data/binance --timeframe 5m
+    python benchmarks/validate_compact.py --store user_data/data/binance-store --timeframe 1h
+
+--datadir reads freqtrade's <PAIR>-<timeframe>.json files, --store a candle_store.py
+directory. Without either it runs on synthetic candles. Exits with 1 when a flag differs.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+from pandas import DataFrame, date_range, to_datetime
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bench_bollinger import synthetic_ohlcv  # noqa: E402
+from candle_store import CandleStore  # noqa: E402
+from compact import compact, pack_signals  # noqa: E402
+from low_bb import Low_BB  # noqa: E402
+from MACD import MACDStrategy  # noqa: E402
+from MACDcross import MACDStrategyCrossed  # noqa: E402
+from bbrsi import BBRSI  # noqa: E402
+
+STRATEGIES = (BBRSI, Low_BB, MACDStrategy, MACDStrategyCrossed)
+
+
+def load_json(datadir: Path, timeframe: str) -> Dict[str, DataFrame]:
+    frames = {}
+    for path in sorted(datadir.glob(f'*-{timeframe}.json')):
+        rows = np.array(json.loads(path.read_text()), dtype=np.float64).reshape(-1, 6)
+        dataframe = DataFrame(rows[:, 1:], columns=['open', 'high', 'low', 'close', 'volume'])
+        dataframe.insert(0, 'date', to_datetime(rows[:, 0].astype(np.int64), unit='ms', utc=True))
+        frames[path.name[:-len(f'-{timeframe}.json')].replace('_', '/')] = dataframe
+    return frames
+
+
+def load_synthetic(pairs: int, candles: int) -> Dict[str, DataFrame]:
+    frames = {}
+    for seed in range(pairs):
+        dataframe = synthetic_ohlcv(candles, seed)
+        dataframe.insert(0, 'date', date_range('2021-01-01', periods=candles, freq='5min',
+                                               tz='UTC'))
+        frames[f'PAIR{seed}/BTC'] = dataframe
+    return frames
+
+
+def analyze(strategy, dataframe: DataFrame, pair: str) -> DataFrame:
+    metadata = {'pair': pair}
+    dataframe = strategy.populate_indicators(dataframe.copy(), metadata)
+    dataframe = strategy.populate_buy_trend(dataframe, metadata)
+    return strategy.populate_sell_trend(dataframe, metadata)
+
+
+def reevaluated(strategy, analyzed: DataFrame, compacted: DataFrame) -> int:
+    """
+    Candles where a signal expression gives a different result on the float32 columns
+    """
+    differ = 0
+    for name in ('buy_signal', 'sell_signal'):
+        if hasattr(strategy, name):
+            signal = getattr(strategy, name)
+            differ += int((np.asarray(signal(analyzed), dtype=bool)
+                           != np.asarray(signal(compacted), dtype=bool)).sum())
+    return differ
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--datadir', type=Path)
+    source.add_argument('--store', type=Path)
+    parser.add_argument('--timeframe', default='5m')
+    parser.add_argument('--pairs', type=int, default=5, help='synthetic data only')
+    parser.add_argument('--candles', type=int, default=20000, help='synthetic data only')
+    args = parser.parse_args()
+
+    if args.datadir:
+        frames = load_json(args.datadir, args.timeframe)
+    elif args.store:
+        store = CandleStore(args.store)
+        frames = {pair: store.load(pair, args.timeframe) for pair in store.pairs(args.timeframe)}
+    else:
+        print('no recorded data given, using synthetic candles')
+        frames = load_synthetic(args.pairs, args.candles)
+    if not frames:
+        sys.exit('no candles found')
+
+    failed = False
+    config = {'stake_currency': 'BTC', 'dry_run': True}
+    for cls in STRATEGIES:
+        strategy = cls(config)
+        # no bot around it, full-frame path
+        strategy.dp = None
+        candles = flags = differ = 0
+        before = after = 0
+        for pair, dataframe in frames.items():
+            analyzed = analyze(strategy, dataframe, pair)
+            compacted = compact(analyzed)
+            candles += len(analyzed)
+            flags += int(np.count_nonzero(pack_signals(analyzed) != pack_signals(compacted)))
+            differ += reevaluated(strategy, analyzed, compacted)
+            before += analyzed.memory_usage(deep=True).sum()
+            after += compacted.memory_usage(deep=True).sum()
+        failed |= flags > 0
+        print(f'{cls.__name__:20s} {len(frames)} pairs {candles} candles  '
+              f'flags differ: {flags}  re-evaluated on float32 differ: {differ}  '
+              f'{before / 2**20:.1f} MB -> {after / 2**20:.1f} MB')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
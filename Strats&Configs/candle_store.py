@@ -0,0 +1,142 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Columnar binary candle store.
+
+One file per pair and timeframe, <PAIR>-<timeframe>.candles.npy, holding a fixed
+(6 x candles) float64 array: date (ms since epoch, exact in float64), open, high, low,
+close, volume. Files are opened memory-mapped, the date row is the time index, so loading
+a date range is a binary search plus a slice instead of parsing JSON.
+
+Convert freqtrade's JSON candle files once:
+    python candle_store.py user_data/data/binance user_data/data/binance-store
+
+    store = CandleStore('user_data/data/binance-store')
+    dataframe = store.load('ETH/BTC', '1h', start='2021-01-01', end='2021-06-01')
+"""
+import gzip
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from pandas import DataFrame, Timestamp, to_datetime
+
+COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+SUFFIX = '.candles.npy'
+
+TimeLike = Union[str, int, Timestamp, None]
+
+# freqtrade's candle files, <PAIR>-<timeframe>.json(.gz); <PAIR>-trades.json is not one
+CANDLE_FILE = re.compile(r'^(?P<pair>.+)-(?P<timeframe>\d+[smhdwM])\.json(?P<gz>\.gz)?$')
+
+
+def _dates(milliseconds: np.ndarray):
+    # ns resolution like freqtrade's own loaders (pandas >= 2 would keep ms otherwise)
+    return to_datetime((milliseconds.astype(np.int64) * 1_000_000).view('datetime64[ns]'),
+                       utc=True)
+
+
+def _to_ms(value: TimeLike) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    stamp = Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize('UTC')
+    return float(stamp.value // 1_000_000)
+
+
+class CandleStore:
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        # path -> (mtime, memory map)
+        self._maps: Dict[Path, Tuple[int, np.ndarray]] = {}
+
+    def path(self, pair: str, timeframe: str) -> Path:
+        return self.directory / f"{pair.replace('/', '_')}-{timeframe}{SUFFIX}"
+
+    def pairs(self, timeframe: str) -> List[str]:
+        tail = f'-{timeframe}{SUFFIX}'
+        return sorted(path.name[:-len(tail)].replace('_', '/')
+                      for path in self.directory.glob(f'*{tail}'))
+
+    def _array(self, pair: str, timeframe: str) -> np.ndarray:
+        path = self.path(pair, timeframe)
+        mtime = path.stat().st_mtime_ns
+        cached = self._maps.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = self._maps[path] = (mtime, np.load(path, mmap_mode='r'))
+        return cached[1]
+
+    def load(self, pair: str, timeframe: str, start: TimeLike = None,
+             end: TimeLike = None) -> DataFrame:
+        """
+        Candles with start <= date < end, as freqtrade's OHLCV DataFrame
+        :param start: inclusive, str / Timestamp (UTC when naive) / ms since epoch
+        :param end: exclusive, same types as start
+        """
+        array = self._array(pair, timeframe)
+        dates = array[0]
+        first = 0 if start is None else int(np.searchsorted(dates, _to_ms(start), 'left'))
+        last = len(dates) if end is None else int(np.searchsorted(dates, _to_ms(end), 'left'))
+        window = array[:, first:last]
+        dataframe = DataFrame({column: window[i] for i, column in enumerate(COLUMNS[1:], 1)})
+        dataframe.insert(0, 'date', _dates(window[0]))
+        return dataframe
+
+    def write(self, pair: str, timeframe: str, dataframe: DataFrame):
+        """
+        Stores the candles, merged with what is stored already (newer data wins)
+        """
+        dates = (to_datetime(dataframe['date'], utc=True).values
+                 .astype('datetime64[ms]').astype(np.int64).astype(np.float64))
+        new = np.vstack([dates] + [dataframe[column].values.astype(np.float64)
+                                   for column in COLUMNS[1:]])
+        path = self.path(pair, timeframe)
+        if path.exists():
+            old = np.array(self._array(pair, timeframe))
+            new = np.hstack([old, new])
+            # keep the last occurrence of every date
+            _, last = np.unique(new[0][::-1], return_index=True)
+            new = new[:, len(new[0]) - 1 - last]
+        else:
+            new = new[:, np.argsort(new[0], kind='stable')]
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        with tmp.open('wb') as handle:
+            np.save(handle, np.ascontiguousarray(new))
+        os.replace(tmp, path)
+        self._maps.pop(path, None)
+
+
+def import_json(source: Path, store: CandleStore) -> List[str]:
+    """
+    Converts freqtrade's <PAIR>-<timeframe>.json(.gz) files ([[ms, o, h, l, c, v], ...]),
+    other files (trades, ...) are left alone
+    :return: converted file names
+    """
+    converted = []
+    for path in sorted(Path(source).iterdir()):
+        match = CANDLE_FILE.match(path.name)
+        if match is None or not path.is_file():
+            continue
+        with (gzip.open if match['gz'] else open)(path, 'rt') as handle:
+            rows = np.array(json.load(handle), dtype=np.float64).reshape(-1, 6)
+        dataframe = DataFrame(rows[:, 1:], columns=list(COLUMNS[1:]))
+        dataframe.insert(0, 'date', _dates(rows[:, 0]))
+        store.write(match['pair'].replace('_', '/'), match['timeframe'], dataframe)
+        converted.append(path.name)
+    return converted
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python candle_store.py <freqtrade data dir> <store dir>')
+    for name in import_json(Path(sys.argv[1]), CandleStore(sys.argv[2])):
+        print(name)
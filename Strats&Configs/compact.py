@@ -0,0 +1,82 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Compact dataframes for live / dry-run bots.
+
+freqtrade keeps the analyzed dataframe of every pair between loops, all float64 with the
+buy / sell flags as float64 NaN / 1 columns. With "compact_dataframes": true in the bot
+config the strategies hand back that dataframe with the OHLCV and indicator columns as
+float32, a bit over half the memory per pair. Two kinds of columns stay as they are:
+ - close, freqtrade checks the analyzed frame's last close against the candle's
+ - the buy / sell flags, freqtrade reads them as the NaN / 1 the strategy wrote
+
+Compaction runs once the signals are set (the end of populate_sell_trend), the indicators
+and signals themselves are computed in float64 exactly as before, so the flags are the
+very same columns. Only live / dry-run frames are compacted, backtests fill at the dataframe's
+prices and stay float64. Columns computed later from a compacted frame (lazy.py columns
+asked for afterwards) start from the float32 candles.
+
+    def populate_sell_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        ...
+        return compact_signals(self, dataframe)
+
+pack_signals() / unpack_signals() store the flags as one bitmask byte per candle, for
+recorded signals (benchmarks/validate_compact.py).
+"""
+from typing import Dict
+
+import numpy as np
+from pandas import DataFrame
+
+# compared by freqtrade against the raw candles after the strategy ran
+KEEP_FLOAT64 = ('close',)
+
+# flag column -> bit in the packed mask
+SIGNAL_BITS = {
+    'buy': 1,
+    'sell': 2,
+    'enter_long': 4,
+    'exit_long': 8,
+    'enter_short': 16,
+    'exit_short': 32,
+}
+
+
+def compact(dataframe: DataFrame) -> DataFrame:
+    """
+    float64 columns as float32, but close and the signal flags
+    """
+    floats = {column: np.float32 for column, dtype in dataframe.dtypes.items()
+              if dtype == np.float64 and column not in SIGNAL_BITS
+              and column not in KEEP_FLOAT64}
+    return dataframe.astype(floats)
+
+
+def compact_enabled(strategy) -> bool:
+    return bool(strategy.config.get('compact_dataframes') and strategy.dp
+                and strategy.dp.runmode.value in ('live', 'dry_run'))
+
+
+def compact_signals(strategy, dataframe: DataFrame) -> DataFrame:
+    """
+    compact() when the bot config enables it, the dataframe as it is otherwise
+    """
+    return compact(dataframe) if compact_enabled(strategy) else dataframe
+
+
+def pack_signals(dataframe: DataFrame) -> np.ndarray:
+    """
+    The flag columns of the dataframe as one uint8 bitmask per candle (SIGNAL_BITS)
+    """
+    bits = np.zeros(len(dataframe), dtype=np.uint8)
+    for column, bit in SIGNAL_BITS.items():
+        if column in dataframe.columns:
+            bits[dataframe[column].values == 1] |= bit
+    return bits
+
+
+def unpack_signals(bits: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    :return: flag column -> boolean array, for every flag set on any candle
+    """
+    return {column: (bits & bit) != 0 for column, bit in SIGNAL_BITS.items()
+            if np.any(bits & bit)}
@@ -0,0 +1,281 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Bot configs resolved and validated once, loaded from a snapshot afterwards.
+
+The configs here differ in a few keys (stake, timeframe, whitelist, telegram) and
+freqtrade validates a config only after the strategy is loaded, a typo in one of them
+shows up when the bot has been starting for a while. A config can name the one it
+builds on:
+
+    {
+        "extends": "../config.json",
+        "ticker_interval": "1h",
+        "exchange": {"pair_whitelist": ["ETH/BTC", "LTC/BTC"]}
+    }
+
+"extends" (a path relative to the file, or a list of them applied in order, later
+ones win) is resolved like freqtrade merges several --config files: dicts are merged
+key by key, everything else (lists included) is replaced by the overlay. The result
+is checked against freqtrade's CONF_SCHEMA, this repo's own sections (profiling,
+sharding, order_book_cache, ...) and a few consistency checks, all errors at once.
+The bot configs here extend the parts they share in config/base/ (the binance BTC
+settings, the live switches), files that are not complete configs on their own.
+Credentials are "${NAME}" placeholders resolved by config_secrets.py after loading,
+neither the configs nor the snapshots hold them.
+
+load_config(path) keeps the result as JSON in the cache directory (a snapshot is data
+only, reading one runs nothing), named after the hash of the file and checked against
+the hash of every file it extends: the next load (shard.py, indicator_service.py, a
+worker process starting) reads the snapshot instead of parsing, merging and validating
+again. A changed file, a change to this
+module or config_secrets.py, or a new freqtrade version compiles again.
+
+    python config_compiler.py config/config_bbrsi_live.json config_macd.json \\
+        --output user_data/compiled
+
+checks the configs, fills the cache and writes the resolved configs, still with their
+placeholders (config_secrets.py starts freqtrade with the credentials filled in).
+benchmarks/bench_config.py times warm loads against the cold path.
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config_secrets import inline_secrets
+
+CACHE_DIRECTORY = Path('user_data/config_cache')
+# bumped when the resolution or the checks change, older snapshots are then ignored (the
+# sources of this module and config_secrets.py are part of the snapshot version as well)
+COMPILER_VERSION = 2
+
+# the keys every bot config here sets itself, freqtrade fills the rest with defaults
+REQUIRED = ['exchange', 'max_open_trades', 'stake_currency', 'stake_amount', 'dry_run',
+            'bid_strategy', 'ask_strategy', 'unfilledtimeout', 'internals']
+
+SECTIONS: Dict[str, dict] = {
+    'profiling': {
+        'type': 'object',
+        'properties': {
+            'enabled': {'type': 'boolean'},
+            'capacity': {'type': 'integer', 'minimum': 1},
+            'allocations': {'type': 'boolean'},
+            'report_interval': {'type': 'number', 'minimum': 0},
+            'stacks': {'type': 'string'},
+            'sample_interval': {'type': 'number', 'minimum': 0, 'exclusiveMinimum': True},
+        },
+        'additionalProperties': False,
+    },
+    'sharding': {
+        'type': 'object',
+        'properties': {
+            'shard': {'type': 'integer', 'minimum': 0},
+            'shards': {'type': 'integer', 'minimum': 1},
+            'state': {'type': 'string'},
+            'budget': {'type': ['number', 'null']},
+            'stale_after': {'type': 'number', 'minimum': 0},
+        },
+        'required': ['shard', 'shards', 'state'],
+        'additionalProperties': False,
+    },
+    'order_book_cache': {
+        'type': 'object',
+        'properties': {
+            'ttl': {'type': 'number', 'minimum': 0},
+            'depth': {'type': 'integer', 'minimum': 1},
+            'pair_ttl': {'type': 'object', 'additionalProperties': {'type': 'number',
+                                                                    'minimum': 0}},
+            'report_interval': {'type': 'number', 'minimum': 0},
+        },
+        'additionalProperties': False,
+    },
+    'indicator_service': {
+        'type': 'object',
+        'properties': {
+            'address': {'type': 'string', 'pattern': '^[^:]+:[0-9]+$'},
+            'authkey': {'type': 'string'},
+        },
+    },
+    'compact_dataframes': {'type': 'boolean'},
+}
+
+
+def _schema() -> dict:
+    from freqtrade.constants import CONF_SCHEMA
+    schema = copy.deepcopy(CONF_SCHEMA)
+    schema['properties'].update(SECTIONS)
+    schema['required'] = REQUIRED
+    schema['anyOf'] = [{'required': ['timeframe']}, {'required': ['ticker_interval']}]
+    return schema
+
+
+@lru_cache(maxsize=None)
+def _validator():
+    # built on the first validation, loading a snapshot needs neither jsonschema nor the
+    # schema
+    from jsonschema import Draft4Validator
+    return Draft4Validator(_schema())
+
+
+def merge(base: dict, overlay: dict) -> dict:
+    """
+    overlay on top of base, dicts merged key by key, everything else replaced
+    """
+    result = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def resolve(path: Path, _chain: Tuple[Path, ...] = ()) -> Tuple[dict, List[Tuple[str, str]]]:
+    """
+    The config with everything it extends merged in, not validated
+    :return: config, (path, hash) of every file read
+    """
+    path = Path(path).resolve()
+    if path in _chain:
+        raise ValueError(f'{path}: extends itself through '
+                         f'{" -> ".join(str(link) for link in _chain)}')
+    data = path.read_bytes()
+    try:
+        config = json.loads(data)
+    except ValueError as error:
+        raise ValueError(f'{path}: {error}') from None
+    sources = [(str(path), _digest(data))]
+    bases = config.pop('extends', [])
+    result: dict = {}
+    for base in [bases] if isinstance(bases, str) else bases:
+        base_config, base_sources = resolve(path.parent / base, _chain + (path,))
+        result = merge(result, base_config)
+        sources += base_sources
+    return merge(result, config), sources
+
+
+def problems(config: dict) -> List[str]:
+    """
+    Everything wrong with a resolved config, empty when it is valid
+    """
+    result = [f"{'.'.join(str(part) for part in error.absolute_path) or 'config'}: "
+              f"{error.message}"
+              for error in sorted(_validator().iter_errors(config),
+                                  key=lambda error: list(map(str, error.absolute_path)))]
+    result += [f'{field}: not a placeholder, use "${{NAME}}" (config_secrets.py)'
+               for field in inline_secrets(config)]
+    exchange = config.get('exchange')
+    if not isinstance(exchange, dict):
+        return result
+    whitelist = [pair for pair in exchange.get('pair_whitelist', []) if isinstance(pair, str)]
+    stake_currency = config.get('stake_currency')
+    for pair in whitelist:
+        if stake_currency and not pair.endswith(f'/{stake_currency}'):
+            result.append(f'exchange.pair_whitelist: {pair} is not quoted in {stake_currency}')
+    for pair in sorted(set(whitelist) & set(exchange.get('pair_blacklist', []))):
+        result.append(f'exchange.pair_whitelist: {pair} is blacklisted as well')
+    if 'timeframe' in config and 'ticker_interval' in config \
+            and config['timeframe'] != config['ticker_interval']:
+        result.append('timeframe and ticker_interval disagree')
+    return result
+
+
+def compile_config(path: Path) -> Tuple[dict, List[Tuple[str, str]]]:
+    """
+    The resolved config, validated
+    :raises ValueError: listing every problem found
+    """
+    config, sources = resolve(path)
+    found = problems(config)
+    if found:
+        raise ValueError(f'{path}: invalid config\n  ' + '\n  '.join(found))
+    return config, sources
+
+
+def _snapshot_path(directory: Path, path: Path, data: bytes) -> Path:
+    # the path is part of the key, "extends" is relative to it
+    key = _digest(str(path).encode() + b'\0' + data)
+    return directory / f'{path.stem}-{key[:24]}.json'
+
+
+@lru_cache(maxsize=None)
+def _version() -> Tuple[int, str, str]:
+    import freqtrade
+    directory = Path(__file__).resolve().parent
+    sources = b''.join((directory / name).read_bytes()
+                       for name in ('config_compiler.py', 'config_secrets.py'))
+    return COMPILER_VERSION, freqtrade.__version__, _digest(sources)
+
+
+def load_config(path: Path, cache_directory: Optional[Path] = CACHE_DIRECTORY) -> dict:
+    """
+    The resolved and validated config, from the snapshot when nothing it is made of
+    has changed
+    :param cache_directory: None to compile without the cache
+    :raises ValueError: listing every problem found
+    """
+    path = Path(path).resolve()
+    if cache_directory is None:
+        return compile_config(path)[0]
+    data = path.read_bytes()
+    snapshot = _snapshot_path(Path(cache_directory), path, data)
+    try:
+        with open(snapshot, encoding='utf-8') as handle:
+            cached = json.load(handle)
+        # the first source is the file itself, the name of the snapshot is its hash
+        if cached['version'] == list(_version()) and all(
+                _digest(Path(source).read_bytes()) == digest
+                for source, digest in cached['sources'][1:]):
+            return cached['config']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    config, sources = compile_config(path)
+    snapshot.parent.mkdir(parents=True, exist_ok=True)
+    # written aside and renamed, workers starting together may compile the same config
+    temporary = snapshot.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        json.dump({'version': list(_version()), 'sources': sources, 'config': config}, handle)
+    os.replace(temporary, snapshot)
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('configs', type=Path, nargs='+')
+    parser.add_argument('--output', type=Path,
+                        help='write the resolved configs here, for freqtrade --config')
+    parser.add_argument('--cache', type=Path, default=CACHE_DIRECTORY)
+    parser.add_argument('--check', action='store_true',
+                        help='only validate, leave the cache alone')
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.configs:
+        try:
+            config = (compile_config(path)[0] if args.check
+                      else load_config(path, args.cache))
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            failed += 1
+            continue
+        line = f'{path}: ok, {len(config["exchange"].get("pair_whitelist", []))} pairs'
+        if args.output:
+            args.output.mkdir(parents=True, exist_ok=True)
+            target = args.output / path.name
+            target.write_text(json.dumps(config, indent=4))
+            line += f' -> {target}'
+        print(line)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
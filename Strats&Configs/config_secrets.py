@@ -0,0 +1,199 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Exchange and telegram credentials kept out of the configs.
+
+The configs name their credentials instead of holding them:
+
+    "exchange": {"name": "binance", "key": "${BINANCE_KEY}", "secret": "${BINANCE_SECRET}"},
+    "telegram": {"enabled": true, "token": "${TELEGRAM_TOKEN_BOT2}",
+                 "chat_id": "${TELEGRAM_CHAT_ID}"}
+
+so the same file serves every environment and config_compiler.py can cache it. A name
+is looked up in the environment first, then in the secrets file: a JSON object of
+name -> value, user_data/secrets.json or the path in $FT_SECRETS_FILE (see
+secrets.example.json), which should be readable by its owner only. The file is read
+once per process and every value is kept in memory after its first lookup.
+
+freqtrade reads its config from a file, the launcher hands it the resolved config on
+stdin (`--config -`) so the credentials are never written to disk:
+
+    python config_secrets.py config_macd.json -- trade --strategy MACDStrategy
+
+shard.py starts its shards the same way, resolving the credentials once for all of
+them. config_compiler.py rejects a config setting one of SECRET_FIELDS to anything but a
+placeholder, an empty string as well.
+
+The Binance key / secret and the telegram bot tokens the configs held before the
+placeholders are still in the git history of this repository. Removing them from the
+files does not make them secret again: revoke them (Binance API management, @BotFather
+/revoke) and put newly issued ones in the secrets file or the environment only.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import stat
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECRETS_FILE = Path('user_data/secrets.json')
+SECRETS_FILE_VARIABLE = 'FT_SECRETS_FILE'
+
+# (section, key) of the values that must come from a placeholder
+SECRET_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('exchange', 'key'),
+    ('exchange', 'secret'),
+    ('exchange', 'password'),
+    ('exchange', 'uid'),
+    ('telegram', 'token'),
+    ('telegram', 'chat_id'),
+    ('api_server', 'password'),
+    ('api_server', 'jwt_secret_key'),
+    ('indicator_service', 'authkey'),
+)
+
+PLACEHOLDER = re.compile(r'^\$\{([A-Za-z_][A-Za-z0-9_]*)\}$')
+
+
+def placeholder(value) -> Optional[str]:
+    """
+    The name in a "${NAME}" value, None for anything else
+    """
+    match = PLACEHOLDER.match(value) if isinstance(value, str) else None
+    return match.group(1) if match else None
+
+
+def inline_secrets(config: dict) -> List[str]:
+    """
+    The SECRET_FIELDS set to anything but a placeholder, an empty string included (a
+    bot started with it trades without its credentials)
+    """
+    return [f'{section}.{key}' for section, key in SECRET_FIELDS
+            if isinstance(config.get(section), dict) and key in config[section]
+            and placeholder(config[section][key]) is None]
+
+
+class SecretResolver:
+
+    def __init__(self, path: Optional[Path] = None, environ: Optional[Dict[str, str]] = None):
+        """
+        :param path: secrets file, $FT_SECRETS_FILE or user_data/secrets.json when None
+        :param environ: variables looked up first, os.environ when None
+        """
+        self.environ = os.environ if environ is None else environ
+        self.path = Path(path or self.environ.get(SECRETS_FILE_VARIABLE) or SECRETS_FILE)
+        self._file: Optional[Dict[str, str]] = None
+        self._values: Dict[str, str] = {}
+
+    def _read_file(self) -> Dict[str, str]:
+        if self._file is None:
+            self._file = {}
+            if self.path.is_file():
+                if self.path.stat().st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+                    logger.warning('%s can be read by other users, chmod 600 it', self.path)
+                values = json.loads(self.path.read_text())
+                if not isinstance(values, dict):
+                    raise ValueError(f'{self.path}: a JSON object of name -> value expected')
+                self._file = {name: str(value) for name, value in values.items()}
+        return self._file
+
+    def get(self, name: str) -> Optional[str]:
+        value = self._values.get(name)
+        if value is None:
+            value = self.environ.get(name)
+            if value is None:
+                value = self._read_file().get(name)
+            if value is not None:
+                self._values[name] = value
+        return value
+
+    def apply(self, config: dict) -> dict:
+        """
+        A copy of config with every "${NAME}" value replaced, the config itself is
+        left as it is (it may be shared, or come from the compiler's cache)
+        :raises ValueError: naming every placeholder without a value
+        """
+        missing: List[str] = []
+
+        def resolved(value):
+            if isinstance(value, dict):
+                return {key: resolved(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [resolved(item) for item in value]
+            name = placeholder(value)
+            if name is None:
+                return value
+            secret = self.get(name)
+            if secret is None:
+                missing.append(name)
+            return secret
+
+        result = resolved(config)
+        if missing:
+            raise ValueError(f'no value for {", ".join(sorted(set(missing)))} in the '
+                             f'environment or {self.path}')
+        return result
+
+
+_resolver: Optional[SecretResolver] = None
+
+
+def resolver() -> SecretResolver:
+    """
+    The process' SecretResolver, created on the first call
+    """
+    global _resolver
+    if _resolver is None:
+        _resolver = SecretResolver()
+    return _resolver
+
+
+def apply_secrets(config: dict) -> dict:
+    return resolver().apply(config)
+
+
+def freqtrade(config: dict, arguments: List[str]) -> subprocess.Popen:
+    """
+    Starts freqtrade reading the resolved config from stdin
+    :param config: config with placeholders, resolved here
+    :param arguments: freqtrade's subcommand and options, without --config
+    """
+    resolved = json.dumps(apply_secrets(config)).encode()
+    process = subprocess.Popen([sys.executable, '-m', 'freqtrade', *arguments, '--config', '-'],
+                               stdin=subprocess.PIPE)
+    process.stdin.write(resolved)
+    process.stdin.close()
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('config', type=Path)
+    parser.add_argument('--check', action='store_true',
+                        help='only check that every placeholder has a value')
+    parser.add_argument('freqtrade_args', nargs='*', help='passed on to freqtrade, after --')
+    args = parser.parse_args()
+
+    from config_compiler import load_config
+    try:
+        config = load_config(args.config)
+        if args.check:
+            apply_secrets(config)
+            print(f'{args.config}: every secret resolved')
+            return
+        process = freqtrade(config, args.freqtrade_args)
+    except ValueError as error:
+        raise SystemExit(str(error))
+    try:
+        sys.exit(process.wait())
+    except KeyboardInterrupt:
+        sys.exit(process.wait())
+
+
+if __name__ == '__main__':
+    main()
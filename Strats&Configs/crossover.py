@@ -0,0 +1,199 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Crossover detection on NumPy arrays, over a whole history or candle by candle.
+
+crossed_above / crossed_below return what qtpylib.crossed_above / crossed_below return,
+for Series, NumPy arrays (1-D or pairs x candles, along the last axis) and scalars as
+second argument. qtpylib builds half a dozen temporary
+Series over the full history per call, here both comparisons are written into scratch
+buffers kept per thread and shape and reused by the next call, so the result is the only
+new array (none when passed as out=). The factor argument scales the second series in
+the same pass, crossed_below(close, lower, factor=0.98) is
+qtpylib.crossed_below(close, 0.98 * lower).
+
+CrossoverStream takes the candles one at a time and returns the crossing of each as it
+arrives. CrossoverEvents keeps one per pair for frames that grow by a few candles per
+call (a bot loop), feeds it the new candles only and keeps the crossings as dates (they
+are rare), the column for the whole frame is rebuilt from those:
+
+    crossings = CrossoverEvents()
+    events = crossings.events(dataframe, pair, 'close', 'bb_lowerband2', factor=0.98)
+    dataframe.loc[events == BELOW, 'buy'] = 1
+
+The strategies use crossed_above / crossed_below: up to some 20k candles per pair a call
+costs about as much as CrossoverEvents.events, both are dominated by pandas' column
+access, the events only pay off on longer histories.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+ABOVE = 1
+BELOW = -1
+
+# scratch buffers per thread, by shape
+_scratch = threading.local()
+MAX_SHAPES = 8
+
+
+def _buffers(shape: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    buffers = getattr(_scratch, 'buffers', None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+    found = buffers.get(shape)
+    if found is None:
+        if len(buffers) >= MAX_SHAPES:
+            buffers.clear()
+        found = buffers[shape] = (np.empty(shape), np.empty(shape, dtype=bool),
+                                  np.empty(shape, dtype=bool))
+    return found
+
+
+def _crossed(series1, series2, factor: float, now, before, out: Optional[np.ndarray]):
+    series1 = np.asarray(series1, dtype=np.float64)
+    series2 = np.asarray(series2, dtype=np.float64)
+    shape = np.broadcast_shapes(series1.shape, series2.shape)
+    if out is None:
+        out = np.empty(shape, dtype=bool)
+    if shape[-1] == 0:
+        return out
+    scaled, current, previous = _buffers(shape)
+    if factor != 1.0:
+        series2 = np.multiply(series2, factor, out=scaled)
+    with np.errstate(invalid='ignore'):
+        now(series1, series2, out=current)
+        before(series1, series2, out=previous)
+    # the first candle has no previous one, qtpylib compares against NaN there
+    out[..., 0] = False
+    np.logical_and(current[..., 1:], previous[..., :-1], out=out[..., 1:])
+    return out
+
+
+def crossed_above(series1, series2, factor: float = 1.0,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    series1 > factor * series2 after series1 <= factor * series2 on the previous candle
+    :param out: boolean array to write the result to
+    """
+    return _crossed(series1, series2, factor, np.greater, np.less_equal, out)
+
+
+def crossed_below(series1, series2, factor: float = 1.0,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    series1 < factor * series2 after series1 >= factor * series2 on the previous candle
+    :param out: boolean array to write the result to
+    """
+    return _crossed(series1, series2, factor, np.less, np.greater_equal, out)
+
+
+class CrossoverStream:
+    """
+    Two series, one candle at a time
+    """
+
+    def __init__(self, factor: float = 1.0):
+        self.factor = factor
+        self._previous1 = float('nan')
+        self._previous2 = float('nan')
+
+    def update(self, value1: float, value2: float) -> int:
+        """
+        :return: ABOVE / BELOW when series1 crossed factor * series2 on this candle, 0 else
+        """
+        value2 = value2 * self.factor
+        event = 0
+        if value1 > value2 and self._previous1 <= self._previous2:
+            event = ABOVE
+        elif value1 < value2 and self._previous1 >= self._previous2:
+            event = BELOW
+        self._previous1 = value1
+        self._previous2 = value2
+        return event
+
+
+class _PairEvents:
+
+    def __init__(self, factor: float):
+        self.stream = CrossoverStream(factor)
+        self.last_date = None
+        self.dates = np.empty(0, dtype='datetime64[ns]')
+        self.directions = np.empty(0, dtype=np.int8)
+
+
+class CrossoverEvents:
+    """
+    Crossings of two dataframe columns per pair, for frames growing by a few candles per
+    call. The first call (or a gap in the candles) runs crossed_above / crossed_below
+    over the whole frame.
+    """
+
+    def __init__(self):
+        self._pairs: Dict[Tuple[str, str, str, float], _PairEvents] = {}
+
+    def reset(self, pair: Optional[str] = None):
+        if pair is None:
+            self._pairs.clear()
+        else:
+            for key in [key for key in self._pairs if key[0] == pair]:
+                del self._pairs[key]
+
+    def events(self, dataframe: DataFrame, pair: str, series1: str, series2: str,
+               factor: float = 1.0) -> np.ndarray:
+        """
+        :param dataframe: DataFrame with date and the two columns
+        :param pair: pair the dataframe belongs to
+        :param series1: column crossing
+        :param series2: column crossed, scaled by factor
+        :return: int8 per candle, ABOVE / BELOW where series1 crossed, 0 elsewhere
+        """
+        length = len(dataframe)
+        result = np.zeros(length, dtype=np.int8)
+        if length == 0:
+            return result
+        dates = dataframe['date'].values
+        values1 = dataframe[series1].values
+        values2 = dataframe[series2].values
+        key = (pair, series1, series2, factor)
+        state = self._pairs.get(key)
+        start = 0
+        if state is not None:
+            # dates are sorted, the new candles follow the last one seen
+            start = int(np.searchsorted(dates, state.last_date, side='right'))
+            if start == 0 or dates[start - 1] != state.last_date:
+                # candles missing between the last call and this frame, start over
+                state = None
+                start = 0
+
+        if state is None:
+            state = self._pairs[key] = _PairEvents(factor)
+            above = crossed_above(values1, values2, factor)
+            below = crossed_below(values1, values2, factor)
+            crossed = np.flatnonzero(above | below)
+            state.dates = dates[crossed]
+            state.directions = np.where(above[crossed], ABOVE, BELOW).astype(np.int8)
+            # the stream continues from the last candle
+            state.stream.update(float(values1[-1]), float(values2[-1]))
+        elif start < length:
+            new_dates = []
+            new_directions = []
+            for i in range(start, length):
+                event = state.stream.update(float(values1[i]), float(values2[i]))
+                if event:
+                    new_dates.append(dates[i])
+                    new_directions.append(event)
+            if new_dates:
+                state.dates = np.concatenate((state.dates, np.array(new_dates, dtype=dates.dtype)))
+                state.directions = np.concatenate((state.directions,
+                                                   np.array(new_directions, dtype=np.int8)))
+        state.last_date = dates[-1]
+
+        # crossings older than the frame are of no use anymore
+        keep = state.dates >= dates[0]
+        if not keep.all():
+            state.dates = state.dates[keep]
+            state.directions = state.directions[keep]
+        result[np.searchsorted(dates, state.dates)] = state.directions
+        return result
@@ -0,0 +1,183 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Vectorized ROI / stoploss exit simulator.
+
+For a set of entries it finds the first candle where the high reaches the minimal_roi
+target of the trade's age, a sell signal comes in or the low breaches the stoploss, for
+all trades at once. The
+forward scan runs over (trades x candles) chunks of the OHLC arrays, chunks double in
+length for the trades still open so long trades take few steps.
+
+Follows freqtrade 2021.5's backtesting (should_sell() and Backtesting._get_close_rate)
+for a static stoploss:
+ - the trade opens at the open of its entry candle
+ - the ROI step used on a candle is the one with the largest minute key <= trade age, it
+   is reached when the profit at the high, fees included and rounded to 8 digits as
+   calc_profit_ratio does, is above it
+ - the stoploss is hit when the low reaches open * (1 + stoploss)
+ - with sell signals (ask_strategy.use_sell_signal): a sell on candle t without a buy on
+   it sells at the open of candle t + 1
+ - on one candle: ROI unless the stoploss is hit too, then the sell signal, then the
+   stoploss
+ - stoploss exits at the stop price, at the open when the stop is above the candle's high
+ - ROI exits at open * (1 + roi + fee) / (1 - fee), at the open when the candle starts
+   a new ROI step and opens above that, otherwise clamped to the candle's low / high;
+   a roi of -1 exits at the open of a candle starting its step
+ - trades still open at the last candle are closed at its open
+Trailing stops, custom_sell, sell_profit_only and order fill details are not simulated.
+
+    result = simulate_exits(entries, dataframe['open'].values, dataframe['high'].values,
+                            dataframe['low'].values, dataframe['close'].values,
+                            BBRSI.minimal_roi, BBRSI.stoploss, timeframe_minutes=60)
+"""
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+EXIT_ROI = 0
+EXIT_STOPLOSS = 1
+EXIT_FORCE = 2
+EXIT_SELL_SIGNAL = 3
+
+
+class ExitResult:
+
+    def __init__(self, entries: np.ndarray, exits: np.ndarray, open_rate: np.ndarray,
+                 close_rate: np.ndarray, reason: np.ndarray):
+        self.entries = entries
+        self.exits = exits
+        self.open_rate = open_rate
+        self.close_rate = close_rate
+        self.reason = reason
+
+    def profit_ratio(self, fee: float = 0.0) -> np.ndarray:
+        return (self.close_rate * (1 - fee)) / (self.open_rate * (1 + fee)) - 1
+
+    def select(self, trades: np.ndarray) -> 'ExitResult':
+        return ExitResult(self.entries[trades], self.exits[trades], self.open_rate[trades],
+                          self.close_rate[trades], self.reason[trades])
+
+    def non_overlapping(self) -> 'ExitResult':
+        """
+        freqtrade holds one trade per pair: keep the first entry, then the first entry
+        after its exit and so on. Entries have to be sorted.
+        """
+        keep = []
+        free_from = -1
+        for trade, entry in enumerate(self.entries):
+            if entry > free_from:
+                keep.append(trade)
+                free_from = self.exits[trade]
+        return self.select(np.array(keep, dtype=np.int64))
+
+
+def roi_steps(minimal_roi: Dict[Union[str, int], float], timeframe_minutes: int,
+              offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ROI step per candle offset from the entry, min_roi_reached_entry() of the trade's age
+    :return: minute key of the step (-1 where none applies yet), its ROI (NaN there)
+    """
+    steps = sorted((int(minutes), roi) for minutes, roi in minimal_roi.items())
+    keys = np.array([minutes for minutes, _ in steps] + [-1], dtype=np.int64)
+    rois = np.array([roi for _, roi in steps] + [np.nan], dtype=np.float64)
+    position = np.searchsorted(keys[:-1], offsets * timeframe_minutes, side='right') - 1
+    # -1 (no step reached yet) picks the entries at the end
+    return keys[position], rois[position]
+
+
+def roi_by_offset(minimal_roi: Dict[Union[str, int], float], timeframe_minutes: int,
+                  offsets: np.ndarray) -> np.ndarray:
+    """
+    ROI target per candle offset from the entry, NaN where no step applies yet
+    """
+    return roi_steps(minimal_roi, timeframe_minutes, offsets)[1]
+
+
+def _roi_close_rate(open_rate: np.ndarray, open_: np.ndarray, high: np.ndarray,
+                    low: np.ndarray, age: np.ndarray, roi_entry: np.ndarray, roi: np.ndarray,
+                    timeframe_minutes: int, fee: float) -> np.ndarray:
+    # Backtesting._get_close_rate for an ROI exit, age and roi_entry in minutes
+    step_on_candle = roi_entry % timeframe_minutes == 0
+    with np.errstate(invalid='ignore'):
+        rate = open_rate * (roi + 1 + fee) / (1 - fee)
+        new_step = (age > 0) & (age == roi_entry) & step_on_candle & (open_ > rate)
+        return np.where((roi == -1) & step_on_candle | new_step, open_,
+                        np.minimum(np.maximum(rate, low), high))
+
+
+def simulate_exits(entries: np.ndarray, open_: np.ndarray, high: np.ndarray,
+                   low: np.ndarray, close: np.ndarray,
+                   minimal_roi: Dict[Union[str, int], float], stoploss: float,
+                   timeframe_minutes: int, sell: Optional[np.ndarray] = None,
+                   fee: float = 0.0, chunk: int = 32) -> ExitResult:
+    """
+    :param entries: index of the candle each trade opens on
+    :param open_, high, low, close: candle arrays of the pair
+    :param minimal_roi: minimal_roi table, minute keys as str or int
+    :param stoploss: stoploss ratio, e.g. -0.10
+    :param timeframe_minutes: candle length
+    :param sell: per candle a sell signal without a buy signal, None to ignore sells
+    :param fee: fee ratio per side, part of the ROI check and price as in freqtrade
+    :param chunk: candles scanned per trade in the first step
+    :return: ExitResult, one entry per trade in the order given
+    """
+    entries = np.asarray(entries, dtype=np.int64)
+    length = len(high)
+    trades = len(entries)
+    open_rate = open_[entries]
+    stop_rate = open_rate * (1 + stoploss)
+
+    exits = np.full(trades, length - 1, dtype=np.int64)
+    close_rate = np.empty(trades, dtype=np.float64)
+    reason = np.full(trades, EXIT_FORCE, dtype=np.int8)
+    if trades:
+        close_rate[:] = open_[length - 1]
+
+    # the sell signal of the previous candle, acted on at this one's open
+    sell_at = np.zeros(length, dtype=bool)
+    if sell is not None:
+        sell_at[1:] = np.asarray(sell, dtype=bool)[:-1]
+
+    active = np.arange(trades)
+    offset = 0
+    while active.size and offset < length:
+        offsets = offset + np.arange(chunk)
+        index = entries[active, None] + offsets[None, :]
+        inside = index < length
+        index = np.minimum(index, length - 1)
+
+        roi_entry, roi = roi_steps(minimal_roi, timeframe_minutes, offsets)
+        with np.errstate(invalid='ignore'):
+            stop_hit = inside & (low[index] <= stop_rate[active, None])
+            # calc_profit_ratio(high) > roi
+            profit = np.round(high[index] * (1 - fee) / (open_rate[active, None] * (1 + fee))
+                              - 1, 8)
+            roi_hit = inside & (profit > roi[None, :])
+        sell_hit = inside & sell_at[index]
+        hit = stop_hit | roi_hit | sell_hit
+
+        done = hit.any(axis=1)
+        first = hit.argmax(axis=1)[done]
+        rows = np.flatnonzero(done)
+        trade = active[done]
+        candle = index[rows, first]
+        by_roi = roi_hit[rows, first] & ~stop_hit[rows, first]
+        by_sell = ~by_roi & sell_hit[rows, first]
+        exits[trade] = candle
+        reason[trade] = np.select([by_roi, by_sell], [EXIT_ROI, EXIT_SELL_SIGNAL],
+                                  EXIT_STOPLOSS)
+        close_rate[trade] = np.select(
+            [by_roi, by_sell],
+            [_roi_close_rate(open_rate[trade], open_[candle], high[candle], low[candle],
+                             offsets[first] * timeframe_minutes, roi_entry[first],
+                             roi[first], timeframe_minutes, fee),
+             open_[candle]],
+            # the stop was above the candle already (a gap down), sold at the open
+            np.where(stop_rate[trade] > high[candle], open_[candle], stop_rate[trade]))
+
+        # trades past the last candle keep the forced exit
+        active = active[~done & inside[:, -1]]
+        offset += chunk
+        chunk *= 2
+
+    return ExitResult(entries, exits, open_rate, close_rate, reason)
@@ -0,0 +1,579 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Append-only indicator state for live / dry-run bots.
+
+In live mode freqtrade hands populate_indicators the whole candle history on every loop
+although only the newest candle changed. The states below keep what the indicators need
+(Wilder averages, EMAs, rolling sums) per pair and advance in O(1) per new candle.
+
+Every state replays the exact recurrence of the function it replaces (TA-Lib's C code,
+pandas' online rolling algorithm), so the values are the ones talib / qtpylib return for
+the same candle history. talib builds compiled with FMA contraction round the EMA step
+once, EMAState does the same when the installed talib does (FUSED).
+    RSIState        ta.RSI
+    EMAState        ta.EMA
+    MACDState       ta.MACD (including talib's late seeding of the fast EMA)
+    CCIState        ta.CCI
+    BollingerState  qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window, stds)
+
+The first frame of a pair goes through warm(), vectorized: talib (pandas for the bands)
+runs over the whole history once and the state is left where candle by candle updates
+would have.
+
+A pair's states are kept by the date of the last candle they were fed. A frame holding
+that candle and newer ones advances them over the new candles only, whether it grew
+(backtesting a growing history, a restarted download) or slid (freqtrade's live
+dataframe is the last ohlcv_candle_limit candles, its first candle moves with every new
+one). A frame without it (a gap, the first call) warms them again.
+
+The values are those of a talib call over every candle the states were fed, from the
+pair's first frame on, bit for bit (BollingerState to ~1e-12, see there). On a sliding
+window that is not the talib call over the window itself: RSI, EMA and MACD never forget
+a candle, a call over the window, and a backtest, start their warm-up from its first
+candle while the states remember the older ones. The two converge as the older candles
+decay out of the averages (a few times the period), reset(pair) re-seeds a pair from its
+next frame. This note holds for every module here keeping indicator state across bot
+loops (macd_cci.py, indicator_service.py).
+"""
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import talib
+from pandas import DataFrame, Series
+
+from rsi import RECIPROCAL, WilderRSI
+
+nan = float('nan')
+
+
+def _fma(a: float, b: float, c: float) -> float:
+    # a * b + c rounded once, math.fma from Python 3.13 on
+    return float(Fraction(a) * Fraction(b) + Fraction(c))
+
+
+fma = getattr(math, 'fma', _fma)
+
+
+def _talib_fused(period: int = 9) -> bool:
+    """
+    talib's EMA step ((value - previous) * k) + previous, builds compiled with FMA
+    contraction round it once. Which one the installed talib is, from a short series.
+    """
+    close = 100.0 + np.sin(np.arange(2000) * 0.7) * np.arange(2000) / 50
+    expected = talib.EMA(close, timeperiod=period).tolist()
+    k = 2.0 / (period + 1)
+    previous = expected[period - 1]
+    for value, target in zip(close[period:].tolist(), expected[period:]):
+        if ((value - previous) * k) + previous != target:
+            return fma(value - previous, k, previous) == target
+        previous = target
+    return False
+
+
+FUSED = _talib_fused()
+
+
+class IndicatorState(ABC):
+    """
+    One indicator, fed one candle at a time.
+    columns: names of the dataframe columns update() returns values for, in order
+    exact: update() after warm() continues the full-frame values bit for bit, not only
+        to rounding
+    """
+    columns: Tuple[str, ...] = ()
+    exact = True
+
+    @abstractmethod
+    def update(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        """
+        Feeds the next candle
+        :return: one value per column
+        """
+
+    def warm(self, high: np.ndarray, low: np.ndarray,
+             close: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Feeds a whole candle history to a fresh state
+        :return: one array per column, the values update() returns candle by candle
+        """
+        results = tuple(np.empty(len(close)) for _ in self.columns)
+        for i in range(len(close)):
+            values = self.update(float(high[i]), float(low[i]), float(close[i]))
+            for result, value in zip(results, values):
+                result[i] = value
+        return results
+
+
+class EMAState(IndicatorState):
+
+    def __init__(self, period: int = 30, column: str = 'ema'):
+        self.columns = (column,)
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+        self._seed = 0.0
+        self._count = 0
+
+    def push(self, value: float) -> float:
+        if self.value is None:
+            # talib seeds the EMA with the simple average of the first period values
+            self._seed += value
+            self._count += 1
+            if self._count < self.period:
+                return nan
+            self.value = self._seed / self.period
+        elif FUSED:
+            self.value = fma(value - self.value, self.k, self.value)
+        else:
+            self.value = ((value - self.value) * self.k) + self.value
+        return self.value
+
+    def push_all(self, values: np.ndarray) -> np.ndarray:
+        """
+        push() for a whole series on a fresh state, talib computes the seeded part
+        """
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        if len(values) < self.period:
+            for value in values:
+                self.push(float(value))
+            return np.full(len(values), nan)
+        result = talib.EMA(values, timeperiod=self.period)
+        self._count = self.period
+        self.value = float(result[-1])
+        return result
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        return (self.push(close),)
+
+    def warm(self, high: np.ndarray, low: np.ndarray,
+             close: np.ndarray) -> Tuple[np.ndarray, ...]:
+        return (self.push_all(close),)
+
+
+class RSIState(IndicatorState):
+
+    def __init__(self, period: int = 14, column: str = 'rsi'):
+        self.columns = (column,)
+        self.period = period
+        self.gain = 0.0
+        self.loss = 0.0
+        self._prev: Optional[float] = None
+        self._count = 0
+
+    def _average(self, total: float) -> float:
+        # the division the installed talib does, see rsi.RECIPROCAL
+        return total * (1.0 / self.period) if RECIPROCAL else total / self.period
+
+    def push(self, close: float) -> float:
+        prev, self._prev = self._prev, close
+        if prev is None:
+            return nan
+        diff = close - prev
+        self._count += 1
+        if self._count <= self.period:
+            # Accumulate Wilder's average gain / loss over the initial period
+            if diff < 0:
+                self.loss -= diff
+            else:
+                self.gain += diff
+            if self._count < self.period:
+                return nan
+            self.loss = self._average(self.loss)
+            self.gain = self._average(self.gain)
+        else:
+            self.loss *= (self.period - 1)
+            self.gain *= (self.period - 1)
+            if diff < 0:
+                self.loss -= diff
+            else:
+                self.gain += diff
+            self.loss = self._average(self.loss)
+            self.gain = self._average(self.gain)
+        total = self.gain + self.loss
+        # talib's TA_IS_ZERO
+        if -0.00000001 < total < 0.00000001:
+            return 0.0
+        return 100.0 * (self.gain / total)
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        return (self.push(close),)
+
+    def warm(self, high: np.ndarray, low: np.ndarray,
+             close: np.ndarray) -> Tuple[np.ndarray, ...]:
+        # talib for the values, one replay for the state
+        rsi = WilderRSI(self.period)
+        values = rsi.update(close)
+        if len(close):
+            self.gain = float(rsi.gain[0])
+            self.loss = float(rsi.loss[0])
+            self._count = int(rsi.count[0])
+            self._prev = float(rsi.previous[0])
+        return (values,)
+
+
+class MACDState(IndicatorState):
+
+    def __init__(self, fastperiod: int = 12, slowperiod: int = 26, signalperiod: int = 9,
+                 columns: Tuple[str, str, str] = ('macd', 'macdsignal', 'macdhist')):
+        self.columns = columns
+        self.fastperiod = fastperiod
+        self.slowperiod = slowperiod
+        self.fast = EMAState(fastperiod)
+        self.slow = EMAState(slowperiod)
+        self.signal = EMAState(signalperiod)
+        self._warmup: deque = deque(maxlen=fastperiod)
+        self._count = 0
+
+    def push(self, close: float) -> Tuple[float, float, float]:
+        self._count += 1
+        self.slow.push(close)
+        if self.fast.value is None:
+            # talib only starts the fast EMA once the slow one is seeded, from the last
+            # fastperiod closes, so buffer them until then
+            self._warmup.append(close)
+            if self._count < self.slowperiod:
+                return nan, nan, nan
+            for value in self._warmup:
+                self.fast.push(value)
+        else:
+            self.fast.push(close)
+        macd = self.fast.value - self.slow.value
+        signal = self.signal.push(macd)
+        if math.isnan(signal):
+            return nan, nan, nan
+        return macd, signal, macd - signal
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        return self.push(close)
+
+    def warm(self, high: np.ndarray, low: np.ndarray,
+             close: np.ndarray) -> Tuple[np.ndarray, ...]:
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        length = len(close)
+        slow = self.slow.push_all(close)
+        self._count = length
+        if length < self.slowperiod:
+            self._warmup.extend(close.tolist())
+            return tuple(np.full(length, nan) for _ in range(3))
+        # the same EMAs talib.MACD runs internally, fast seeded from the last fastperiod
+        # closes of the slow EMA's seed window
+        fast = self.fast.push_all(close[self.slowperiod - self.fastperiod:])
+        line = fast[self.fastperiod - 1:] - slow[self.slowperiod - 1:]
+        signal_line = self.signal.push_all(line)
+        macd = np.full(length, nan)
+        signal = np.full(length, nan)
+        macd[self.slowperiod - 1:] = np.where(np.isnan(signal_line), nan, line)
+        signal[self.slowperiod - 1:] = signal_line
+        return macd, signal, macd - signal
+
+
+class CCIState(IndicatorState):
+
+    def __init__(self, period: int = 14, column: str = 'cci'):
+        self.columns = (column,)
+        self.period = period
+        # talib sums the circular buffer in slot order, keep the same layout
+        self._buffer = [0.0] * period
+        self._idx = 0
+        self._count = 0
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        last = (high + low + close) / 3
+        self._buffer[self._idx] = last
+        self._idx = (self._idx + 1) % self.period
+        self._count += 1
+        if self._count < self.period:
+            return (nan,)
+        average = 0.0
+        for value in self._buffer:
+            average += value
+        average /= self.period
+        deviation = 0.0
+        for value in self._buffer:
+            deviation += abs(value - average)
+        diff = last - average
+        if diff != 0.0 and deviation != 0.0:
+            return (diff / (0.015 * (deviation / self.period)),)
+        return (0.0,)
+
+    def warm(self, high: np.ndarray, low: np.ndarray,
+             close: np.ndarray) -> Tuple[np.ndarray, ...]:
+        high, low, close = (np.ascontiguousarray(values, dtype=np.float64)
+                            for values in (high, low, close))
+        length = len(close)
+        typical = (high + low + close) / 3
+        for i in range(max(0, length - self.period), length):
+            self._buffer[i % self.period] = float(typical[i])
+        self._idx = length % self.period
+        self._count = length
+        return (talib.CCI(high, low, close, timeperiod=self.period),)
+
+
+class RollingMeanStd:
+    """
+    Rolling mean / sample std with min_periods=1, following pandas' online
+    (Kahan compensated, Welford) rolling algorithm step by step.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: deque = deque()
+        # mean
+        self._nobs = 0
+        self._sum = 0.0
+        self._neg = 0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        # variance
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._var_comp_add = 0.0
+        self._var_comp_remove = 0.0
+        # run of identical values, pandas returns them as is
+        self._same = 0
+        self._prev: Optional[float] = None
+
+    def _remove(self, val: float):
+        self._nobs -= 1
+        y = - val - self._comp_remove
+        t = self._sum + y
+        self._comp_remove = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, val) < 0:
+            self._neg -= 1
+        if self._nobs:
+            prev_mean = self._mean - self._var_comp_remove
+            y = val - self._var_comp_remove
+            t = y - self._mean
+            self._var_comp_remove = t + self._mean - y
+            self._mean = self._mean - t / self._nobs
+            self._ssqdm = self._ssqdm - (val - prev_mean) * (val - self._mean)
+        else:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+
+    def _add(self, val: float):
+        self._nobs += 1
+        y = val - self._comp_add
+        t = self._sum + y
+        self._comp_add = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, val) < 0:
+            self._neg += 1
+        if val == self._prev:
+            self._same += 1
+        else:
+            self._same = 1
+        self._prev = val
+        prev_mean = self._mean - self._var_comp_add
+        y = val - self._var_comp_add
+        t = y - self._mean
+        self._var_comp_add = t + self._mean - y
+        self._mean = self._mean + t / self._nobs
+        self._ssqdm = self._ssqdm + (val - prev_mean) * (val - self._mean)
+
+    def push(self, val: float) -> Tuple[float, float]:
+        self._values.append(val)
+        if len(self._values) > self.window:
+            self._remove(self._values.popleft())
+        self._add(val)
+
+        nobs = self._nobs
+        mean = self._sum / nobs
+        if self._same >= nobs:
+            mean = self._prev
+        elif self._neg == 0 and mean < 0:
+            mean = 0.0
+        elif self._neg == nobs and mean > 0:
+            mean = 0.0
+
+        if nobs <= 1:
+            return mean, nan
+        if self._same >= nobs:
+            return mean, 0.0
+        var = self._ssqdm / (nobs - 1)
+        return mean, math.sqrt(var) if var > 0 else 0.0
+
+
+class BollingerState(IndicatorState):
+    """
+    template: column names, formatted with band (lower / middle / upper) and std
+
+    warm() takes the bands from pandas' rolling over the whole history and restarts the
+    online state from the last window candles. pandas carries the rounding of its running
+    sums from the first candle on, updates after a warm() agree to ~1e-12, not bit for bit.
+    """
+    exact = False
+
+    def __init__(self, window: int = 20, stds: Tuple[float, ...] = (2,),
+                 template: str = 'bb_{band}band{std}'):
+        self.window = window
+        self.stds = stds
+        self.columns = tuple(template.format(band=band, std=std)
+                             for std in stds for band in ('lower', 'middle', 'upper'))
+        self._rolling = RollingMeanStd(window)
+
+    def _bands(self, mid, std) -> tuple:
+        values: list = []
+        for n in self.stds:
+            width = std * n
+            values += [mid - width, mid, mid + width]
+        return tuple(values)
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        return self._bands(*self._rolling.push((high + low + close) / 3.))
+
+    def warm(self, high: np.ndarray, low: np.ndarray,
+             close: np.ndarray) -> Tuple[np.ndarray, ...]:
+        typical = (np.asarray(high, dtype=np.float64) + low + close) / 3.
+        # min_periods=1 for both, as qtpylib.bollinger_bands
+        rolling = Series(typical).rolling(window=self.window, min_periods=1)
+        self._rolling = RollingMeanStd(self.window)
+        for value in typical[-self.window:].tolist():
+            self._rolling.push(value)
+        return self._bands(rolling.mean().values, rolling.std().values)
+
+
+class ColumnBuffer:
+    """
+    The last values of a few indicator columns, (columns x capacity) float64 allocated
+    once and written in place. When it fills up the newest values move to the front, so
+    the ones of the current frame are always one contiguous slice.
+    """
+
+    def __init__(self, rows: int, capacity: int = 1024):
+        self.values = np.full((rows, capacity), nan)
+        self.length = 0
+
+    def reserve(self, extra: int):
+        needed = self.length + extra
+        if needed > self.values.shape[1]:
+            grown = np.full((self.values.shape[0], max(needed, 2 * self.values.shape[1])), nan)
+            grown[:, :self.length] = self.values[:, :self.length]
+            self.values = grown
+
+    def trim(self, keep: int):
+        """
+        Keeps the newest keep values once the buffer holds twice as many
+        """
+        if self.length >= 2 * keep:
+            self.values[:, :keep] = self.values[:, self.length - keep:self.length]
+            self.length = keep
+
+    def tail(self, length: int) -> np.ndarray:
+        """
+        (columns x length) view of the newest values, overwritten by later updates
+        """
+        return self.values[:, self.length - length:self.length]
+
+
+class _PairState:
+
+    def __init__(self, indicators: List[IndicatorState], capacity: int):
+        self.indicators = indicators
+        self.columns = [column for indicator in indicators for column in indicator.columns]
+        self.last_date = None
+        self.buffer = ColumnBuffer(len(self.columns), capacity)
+
+    def advance(self, high: np.ndarray, low: np.ndarray, close: np.ndarray):
+        buffer = self.buffer
+        buffer.reserve(len(close))
+        values = buffer.values
+        column = buffer.length
+        for h, l, c in zip(high.tolist(), low.tolist(), close.tolist()):
+            row = 0
+            for indicator in self.indicators:
+                for value in indicator.update(h, l, c):
+                    values[row, column] = value
+                    row += 1
+            column += 1
+        buffer.length = column
+
+    def warm(self, high: np.ndarray, low: np.ndarray, close: np.ndarray):
+        buffer = self.buffer
+        buffer.reserve(len(close))
+        row = 0
+        for indicator in self.indicators:
+            for values in indicator.warm(high, low, close):
+                buffer.values[row, :len(close)] = values
+                row += 1
+        buffer.length = len(close)
+
+
+class IncrementalIndicators:
+    """
+    Keeps one set of indicator states per pair.
+
+        incremental = IncrementalIndicators(lambda: [RSIState(14), BollingerState(20, (1, 3))])
+
+        def populate_indicators(self, dataframe, metadata):
+            return self.incremental.populate(dataframe, metadata['pair'])
+
+    Only candles newer than the last one seen for the pair are fed to the states, the
+    first call (or a gap in the candles) warms them on the whole dataframe, see the module
+    for what the values are on a sliding window. warmed / advanced count the calls taking
+    either way.
+    """
+
+    def __init__(self, factory: Callable[[], List[IndicatorState]]):
+        self._factory = factory
+        self._pairs: Dict[str, _PairState] = {}
+        self.warmed = 0
+        self.advanced = 0
+
+    def new_states(self) -> List[IndicatorState]:
+        """
+        A fresh set of the indicator states, not tied to any pair
+        """
+        return self._factory()
+
+    def reset(self, pair: Optional[str] = None):
+        if pair is None:
+            self._pairs.clear()
+        else:
+            self._pairs.pop(pair, None)
+
+    def populate(self, dataframe: DataFrame, pair: str) -> DataFrame:
+        """
+        Advances the pair's indicators to the last candle and writes their columns
+        :param dataframe: candle DataFrame with date / high / low / close columns
+        :param pair: pair the dataframe belongs to
+        :return: the same dataframe with the indicator columns set
+        """
+        length = len(dataframe)
+        if length == 0:
+            return dataframe
+        dates = dataframe['date'].values
+        state = self._pairs.get(pair)
+        start = 0
+        if state is not None:
+            start = length - int(np.count_nonzero(dates > state.last_date))
+            if start == 0 or start > state.buffer.length or dates[start - 1] != state.last_date:
+                # candles missing between the last update and this frame, or a frame
+                # reaching back further than the values kept, start over
+                state = None
+                start = 0
+        if state is None:
+            state = self._pairs[pair] = _PairState(self._factory(), capacity=2 * length)
+
+        high = dataframe['high'].values
+        low = dataframe['low'].values
+        close = dataframe['close'].values
+        if start == 0:
+            state.warm(high, low, close)
+            self.warmed += 1
+        else:
+            state.advance(high[start:], low[start:], close[start:])
+            self.advanced += 1
+        state.last_date = dates[-1]
+        state.buffer.trim(length)
+
+        values = state.buffer.tail(length)
+        for row, column in enumerate(state.columns):
+            # copied, the buffer is overwritten by later loops
+            dataframe[column] = values[row].copy()
+        return dataframe
@@ -0,0 +1,169 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+On-disk indicator cache for backtesting / hyperopt.
+
+Hyperoptable strategies compute every candidate band in populate_indicators while the
+epochs only change which one is used. The computed columns are stored once per
+pair, timeframe, candle range and indicator code hash as .npy files and loaded
+memory-mapped afterwards, so a rerun (or another worker) never recomputes them.
+
+The code hash covers the compute function, every module of this directory it uses
+(indicators.py, rsi.py, crossover.py, ... and what those use in turn), the talib and
+pandas versions and CACHE_VERSION, bump that for a change the hash cannot see.
+
+    def populate_indicators(self, dataframe, metadata):
+        return cached_indicators(self, dataframe, metadata, self.compute_indicators)
+
+Live and dry-run always compute, the candle range changes every candle there.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType, ModuleType
+from typing import Callable, Dict, Iterator, Optional
+
+import numpy as np
+import pandas
+import talib
+from pandas import DataFrame
+
+CACHED_RUNMODES = ('backtest', 'hyperopt')
+
+CACHE_VERSION = 1
+STRATEGY_DIR = Path(__file__).resolve().parent
+
+_caches: Dict[str, 'IndicatorCache'] = {}
+
+
+def _names(code: CodeType) -> Iterator[str]:
+    # the global names of a function, including its lambdas and comprehensions
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            yield from _names(const)
+
+
+def _local_modules(obj, found: Dict[str, ModuleType]):
+    """
+    Adds the module of this directory obj belongs to and the ones that module uses
+    """
+    module = obj if inspect.ismodule(obj) else inspect.getmodule(obj)
+    path = getattr(module, '__file__', None)
+    if path is None or module.__name__ in found or Path(path).resolve().parent != STRATEGY_DIR:
+        return
+    found[module.__name__] = module
+    for value in vars(module).values():
+        if inspect.ismodule(value) or inspect.isfunction(value) or inspect.isclass(value):
+            _local_modules(value, found)
+
+
+def _used_modules(obj, found: Dict[str, ModuleType]):
+    """
+    Adds the modules of this directory a function refers to, transitively
+    """
+    if isinstance(obj, (staticmethod, classmethod)) or inspect.ismethod(obj):
+        obj = obj.__func__
+    if inspect.isfunction(obj):
+        for name in _names(obj.__code__):
+            if name in obj.__globals__:
+                _local_modules(obj.__globals__[name], found)
+    _local_modules(obj, found)
+
+
+@lru_cache(maxsize=None)
+def code_hash(*objects) -> str:
+    """
+    Hash of the source code of the given functions and of the modules here they use,
+    per process
+    """
+    digest = hashlib.sha1(f'{CACHE_VERSION} {talib.__version__} {pandas.__version__}'.encode())
+    modules: Dict[str, ModuleType] = {}
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+        _used_modules(obj, modules)
+    for name in sorted(modules):
+        digest.update(inspect.getsource(modules[name]).encode())
+    return digest.hexdigest()[:16]
+
+
+class IndicatorCache:
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(pair: str, timeframe: str, dataframe: DataFrame, code: str) -> str:
+        start = dataframe['date'].iloc[0].strftime('%Y%m%d%H%M')
+        end = dataframe['date'].iloc[-1].strftime('%Y%m%d%H%M')
+        return (f"{pair.replace('/', '_')}-{timeframe}-{start}-{end}-"
+                f"{len(dataframe)}-{code}")
+
+    def load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        :return: column -> read-only memory-mapped array, None on a cache miss
+        """
+        path = self.directory / key
+        try:
+            columns = json.loads((path / 'columns.json').read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        return {column: np.load(path / f'{i}.npy', mmap_mode='r')
+                for i, column in enumerate(columns)}
+
+    def store(self, key: str, columns: Dict[str, np.ndarray]):
+        """
+        Written to a temporary directory and renamed, parallel writers of the same key
+        never leave a half written entry behind.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self.directory, prefix='.tmp-'))
+        try:
+            for i, values in enumerate(columns.values()):
+                np.save(tmp / f'{i}.npy', np.asarray(values, dtype=np.float64))
+            (tmp / 'columns.json').write_text(json.dumps(list(columns)))
+            os.rename(tmp, self.directory / key)
+        except OSError:
+            # someone else stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def get_cache(directory: Path) -> IndicatorCache:
+    directory = str(directory)
+    if directory not in _caches:
+        _caches[directory] = IndicatorCache(Path(directory))
+    return _caches[directory]
+
+
+def cached_indicators(strategy, dataframe: DataFrame, metadata: dict,
+                      compute: Callable[[DataFrame], DataFrame]) -> DataFrame:
+    """
+    Adds the columns compute() adds, from the cache when possible
+    :param strategy: the strategy instance, used for runmode, timeframe and user_data_dir
+    :param dataframe: candle DataFrame
+    :param metadata: metadata as passed to populate_indicators
+    :param compute: function adding the indicator columns to a DataFrame
+    :return: dataframe with the indicator columns
+    """
+    dp = getattr(strategy, 'dp', None)
+    if dp is None or dp.runmode.value not in CACHED_RUNMODES or len(dataframe) == 0:
+        return compute(dataframe)
+
+    cache = get_cache(Path(strategy.config.get('user_data_dir', '.')) / 'indicator_cache')
+    key = cache.key(metadata['pair'], strategy.timeframe, dataframe,
+                    code_hash(compute))
+    columns = cache.load(key)
+    if columns is not None:
+        for column, values in columns.items():
+            dataframe[column] = values
+        return dataframe
+
+    existing = set(dataframe.columns)
+    dataframe = compute(dataframe)
+    cache.store(key, {column: dataframe[column].values
+                      for column in dataframe.columns if column not in existing})
+    return dataframe
@@ -0,0 +1,595 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Local indicator service shared by bots running on the same exchange.
+
+BBRSI, BbandRsi, MACD and Low_BB bots trade overlapping whitelists and each one computes
+the same RSI / Bollinger series for the same candles. The service keeps the candles of
+every pair and timeframe once, computes an indicator once per new candle and hands the
+result to every bot as a view of a shared memory block (shared_frames.py).
+
+Candles get in two ways:
+ - a feed the service polls itself, one request per pair and timeframe for all bots
+   (CCXTCandleFeed, or FakeCandleFeed with generated candles for testing)
+ - the bots, which pass their dataframe along with the query. Candles the service has
+   already are not sent again.
+
+Start it next to the bots, pairs and timeframes taken from their configs:
+    python indicator_service.py --config config/config_bbrsi_live.json config_macd.json \\
+        config_usdt.json --exchange binance
+
+and enable it for a bot with
+
+    "indicator_service": {"address": "127.0.0.1:6543",
+                          "authkey": "${INDICATOR_SERVICE_AUTHKEY}"}
+
+in its config. The connection carries pickles both ways, so the service and the bots
+share a secret key: the service reads INDICATOR_SERVICE_AUTHKEY from the environment or
+the secrets file (see config_secrets.py), a bot the authkey of its config, that name by
+default. Neither starts without one. A strategy then queries it in live / dry-run:
+
+    shared = query_service(self.config, dataframe, metadata['pair'], self.timeframe,
+                           [('rsi', {'timeperiod': 14}),
+                            ('bollinger', {'window': 20, 'stds': (1, 3)})])
+    if shared is not None:
+        return shared
+
+and computes the indicators itself when it gets None: no service in the config, or
+the service cannot be reached. The latter is logged as a warning and the connection
+is tried again after RETRY_AFTER seconds, a bot keeps trading when the service is
+down or restarted.
+
+The indicators run over the history the service holds, which can reach back further
+than the bot's own dataframe (see the note in incremental.py about warm-up).
+"""
+import argparse
+import logging
+import secrets
+import threading
+import time
+import zlib
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import talib
+from pandas import DataFrame, Timedelta, Timestamp, to_datetime
+
+from config_compiler import load_config
+from config_secrets import placeholder, resolver
+from indicators import bollinger_bands
+from rsi import wilder_rsi
+from shared_frames import Layout, SharedFrames
+
+logger = logging.getLogger(__name__)
+
+ADDRESS = ('127.0.0.1', 6543)
+# the secret the service and its bots authenticate each other with
+AUTHKEY_NAME = 'INDICATOR_SERVICE_AUTHKEY'
+# seconds between attempts to reach a service that could not be reached
+RETRY_AFTER = 60.
+# a service that is down, restarted or was given another authkey
+UNREACHABLE = (OSError, EOFError, AuthenticationError)
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+# (name, params), e.g. ('rsi', {'timeperiod': 14})
+Indicator = Tuple[str, dict]
+SpecKey = Tuple[str, Tuple]
+
+
+def _rsi(frame: DataFrame, timeperiod: int = 14) -> Dict[str, np.ndarray]:
+    return {'rsi': wilder_rsi(frame['close'].values, timeperiod)}
+
+
+def _ema(frame: DataFrame, timeperiod: int = 30) -> Dict[str, np.ndarray]:
+    return {f'ema{timeperiod}': talib.EMA(frame['close'].values, timeperiod=timeperiod)}
+
+
+def _macd(frame: DataFrame, fastperiod: int = 12, slowperiod: int = 26,
+          signalperiod: int = 9) -> Dict[str, np.ndarray]:
+    macd, signal, hist = talib.MACD(frame['close'].values, fastperiod=fastperiod,
+                                    slowperiod=slowperiod, signalperiod=signalperiod)
+    return {'macd': macd, 'macdsignal': signal, 'macdhist': hist}
+
+
+def _cci(frame: DataFrame, timeperiod: int = 14) -> Dict[str, np.ndarray]:
+    return {'cci': talib.CCI(frame['high'].values, frame['low'].values,
+                             frame['close'].values, timeperiod=timeperiod)}
+
+
+def _bollinger(frame: DataFrame, window: int = 20,
+               stds: Sequence[float] = (2,)) -> Dict[str, np.ndarray]:
+    columns = {}
+    for std, bands in bollinger_bands(frame, window=window, stds=stds).items():
+        columns[f'bb_lowerband{std}'] = bands['lower']
+        columns[f'bb_middleband{std}'] = bands['mid']
+        columns[f'bb_upperband{std}'] = bands['upper']
+    return columns
+
+
+def authkey(value: Optional[str] = None) -> bytes:
+    """
+    The service's secret key: value, the secret a "${NAME}" value names or, without a
+    value, INDICATOR_SERVICE_AUTHKEY, both looked up by config_secrets.resolver()
+    :raises ValueError: no key found
+    """
+    name = placeholder(value) if value is not None else AUTHKEY_NAME
+    if name is not None:
+        value = resolver().get(name)
+    if not value:
+        raise ValueError(f'no indicator service authkey, set {name or AUTHKEY_NAME} in the '
+                         f'environment or the secrets file')
+    return value.encode()
+
+
+# name -> function(frame, **params) -> {column: values}, column names as the strategies use
+INDICATORS: Dict[str, Callable[..., Dict[str, np.ndarray]]] = {
+    'rsi': _rsi,
+    'ema': _ema,
+    'macd': _macd,
+    'cci': _cci,
+    'bollinger': _bollinger,
+}
+
+
+def spec_key(indicator: Indicator) -> SpecKey:
+    name, params = indicator
+    return name, tuple(sorted((key, tuple(value) if isinstance(value, (list, tuple)) else value)
+                              for key, value in params.items()))
+
+
+class _Candles:
+
+    def __init__(self):
+        self.dates = np.empty(0, dtype=np.int64)
+        self.values = np.empty((len(OHLCV), 0))
+        self.version = 0
+
+    def ingest(self, dates: np.ndarray, values: np.ndarray, keep: int) -> bool:
+        """
+        Appends candles newer than the last one, the last one itself is replaced (it can
+        still have been open when it was ingested)
+        :return: True when anything changed
+        """
+        start = 0
+        if len(self.dates):
+            start = int(np.searchsorted(dates, self.dates[-1], 'left'))
+            if start < len(dates) and dates[start] == self.dates[-1]:
+                if start == len(dates) - 1 and np.array_equal(values[:, start],
+                                                              self.values[:, -1]):
+                    return False
+                self.dates = self.dates[:-1]
+                self.values = self.values[:, :-1]
+        if start == len(dates):
+            return False
+        self.dates = np.concatenate((self.dates, dates[start:]))[-keep:]
+        self.values = np.hstack((self.values, values[:, start:]))[:, -keep:]
+        self.version += 1
+        return True
+
+    def frame(self) -> DataFrame:
+        frame = DataFrame({column: self.values[i] for i, column in enumerate(OHLCV)})
+        frame.insert(0, 'date', to_datetime(self.dates, utc=True))
+        return frame
+
+
+class IndicatorService:
+
+    def __init__(self, keep: int = 2000):
+        """
+        :param keep: candles kept per pair and timeframe
+        """
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._candles: Dict[Tuple[str, str], _Candles] = {}
+        # (pair, timeframe, spec) -> (version, columns)
+        self._columns: Dict[Tuple[str, str, SpecKey], Tuple[int, Dict[str, np.ndarray]]] = {}
+        # (pair, timeframe, specs) -> (version, block)
+        self._blocks: Dict[Tuple, Tuple[int, SharedFrames]] = {}
+        self._stop = threading.Event()
+        # set with the listening address once serve_forever() accepts connections
+        self.listening = threading.Event()
+        self.address: Optional[Tuple[str, int]] = None
+        self.computed = 0
+        self.served = 0
+
+    def last_date(self, pair: str, timeframe: str) -> Optional[int]:
+        candles = self._candles.get((pair, timeframe))
+        return int(candles.dates[-1]) if candles is not None and len(candles.dates) else None
+
+    def ingest(self, pair: str, timeframe: str, dates: np.ndarray, values: np.ndarray) -> bool:
+        """
+        :param dates: candle open times, int64 ns since epoch, ascending
+        :param values: (5 x candles) open, high, low, close, volume
+        """
+        with self._lock:
+            candles = self._candles.setdefault((pair, timeframe), _Candles())
+            return candles.ingest(np.asarray(dates, dtype=np.int64),
+                                  np.asarray(values, dtype=np.float64), self.keep)
+
+    def view(self, pair: str, timeframe: str,
+             indicators: Sequence[Indicator]) -> Optional[Tuple[str, Layout]]:
+        """
+        Publishes the candles plus indicator columns of a pair
+        :return: shared memory name and layout (see SharedFrames), None without candles
+        """
+        keys = tuple(spec_key(indicator) for indicator in indicators)
+        with self._lock:
+            candles = self._candles.get((pair, timeframe))
+            if candles is None or not len(candles.dates):
+                return None
+            block_key = (pair, timeframe, keys)
+            cached = self._blocks.get(block_key)
+            if cached is None or cached[0] != candles.version:
+                frame = candles.frame()
+                for key, (name, params) in zip(keys, indicators):
+                    frame = frame.assign(**self._indicator(pair, timeframe, key, name,
+                                                           params, candles, frame))
+                if cached is not None:
+                    # bots still reading it keep their mapping, the name goes away
+                    cached[1].close()
+                cached = self._blocks[block_key] = (candles.version,
+                                                    SharedFrames.create({pair: frame}))
+            self.served += 1
+            return cached[1].shm.name, cached[1].layout
+
+    def _indicator(self, pair: str, timeframe: str, key: SpecKey, name: str, params: dict,
+                   candles: _Candles, frame: DataFrame) -> Dict[str, np.ndarray]:
+        cached = self._columns.get((pair, timeframe, key))
+        if cached is None or cached[0] != candles.version:
+            cached = self._columns[(pair, timeframe, key)] = (
+                candles.version, INDICATORS[name](frame, **params))
+            self.computed += 1
+        return cached[1]
+
+    def follow(self, feed, pairs: Sequence[str], timeframes: Sequence[str],
+               interval: float = 5.0) -> threading.Thread:
+        """
+        Polls the feed for new candles in a background thread. A failed fetch (network
+        error, rate limit, ...) is logged and tried again on the next round.
+        """
+        def run():
+            while not self._stop.is_set():
+                for pair in pairs:
+                    for timeframe in timeframes:
+                        try:
+                            dates, values = feed.fetch(pair, timeframe,
+                                                       since=self.last_date(pair, timeframe))
+                        except Exception:
+                            logger.exception('fetching %s %s failed, next attempt in %.0f s',
+                                             pair, timeframe, interval)
+                            continue
+                        if len(dates):
+                            self.ingest(pair, timeframe, dates, values)
+                self._stop.wait(interval)
+
+        thread = threading.Thread(target=run, name='indicator-feed', daemon=True)
+        thread.start()
+        return thread
+
+    def _handle(self, connection: Connection):
+        with connection:
+            while not self._stop.is_set():
+                try:
+                    command, *args = connection.recv()
+                except EOFError:
+                    return
+                if command == 'ingest':
+                    connection.send(self.ingest(*args))
+                elif command == 'view':
+                    connection.send(self.view(*args))
+                elif command == 'last_date':
+                    connection.send(self.last_date(*args))
+                else:
+                    connection.send(ValueError(f'unknown command {command}'))
+
+    def serve_forever(self, authkey: bytes, address: Tuple[str, int] = ADDRESS):
+        """
+        :param authkey: the secret the bots connect with, see authkey()
+        """
+        if not authkey:
+            raise ValueError('the indicator service needs an authkey')
+        with Listener(address, authkey=authkey) as listener:
+            self.address = listener.address
+            self.listening.set()
+            while not self._stop.is_set():
+                try:
+                    connection = listener.accept()
+                except (AuthenticationError, EOFError, OSError) as error:
+                    logger.warning('refused a connection: %r', error)
+                    continue
+                threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            for _, block in self._blocks.values():
+                block.close()
+            self._blocks.clear()
+
+
+class IndicatorClient:
+    """
+    One connection to the service, for one bot process.
+    Views returned by view() stay valid until the next view() of the same pair.
+    """
+
+    def __init__(self, authkey: bytes, address: Tuple[str, int] = ADDRESS):
+        """
+        :param authkey: the service's secret, see authkey()
+        """
+        self.address = address
+        self._connection = Client(address, authkey=authkey)
+        self._attached: Dict[Tuple[str, str], SharedFrames] = {}
+        self._stale: List[SharedFrames] = []
+        # last candle sent per pair / timeframe, ns
+        self._sent: Dict[Tuple[str, str], int] = {}
+
+    def _call(self, *request):
+        self._connection.send(request)
+        result = self._connection.recv()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def ingest(self, pair: str, timeframe: str, dataframe: DataFrame):
+        """
+        Sends the candles of the dataframe the service does not have yet
+        """
+        key = (pair, timeframe)
+        dates = dataframe['date'].values.astype('datetime64[ns]').view(np.int64)
+        if key not in self._sent:
+            last = self._call('last_date', pair, timeframe)
+            self._sent[key] = np.iinfo(np.int64).min if last is None else last
+        start = int(np.searchsorted(dates, self._sent[key], 'left'))
+        if start == len(dates):
+            return
+        values = np.vstack([dataframe[column].values[start:] for column in OHLCV])
+        self._call('ingest', pair, timeframe, dates[start:], values)
+        self._sent[key] = int(dates[-1])
+
+    def view(self, pair: str, timeframe: str,
+             indicators: Sequence[Indicator]) -> Optional[DataFrame]:
+        """
+        Candles plus indicator columns, viewing the service's shared memory
+        """
+        published = self._call('view', pair, timeframe, list(indicators))
+        if published is None:
+            return None
+        name, layout = published
+        key = (pair, timeframe)
+        shared = self._attached.get(key)
+        if shared is None or shared.shm.name != name:
+            if shared is not None:
+                self._stale.append(shared)
+            shared = self._attached[key] = SharedFrames.attach(name, layout, track=False)
+        self._release()
+        return shared.frames()[pair]
+
+    def _release(self):
+        stale = []
+        for shared in self._stale:
+            try:
+                shared.close()
+            except BufferError:
+                # a view of it is still referenced, try again next time
+                stale.append(shared)
+        self._stale = stale
+
+    def populate(self, dataframe: DataFrame, pair: str, timeframe: str,
+                 indicators: Sequence[Indicator]) -> DataFrame:
+        """
+        Sends the new candles of the dataframe and copies the indicator columns into it,
+        matched by date (NaN for candles the service has no values for)
+        """
+        self.ingest(pair, timeframe, dataframe)
+        shared = self.view(pair, timeframe, indicators)
+        if shared is None:
+            return dataframe
+        dates = dataframe['date'].values.astype('datetime64[ns]')
+        shared_dates = shared['date'].values.astype('datetime64[ns]')
+        position = np.minimum(np.searchsorted(shared_dates, dates), len(shared_dates) - 1)
+        found = shared_dates[position] == dates
+        for column in shared.columns:
+            if column == 'date' or column in OHLCV:
+                continue
+            dataframe[column] = np.where(found, shared[column].values[position], np.nan)
+        del shared
+        return dataframe
+
+    def close(self):
+        self._connection.close()
+        self._stale += self._attached.values()
+        self._attached.clear()
+        self._release()
+
+
+_clients: Dict[Tuple[str, int], IndicatorClient] = {}
+# address -> time.monotonic() of the next attempt to connect
+_retry_at: Dict[Tuple[str, int], float] = {}
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+def _unreachable(address: Tuple[str, int], error: Exception):
+    logger.warning('indicator service at %s:%d unreachable (%r), computing locally, '
+                   'next attempt in %.0f s', *address, error, RETRY_AFTER)
+    client = _clients.pop(address, None)
+    if client is not None:
+        try:
+            client.close()
+        except UNREACHABLE:
+            pass
+    _retry_at[address] = time.monotonic() + RETRY_AFTER
+
+
+def service_client(config: dict) -> Optional[IndicatorClient]:
+    """
+    The process' client for the service in the bot config, None when it has none or
+    the service cannot be reached (logged, tried again after RETRY_AFTER seconds)
+    :raises ValueError: the service is configured but its authkey is not set
+    """
+    settings = config.get('indicator_service')
+    if not settings:
+        return None
+    address = parse_address(settings.get('address', '%s:%d' % ADDRESS))
+    client = _clients.get(address)
+    if client is None:
+        if time.monotonic() < _retry_at.get(address, 0.):
+            return None
+        key = authkey(settings.get('authkey'))
+        try:
+            client = _clients[address] = IndicatorClient(key, address)
+        except UNREACHABLE as error:
+            _unreachable(address, error)
+            return None
+    return client
+
+
+def query_service(config: dict, dataframe: DataFrame, pair: str, timeframe: str,
+                  indicators: Sequence[Indicator]) -> Optional[DataFrame]:
+    """
+    IndicatorClient.populate with the service in the bot config, None when the strategy
+    has to compute the indicators itself: no service in the config, or it cannot be
+    reached (logged)
+    """
+    client = service_client(config)
+    if client is None:
+        return None
+    try:
+        return client.populate(dataframe, pair, timeframe, indicators)
+    except UNREACHABLE as error:
+        _unreachable(client.address, error)
+        return None
+
+
+class FakeCandleFeed:
+    """
+    Generated candles standing in for the exchange when testing: a random walk per pair
+    (seeded by the pair name, so every run and every process sees the same candles),
+    closed candles up to `now`.
+    """
+
+    def __init__(self, start: str = '2021-01-01', now: Optional[Timestamp] = None,
+                 seed: int = 0):
+        """
+        :param start: open time of the first candle of every pair
+        :param now: the feed's clock, None for the wall clock
+        """
+        self.start = Timestamp(start)
+        if self.start.tzinfo is None:
+            self.start = self.start.tz_localize('UTC')
+        self.now = now
+        self.seed = seed
+        self.requests = 0
+        self._generated: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _series(self, pair: str, timeframe: str, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        key = (pair, timeframe)
+        dates, values = self._generated.get(key, (np.empty(0, np.int64), np.empty((5, 0))))
+        if len(dates) < count:
+            # regenerated from the seed, one generator per series keeps the existing
+            # candles the same
+            returns, spreads, volumes = (
+                np.random.default_rng([zlib.crc32(pair.encode()), self.seed, series])
+                for series in range(3))
+            close = 100 * np.exp(np.cumsum(returns.normal(0, 0.01, count)))
+            spread = np.abs(spreads.normal(0, 0.005, count)) * close
+            open_ = np.concatenate((close[:1], close[:-1]))
+            values = np.vstack((open_, np.maximum(open_, close) + spread,
+                                np.minimum(open_, close) - spread, close,
+                                volumes.uniform(1, 1000, count)))
+            step = Timedelta(timeframe.replace('m', 'min')).value
+            dates = self.start.value + step * np.arange(count, dtype=np.int64)
+            self._generated[key] = (dates, values)
+        return dates[:count], values[:, :count]
+
+    def fetch(self, pair: str, timeframe: str, since: Optional[int] = None,
+              limit: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param since: ns, candles from this open time on
+        :return: dates (int64 ns), (5 x candles) values
+        """
+        self.requests += 1
+        now = self.now if self.now is not None else Timestamp.now(tz='UTC')
+        step = Timedelta(timeframe.replace('m', 'min'))
+        closed = max(0, (now - self.start) // step)
+        dates, values = self._series(pair, timeframe, closed)
+        if since is None:
+            first = max(0, len(dates) - limit)
+        else:
+            first = int(np.searchsorted(dates, since, 'left'))
+        return dates[first:first + limit], values[:, first:first + limit]
+
+
+class CCXTCandleFeed:
+
+    def __init__(self, exchange: str):
+        import ccxt
+        self.exchange = getattr(ccxt, exchange)({'enableRateLimit': True})
+
+    def fetch(self, pair: str, timeframe: str, since: Optional[int] = None,
+              limit: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self.exchange.fetch_ohlcv(pair, timeframe, since=None if since is None
+                                         else since // 1_000_000, limit=limit)
+        rows = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        return rows[:, 0].astype(np.int64) * 1_000_000, rows[:, 1:].T.copy()
+
+
+def _whitelists(paths: Sequence[str]) -> Tuple[List[str], List[str]]:
+    pairs: List[str] = []
+    timeframes: List[str] = []
+    for path in paths:
+        config = load_config(path)
+        for pair in config.get('exchange', {}).get('pair_whitelist', []):
+            if pair not in pairs:
+                pairs.append(pair)
+        timeframe = config.get('timeframe', config.get('ticker_interval'))
+        if timeframe and timeframe not in timeframes:
+            timeframes.append(timeframe)
+    return pairs, timeframes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--address', default='%s:%d' % ADDRESS)
+    parser.add_argument('--new-authkey', action='store_true',
+                        help=f'print a random key to set {AUTHKEY_NAME} to and exit')
+    parser.add_argument('--config', nargs='*', default=[],
+                        help='bot configs, the union of their whitelists is followed')
+    parser.add_argument('--timeframes', nargs='*', default=[],
+                        help='timeframes to follow besides the configs\' ones')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--exchange', help='poll this ccxt exchange for candles')
+    source.add_argument('--fake', action='store_true', help='poll generated candles')
+    parser.add_argument('--interval', type=float, default=5.0)
+    args = parser.parse_args()
+    if args.new_authkey:
+        print(secrets.token_urlsafe(32))
+        return
+
+    try:
+        key = authkey()
+    except ValueError as error:
+        parser.error(str(error))
+    service = IndicatorService()
+    pairs, timeframes = _whitelists(args.config)
+    timeframes += [timeframe for timeframe in args.timeframes if timeframe not in timeframes]
+    if args.exchange or args.fake:
+        if args.exchange:
+            feed = CCXTCandleFeed(args.exchange)
+        else:
+            feed = FakeCandleFeed(start=Timestamp.now(tz='UTC').floor('D') - Timedelta(days=7))
+        service.follow(feed, pairs, timeframes, args.interval)
+    print(f'serving {len(pairs)} pairs, {timeframes} on {args.address}')
+    try:
+        service.serve_forever(key, parse_address(args.address))
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Shared indicator kernels for the strategies in this directory.
+
+This module and the other helpers live next to the strategy files
+(user_data/strategies). freqtrade loads a strategy from its file
+(importlib.util.spec_from_file_location) and does not put that directory on sys.path,
+so every strategy adds the directory of its helpers itself before importing them:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from indicators import bollinger_bands
+
+(the strategies in "strats and configs 2021-06-24" add their parent directory).
+
+Results match the talib / qtpylib versions they replace. shift accepts pandas Series as
+well as (pairs x candles) NumPy arrays, as crossover.py's crossed_above / crossed_below
+do, so the same buy / sell expression works per pair and in batch.py.
+"""
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+from pandas import DataFrame, Series
+
+
+def typical_price(dataframe: DataFrame) -> np.ndarray:
+    """
+    (high + low + close) / 3, same as qtpylib.typical_price but without the Series wrapping
+    """
+    return (dataframe['high'].values + dataframe['low'].values + dataframe['close'].values) / 3.
+
+
+def rolling_typical_price(dataframe: DataFrame, window: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and std of the typical price, the part every Bollinger band shares
+    """
+    # qtpylib uses min_periods=1 for both, keep it so the bands are identical
+    rolling = Series(typical_price(dataframe)).rolling(window=window, min_periods=1)
+    return rolling.mean().values, rolling.std().values
+
+
+def bollinger_bands(dataframe: DataFrame, window: int = 20,
+                    stds: Iterable[float] = (1, 2, 3)) -> Dict[float, Dict[str, np.ndarray]]:
+    """
+    Bollinger bands for several standard deviations at once.
+
+    qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window, stds) recomputes the
+    typical price, the rolling mean and the rolling std on every call. Here they are
+    computed once and only the band offsets are derived per sigma.
+    :param dataframe: DataFrame with high / low / close columns
+    :param window: rolling window length
+    :param stds: the standard deviation multipliers to return
+    :return: {stds: {'lower': ndarray, 'mid': ndarray, 'upper': ndarray}}
+    """
+    mid, std = rolling_typical_price(dataframe, window)
+
+    bands = {}
+    for n in stds:
+        width = std * n
+        bands[n] = {'lower': mid - width, 'mid': mid, 'upper': mid + width}
+    return bands
+
+
+def shift(values, periods: int = 1):
+    """
+    Series.shift that also works on NumPy arrays, shifting along the last (candle) axis
+    """
+    if isinstance(values, Series):
+        return values.shift(periods)
+    result = np.full(np.shape(values), np.nan)
+    if periods > 0:
+        result[..., periods:] = values[..., :-periods]
+    elif periods < 0:
+        result[..., :periods] = values[..., -periods:]
+    else:
+        result[...] = values
+    return result
@@ -0,0 +1,94 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Indicator columns computed when a signal asks for them.
+
+Strategies declare their indicator columns as expressions, populate_buy_trend and
+populate_sell_trend ask for the ones their signals read before reading them:
+
+    lazy = (LazyIndicators()
+            .add('rsi', lambda dataframe: ta.RSI(dataframe))
+            .add_bollinger(window=20, stds=(1, 3)))
+
+    def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        dataframe = self.lazy.ensure(dataframe, ['rsi', f'bb_lowerband{self.buy_std}'])
+        ...
+
+A declared column nothing asks for is never computed or stored. ensure() adds the
+missing columns to the frame as ordinary columns and skips the ones it holds already,
+populate_sell_trend gets the frame populate_buy_trend returned and only computes what
+the buy signal did not need. The frame stays a plain DataFrame, .loc, copies and
+pickles behave as usual and hold the columns computed so far. Columns from one
+computation (all Bollinger bands of a window share the rolling mean / std) are
+declared as a group, the shared part runs once per ensure().
+"""
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from pandas import DataFrame
+
+from indicators import rolling_typical_price
+
+# column -> (shared expression of its group or None, expression)
+Expression = Tuple[Optional[Callable[[DataFrame], Any]], Callable]
+
+
+class LazyIndicators:
+
+    def __init__(self):
+        self._columns: Dict[str, Expression] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def __contains__(self, column: Hashable) -> bool:
+        return column in self._columns
+
+    def add(self, column: str, expression: Callable[[DataFrame], Any]) -> 'LazyIndicators':
+        """
+        :param expression: dataframe -> the column's values
+        """
+        self._columns[column] = (None, expression)
+        return self
+
+    def add_group(self, shared: Callable[[DataFrame], Any],
+                  columns: Dict[str, Callable[[Any], Any]]) -> 'LazyIndicators':
+        """
+        :param shared: dataframe -> what the columns are derived from, computed once
+        :param columns: column -> function of the shared result giving the column's values
+        """
+        for column, expression in columns.items():
+            self._columns[column] = (shared, expression)
+        return self
+
+    def add_bollinger(self, window: int = 20, stds: Iterable[float] = (2,),
+                      template: str = 'bb_{band}band{std}') -> 'LazyIndicators':
+        """
+        Bollinger bands of the typical price, the values of indicators.bollinger_bands
+        :param template: column names, formatted with band (lower / middle / upper) and std
+        """
+        columns = {}
+        for n in stds:
+            columns[template.format(band='lower', std=n)] = lambda bands, n=n: bands[0] - bands[1] * n
+            columns[template.format(band='middle', std=n)] = lambda bands: bands[0]
+            columns[template.format(band='upper', std=n)] = lambda bands, n=n: bands[0] + bands[1] * n
+        return self.add_group(lambda dataframe: rolling_typical_price(dataframe, window), columns)
+
+    def ensure(self, dataframe: DataFrame, columns: Iterable[str]) -> DataFrame:
+        """
+        The dataframe with those of columns it does not hold yet computed and added
+        :raises KeyError: for a column neither in the dataframe nor declared
+        """
+        shared_results: Dict[int, Any] = {}
+        for column in columns:
+            if column in dataframe.columns:
+                continue
+            if column not in self._columns:
+                raise KeyError(f'{column}: neither in the dataframe nor declared')
+            shared, expression = self._columns[column]
+            if shared is None:
+                dataframe[column] = expression(dataframe)
+                continue
+            if id(shared) not in shared_results:
+                shared_results[id(shared)] = shared(dataframe)
+            dataframe[column] = expression(shared_results[id(shared)])
+        return dataframe
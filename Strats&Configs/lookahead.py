@@ -0,0 +1,247 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Lookahead check: streaming evaluation of a strategy against its full-frame run.
+
+A backtest computes the signals once over all candles, a live bot only ever has the
+candles up to now. Anything reading later candles (shift(-n), centered windows, ...)
+makes the backtest better than what the bot can trade. The check replays the candles one
+at a time and reports, per column, where the streamed values differ from the full-frame
+ones.
+
+ - indicators: the strategy's `incremental` states (see incremental.py) are fed candle by
+   candle, each value only ever sees the candles up to its own. Streamed columns the
+   full-frame run left to its `lazy` declarations are computed for the comparison,
+   ones it has no way to compute are left out
+ - signals: every candle is evaluated on a window of the streamed indicators ending at
+   that candle, the buy_signal / sell_signal methods on all windows at once (2-D
+   arrays). For strategies without them populate_*_trend runs on blocks of windows
+   stacked into one DataFrame, each window behind as many NaN rows as it is long, so
+   neither a shift back nor a shift forward reaches the neighbouring window
+ - source: shift() calls with a negative period are listed with their line numbers
+
+The window is what the signals read back: the longest shift(n) period in the strategy's
+source plus the candle itself (two for the crossed_* helpers), or its
+startup_candle_count when that is longer.
+
+    report = check_lookahead(MACDRSI(config), dataframe, {'pair': 'ETH/BTC'})
+    print(report)
+"""
+import ast
+import inspect
+import textwrap
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import DataFrame
+
+from incremental import IndicatorState
+
+# rows of one populate_*_trend call in _streamed_trend
+BLOCK_ROWS = 1 << 20
+CROSSED = ('crossed_above', 'crossed_below')
+
+
+def _calls(strategy) -> Iterator[Tuple[int, str, ast.Call]]:
+    # (line number in the file, source, node) of every call in the strategy class
+    try:
+        lines, first = inspect.getsourcelines(type(strategy))
+    except (OSError, TypeError):
+        return
+    source = textwrap.dedent(''.join(lines))
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Call):
+            yield first + node.lineno - 1, ast.get_source_segment(source, node), node
+
+
+def _shift_period(node: ast.Call) -> Optional[ast.expr]:
+    # the period of Series.shift(n) / indicators.shift(x, n), None for other calls
+    func = node.func
+    if isinstance(func, ast.Attribute) and func.attr == 'shift':
+        periods = node.args[:1]
+    elif isinstance(func, ast.Name) and func.id == 'shift':
+        periods = node.args[1:2]
+    else:
+        return None
+    periods += [keyword.value for keyword in node.keywords if keyword.arg == 'periods']
+    # no argument: one candle back
+    return periods[0] if periods else ast.Constant(1)
+
+
+def negative_shifts(strategy) -> List[Tuple[int, str]]:
+    """
+    shift(-n) calls in the strategy's source, Series.shift(-n) and indicators.shift(x, -n)
+    :return: (line number in the file, source of the call), empty without source
+    """
+    found = []
+    for line, call, node in _calls(strategy):
+        period = _shift_period(node)
+        if isinstance(period, ast.UnaryOp) and isinstance(period.op, ast.USub):
+            found.append((line, call))
+    return sorted(found)
+
+
+def signal_window(strategy) -> int:
+    """
+    Candles a signal of the strategy reads, the evaluated one included: the longest
+    shift(n) with a literal period + 1, 2 with a crossed_* call, at least
+    startup_candle_count
+    """
+    window = 1
+    for _, _, node in _calls(strategy):
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+        if name in CROSSED:
+            window = max(window, 2)
+        period = _shift_period(node)
+        if isinstance(period, ast.Constant) and isinstance(period.value, int):
+            window = max(window, period.value + 1)
+    return max(window, getattr(strategy, 'startup_candle_count', 0) or 0)
+
+
+def stream_indicators(states: List[IndicatorState], dataframe: DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Feeds the candles one at a time
+    :return: column -> values, value i computed from candles 0..i only
+    """
+    length = len(dataframe)
+    columns = {column: np.full(length, np.nan) for state in states for column in state.columns}
+    high = dataframe['high'].values
+    low = dataframe['low'].values
+    close = dataframe['close'].values
+    for i in range(length):
+        for state in states:
+            values = state.update(float(high[i]), float(low[i]), float(close[i]))
+            for column, value in zip(state.columns, values):
+                columns[column][i] = value
+    return columns
+
+
+def _streamed_signal(signal: Callable, columns: Dict[str, np.ndarray], window: int) -> np.ndarray:
+    # row i holds candles i - window + 1 .. i, NaN before the first candle
+    windows = {}
+    for column, values in columns.items():
+        padded = np.concatenate((np.full(window - 1, np.nan), values.astype(np.float64)))
+        windows[column] = sliding_window_view(padded, window)
+    return np.asarray(signal(windows), dtype=bool)[:, -1]
+
+
+def _stacked(values: np.ndarray, window: int, start: int, stop: int) -> np.ndarray:
+    # candles i - window + 1 .. i of every i in start..stop, each behind window NaN rows
+    if values.dtype.kind == 'M':
+        fill = np.datetime64('NaT')
+    else:
+        values, fill = values.astype(np.float64), np.nan
+    padded = np.concatenate((np.full(window - 1, fill, dtype=values.dtype), values))
+    stacked = np.full((stop - start, 2 * window), fill, dtype=values.dtype)
+    stacked[:, window:] = sliding_window_view(padded, window)[start:stop]
+    return stacked.ravel()
+
+
+def _streamed_trend(populate: Callable, columns: Dict[str, np.ndarray], metadata: dict,
+                    column: str, window: int) -> np.ndarray:
+    length = len(next(iter(columns.values())))
+    result = np.zeros(length, dtype=bool)
+    block = max(1, BLOCK_ROWS // (2 * window))
+    for start in range(0, length, block):
+        stop = min(start + block, length)
+        frame = DataFrame({name: _stacked(values, window, start, stop)
+                           for name, values in columns.items()})
+        frame = populate(frame, metadata)
+        if column in frame:
+            # the last row of each window is the candle evaluated
+            result[start:stop] = frame[column].values.reshape(-1, 2 * window)[:, -1] == 1
+    return result
+
+
+class LookaheadReport:
+
+    def __init__(self, dates: np.ndarray, divergence: Dict[str, np.ndarray],
+                 backtest_only: Dict[str, int], shifts: List[Tuple[int, str]],
+                 unchecked: List[str]):
+        """
+        :param divergence: column -> candle indices where streamed and full-frame differ
+        :param backtest_only: signal column -> signals only the full-frame run has
+        :param shifts: negative_shifts() of the strategy
+        :param unchecked: indicator columns without streaming state, taken from the full run
+        """
+        self.dates = dates
+        self.divergence = divergence
+        self.backtest_only = backtest_only
+        self.shifts = shifts
+        self.unchecked = unchecked
+
+    @property
+    def ok(self) -> bool:
+        return not any(len(indices) for indices in self.divergence.values())
+
+    def __str__(self) -> str:
+        lines = []
+        for column, indices in self.divergence.items():
+            if not len(indices):
+                continue
+            line = f'{column}: {len(indices)} candles differ, first at {self.dates[indices[0]]}'
+            if column in self.backtest_only:
+                line += f', {self.backtest_only[column]} signals only in the full-frame run'
+            lines.append(line)
+        lines += [f'line {line}: {call}' for line, call in self.shifts]
+        if self.unchecked:
+            lines.append('not streamed: ' + ', '.join(self.unchecked))
+        return '\n'.join(lines) or 'no lookahead found'
+
+
+def check_lookahead(strategy, dataframe: DataFrame, metadata: dict,
+                    states: Optional[List[IndicatorState]] = None,
+                    window: Optional[int] = None, rtol: float = 1e-9) -> LookaheadReport:
+    """
+    :param strategy: strategy instance
+    :param dataframe: OHLCV candles of one pair
+    :param states: indicator states to stream, default strategy.incremental.new_states()
+    :param window: candles each streamed signal evaluation sees, signal_window() when None
+    :param rtol: tolerance for the indicator values (talib builds differ in the last bit)
+    """
+    window = window or signal_window(strategy)
+    full = strategy.populate_indicators(dataframe.copy(), metadata)
+    full = strategy.populate_buy_trend(full, metadata)
+    full = strategy.populate_sell_trend(full, metadata)
+
+    if states is None:
+        incremental = getattr(strategy, 'incremental', None)
+        states = incremental.new_states() if incremental is not None else []
+    streamed = stream_indicators(states, dataframe)
+    # streamed columns the signals did not ask for: computed when declared lazy (see
+    # lazy.py), otherwise there is nothing to compare them with
+    lazy = getattr(strategy, 'lazy', None)
+    if lazy is not None:
+        full = lazy.ensure(full, [column for column in streamed
+                                  if column not in full and column in lazy])
+    streamed = {column: values for column, values in streamed.items() if column in full}
+
+    divergence: Dict[str, np.ndarray] = {}
+    for column, values in streamed.items():
+        same = np.isclose(values, full[column].values.astype(np.float64), rtol=rtol,
+                          atol=0.0, equal_nan=True)
+        divergence[column] = np.flatnonzero(~same)
+
+    indicator_columns = [column for column in full.columns
+                         if column not in dataframe.columns and column not in ('buy', 'sell')]
+    unchecked = [column for column in indicator_columns if column not in streamed]
+    columns = {column: dataframe[column].values for column in dataframe.columns
+               if column != 'date'}
+    columns.update({column: full[column].values for column in unchecked})
+    columns.update(streamed)
+
+    backtest_only: Dict[str, int] = {}
+    for column, signal, populate in (('buy', 'buy_signal', strategy.populate_buy_trend),
+                                     ('sell', 'sell_signal', strategy.populate_sell_trend)):
+        if hasattr(strategy, signal):
+            live = _streamed_signal(getattr(strategy, signal), columns, window)
+        else:
+            live = _streamed_trend(populate, {'date': dataframe['date'].values, **columns},
+                                   metadata, column, window)
+        backtest = (full[column].values == 1) if column in full else np.zeros(len(full), bool)
+        divergence[column] = np.flatnonzero(live != backtest)
+        backtest_only[column] = int((backtest & ~live).sum())
+
+    return LookaheadReport(dataframe['date'].values, divergence, backtest_only,
+                           negative_shifts(strategy), unchecked)
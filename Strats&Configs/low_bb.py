@@ -1,13 +1,24 @@
 # pragma pylint: disable=missing-docstring, invalid-name, pointless-string-statement
 
+import sys
+from pathlib import Path
 import talib.abstract as ta
 from pandas import DataFrame
 
-import freqtrade.vendor.qtpylib.indicators as qtpylib
-from freqtrade.indicator_helpers import fishers_inverse
 from freqtrade.strategy.interface import IStrategy
 
+# the helper modules, see indicators.py
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from batch import CandleBatch
+from compact import compact_signals
+from crossover import crossed_below
+from lazy import LazyIndicators
+from profiling import profiled
+from shard import sharded
 
+
+@sharded
+@profiled
 class Low_BB(IStrategy):
     """
 
@@ -49,18 +60,52 @@ class Low_BB(IStrategy):
         'sell': 'gtc',
     }
 
+    # Buys when close crosses below bb_factor times the lower band of buy_std
+    bb_factor = 0.98
+    buy_std = 2
+
+    # Other thresholds, evaluated next to these ones by variants.py
+    variants = {
+        'Low_BB_TEST': {'bb_factor': 0.9891240318470478, 'buy_std': 1},
+    }
+
+    # Computed when populate_buy_trend asks for them, ema50 only matters if its condition
+    # in buy_signal is enabled again. The 2 std bands keep their unnumbered names.
+    lazy = (LazyIndicators()
+            .add_bollinger(window=20, stds=(2,), template='bb_{band}band')
+            .add_bollinger(window=20, stds=(1,))
+            .add('ema50', lambda dataframe: ta.EMA(dataframe, timeperiod=20)))
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         ##################################################################################
         # buy and sell indicators
 
-        bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=2)
-        dataframe['bb_lowerband'] = bollinger['lower']
-        dataframe['bb_middleband'] = bollinger['mid']
-        dataframe['bb_upperband'] = bollinger['upper']
+        # qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=buy_std)
+        # and ta.EMA(dataframe, timeperiod=20), see lazy above
+        return dataframe
 
-        dataframe['ema50'] = ta.EMA(dataframe, timeperiod=20)
+    def lower_band(self) -> str:
+        """
+        The column of the lower band of buy_std
+        """
+        return 'bb_lowerband' if self.buy_std == 2 else f'bb_lowerband{self.buy_std}'
 
-        return dataframe
+    def populate_batch_indicators(self, batch: CandleBatch) -> CandleBatch:
+        """
+        populate_indicators for all pairs at once (see batch.py), only the columns
+        read by buy_signal. There is no sell signal, exits come from ROI / stoploss.
+        """
+        lower = batch.bollinger_bands(window=20, stds=(self.buy_std,))[self.buy_std]['lower']
+        batch[self.lower_band()] = lower
+        return batch
+
+    def buy_signal(self, dataframe):
+        lower = dataframe[self.lower_band()]
+        return (
+            #(dataframe['close'] > dataframe['ema50']) &
+            crossed_below(dataframe['close'], lower, factor=self.bb_factor)
+            #(dataframe['close'] <= self.bb_factor * lower)
+        )
 
     def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
@@ -68,14 +113,9 @@ class Low_BB(IStrategy):
         :param dataframe: DataFrame
         :return: DataFrame with buy column
         """
+        dataframe = self.lazy.ensure(dataframe, [self.lower_band()])
         dataframe.loc[
-            (
-                #(dataframe['close'] > dataframe['ema50']) &
-                qtpylib.crossed_below(dataframe['close'], 0.98 * dataframe['bb_lowerband'])
-                #(dataframe['close'] <= 0.98 * dataframe['bb_lowerband'])
-
-            )
-            ,
+            self.buy_signal(dataframe),
             'buy'] = 1
 
         return dataframe
@@ -89,4 +129,4 @@ class Low_BB(IStrategy):
         dataframe.loc[
             (),
             'sell'] = 0
-        return dataframe
\ No newline at end of file
+        return compact_signals(self, dataframe)
\ No newline at end of file
@@ -0,0 +1,131 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Fused MACD + CCI kernel for MACDStrategy and MACDStrategyCrossed.
+
+Both strategies run ta.MACD(dataframe) and ta.CCI(dataframe) on the same 5m candles. In
+live / dry-run the kernel keeps per pair
+ - the MACD and CCI states (incremental.py), advanced together in one pass over the
+   candles that are new since the last call
+ - one (4 x 2 frames) buffer holding macd / macdsignal / macdhist / cci, allocated with
+   the pair's first frame and written in place on every bot loop
+in a process-local cache keyed by pair and timeframe, so when both strategies run in one
+bot process the second one finds the pair computed already and only copies the columns.
+
+Like IncrementalIndicators, a kernel is kept by the date of the last candle it was fed: a
+frame holding it, grown or slid, advances the kernel over the newer candles, a frame
+without it warms a new one. The values are talib over every candle fed since the pair's
+first frame, see the note in incremental.py about sliding windows.
+
+A frame the kernel has not seen goes through talib (IndicatorState.warm), vectorized
+calls beat a Python pass over many candles. Outside live / dry-run every frame is such a
+frame: backtesting and hyperopt analyse a pair once, nothing is kept for them.
+
+    def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        live = self.dp is not None and self.dp.runmode.value in ('live', 'dry_run')
+        return populate_macd_cci(dataframe, metadata['pair'], self.timeframe, live=live)
+"""
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from incremental import CCIState, ColumnBuffer, MACDState
+
+COLUMNS = ('macd', 'macdsignal', 'macdhist', 'cci')
+
+
+class MACDCCIKernel:
+
+    def __init__(self, capacity: int = 1024):
+        self.buffer = ColumnBuffer(len(COLUMNS), capacity)
+        self.last_date = None
+        self.macd = MACDState()
+        self.cci = CCIState()
+
+    @property
+    def length(self) -> int:
+        return self.buffer.length
+
+    def warm(self, high: np.ndarray, low: np.ndarray, close: np.ndarray):
+        """
+        Whole history of a fresh kernel
+        """
+        length = len(close)
+        buffer = self.buffer
+        buffer.reserve(length)
+        buffer.values[:3, :length] = self.macd.warm(high, low, close)
+        buffer.values[3, :length] = self.cci.warm(high, low, close)[0]
+        buffer.length = length
+
+    def advance(self, high: np.ndarray, low: np.ndarray, close: np.ndarray):
+        """
+        Appends new candles, MACD and CCI in the same pass
+        """
+        buffer = self.buffer
+        buffer.reserve(len(close))
+        values = buffer.values
+        macd = self.macd
+        cci = self.cci
+        column = buffer.length
+        for h, l, c in zip(high.tolist(), low.tolist(), close.tolist()):
+            values[0, column], values[1, column], values[2, column] = macd.push(c)
+            values[3, column] = cci.update(h, l, c)[0]
+            column += 1
+        buffer.length = column
+
+
+_kernels: Dict[Tuple[str, str], MACDCCIKernel] = {}
+
+
+def populate_macd_cci(dataframe: DataFrame, pair: str, timeframe: str,
+                      columns: Sequence[str] = COLUMNS, live: bool = False) -> DataFrame:
+    """
+    Sets the macd, macdsignal, macdhist and cci columns (talib's default periods)
+    :param dataframe: candle DataFrame of the pair
+    :param pair: pair the dataframe belongs to
+    :param timeframe: the strategy's timeframe, part of the cache key
+    :param columns: the columns to set, out of COLUMNS
+    :param live: keep the pair's kernel for the next call (live / dry-run), otherwise the
+        frame is computed by talib and nothing is kept
+    :return: the same dataframe
+    """
+    length = len(dataframe)
+    if length == 0:
+        for column in columns:
+            dataframe[column] = np.nan
+        return dataframe
+
+    dates = dataframe['date'].values
+    key = (pair, timeframe)
+    kernel = _kernels.get(key) if live else None
+    start = 0
+    if kernel is not None:
+        start = length - int(np.count_nonzero(dates > kernel.last_date))
+        if start == 0 or start > kernel.length or dates[start - 1] != kernel.last_date:
+            # a gap, or a frame reaching back further than the kernel's history
+            kernel = None
+            start = 0
+    if kernel is None:
+        kernel = MACDCCIKernel(capacity=2 * length if live else length)
+        if live:
+            _kernels[key] = kernel
+
+    high = dataframe['high'].values
+    low = dataframe['low'].values
+    close = dataframe['close'].values
+    if start == 0:
+        kernel.warm(high, low, close)
+    elif start < length:
+        kernel.advance(high[start:], low[start:], close[start:])
+    kernel.last_date = dates[-1]
+    kernel.buffer.trim(length)
+
+    values = kernel.buffer.tail(length)
+    for column in columns:
+        # copied, the buffer is overwritten by later loops
+        dataframe[column] = values[COLUMNS.index(column)].copy()
+    return dataframe
+
+
+def clear():
+    _kernels.clear()
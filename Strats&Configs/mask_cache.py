@@ -0,0 +1,68 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Memoized boolean condition masks for hyperoptable strategies.
+
+Between hyperopt epochs the candles stay the same and the categorical / integer
+parameters only pick among a few fixed comparisons, so every (condition, value) mask
+is built once per pair and kept as a packed bit array (1 bit per candle). The masks an
+epoch selects are combined with NumPy bitwise ops instead of folding pandas Series.
+
+    masks = []
+    masks.append(self.masks.get(dataframe, metadata, 'rsi>', self.buy_rsi.value,
+                                lambda: dataframe['rsi'] > self.buy_rsi.value))
+    dataframe.loc[self.masks.combine(masks, len(dataframe)), 'buy'] = 1
+"""
+from typing import Callable, Dict, Hashable, List, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+
+class MaskCache:
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        :param maxsize: number of masks to keep, the oldest are dropped first. Live bots
+                        get new candles every loop and would otherwise grow it forever.
+        """
+        self.maxsize = maxsize
+        self._masks: Dict[Tuple, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dataframe: DataFrame, metadata: dict, condition: str, value: Hashable,
+            build: Callable[[], object]) -> np.ndarray:
+        """
+        Packed mask of a condition, built on the first request only
+        :param dataframe: the pair's DataFrame, its length and last date are part of the key
+        :param metadata: populate_* metadata, for the pair
+        :param condition: name of the condition
+        :param value: parameter value the condition was built with
+        :param build: returns the boolean Series / array when the mask is not cached
+        :return: packed bits (np.packbits) of the mask
+        """
+        key = (metadata['pair'], len(dataframe), dataframe['date'].iloc[-1], condition, value)
+        packed = self._masks.get(key)
+        if packed is not None:
+            self.hits += 1
+            return packed
+        self.misses += 1
+        packed = np.packbits(np.asarray(build(), dtype=bool))
+        if len(self._masks) >= self.maxsize:
+            del self._masks[next(iter(self._masks))]
+        self._masks[key] = packed
+        return packed
+
+    @staticmethod
+    def combine(masks: List[np.ndarray], length: int) -> np.ndarray:
+        """
+        AND of packed masks
+        :return: boolean array of the given length
+        """
+        result = masks[0].copy()
+        for mask in masks[1:]:
+            np.bitwise_and(result, mask, out=result)
+        return np.unpackbits(result, count=length).astype(bool)
+
+    def clear(self):
+        self._masks.clear()
@@ -0,0 +1,220 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Order book snapshots shared by the order book reads of one bot loop.
+
+With bid_strategy.use_order_book a bot reads the order book of every buy candidate,
+again for the same pair when another signal fires on it within the loop. When BBRSI
+fires on many 1h pairs at the top of the hour that is a burst of requests for books
+that have not changed.
+
+order_book(strategy, pair, maximum) is the strategy's dp.orderbook(pair, maximum) with
+an OrderBookCache in front of it when the bot config has an "order_book_cache"
+section:
+ - a snapshot is served for ttl seconds (per pair with pair_ttl), to any request that
+   asks for no more levels than it holds
+ - at least `depth` levels are fetched, a later read of up to that many levels is
+   served from the same snapshot
+ - the levels are kept as (levels x 2) float64 arrays of price, amount
+ - callers asking for a pair whose book is being fetched wait for that request instead
+   of sending their own (the API server and telegram threads can call the strategy)
+ - hits, misses and coalesced requests are counted and logged every report_interval
+   seconds
+
+    def confirm_trade_entry(self, pair: str, order_type: str, amount: float, rate: float,
+                            time_in_force: str, **kwargs) -> bool:
+        book = order_book(self, pair, 1)
+        return (book['asks'][0][0] - book['bids'][0][0]) / rate < 0.002
+
+    "order_book_cache": {
+        "ttl": 5,
+        "depth": 5,
+        "pair_ttl": {"BTC/USDT": 2},
+        "report_interval": 3600
+    }
+
+The cache only goes through the DataProvider's public orderbook(). freqtrade 2021.5
+prices an order from the exchange object itself, with no hook in between, so its own
+bid_strategy / ask_strategy reads are not cached; strategy code reading the book (the
+confirm_trade_entry above, depth checks of its own) is. None of the strategies here
+reads the book yet, so no config enables the cache: it saves requests only for a
+strategy calling order_book(). Without the config key, or outside live / dry-run,
+order_book() is dp.orderbook(). Keep ttl at or below internals.process_throttle_secs,
+an entry is then never checked against a book older than the previous loop.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHED_RUNMODES = ('live', 'dry_run')
+
+
+def _levels(levels) -> np.ndarray:
+    """
+    [[price, amount, ...], ...] as a (levels x 2) array
+    """
+    if not len(levels):
+        return np.empty((0, 2), dtype=np.float64)
+    return np.array([level[:2] for level in levels], dtype=np.float64)
+
+
+class _Snapshot:
+    __slots__ = ('fetched', 'limit', 'timestamp', 'bids', 'asks')
+
+    def __init__(self, fetched: float, limit: int, book: dict):
+        self.fetched = fetched
+        # levels requested, a thinner book holds everything up to this limit too
+        self.limit = limit
+        self.timestamp = book.get('timestamp')
+        self.bids = _levels(book['bids'])
+        self.asks = _levels(book['asks'])
+
+    def book(self, pair: str, limit: int) -> dict:
+        return {'symbol': pair, 'timestamp': self.timestamp,
+                'bids': self.bids[:limit].tolist(), 'asks': self.asks[:limit].tolist()}
+
+
+class _Pending:
+    __slots__ = ('limit', 'done', 'snapshot', 'error')
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.done = threading.Event()
+        self.snapshot: Optional[_Snapshot] = None
+        self.error: Optional[BaseException] = None
+
+
+class OrderBookCache:
+
+    def __init__(self, fetch: Callable[[str, int], dict], ttl: float = 5.0, depth: int = 5,
+                 pair_ttl: Optional[Dict[str, float]] = None, report_interval: float = 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param fetch: function(pair, limit) returning the order book like ccxt,
+            dp.orderbook
+        :param ttl: seconds a snapshot is served
+        :param depth: levels fetched at least
+        :param pair_ttl: ttl of single pairs
+        :param report_interval: seconds between the counters written to the log, 0 for none
+        """
+        self._fetch = fetch
+        self.ttl = ttl
+        self.depth = depth
+        self.pair_ttl = pair_ttl or {}
+        self.report_interval = report_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._pending: Dict[str, _Pending] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._last_report = clock()
+
+    def fetch(self, pair: str, limit: int = 100) -> dict:
+        """
+        The order book of pair, drop-in for dp.orderbook
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(pair)
+            if (snapshot is not None and snapshot.limit >= limit
+                    and self._clock() - snapshot.fetched < self.pair_ttl.get(pair, self.ttl)):
+                self.hits += 1
+                return snapshot.book(pair, limit)
+            pending = self._pending.get(pair)
+            if pending is not None and pending.limit >= limit:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                pending = self._pending[pair] = _Pending(max(limit, self.depth))
+                owner = True
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.snapshot.book(pair, limit)
+
+        try:
+            pending.snapshot = _Snapshot(self._clock(), pending.limit,
+                                         self._fetch(pair, pending.limit))
+        except BaseException as error:
+            pending.error = error
+            raise
+        finally:
+            with self._lock:
+                if self._pending.get(pair) is pending:
+                    del self._pending[pair]
+                if pending.snapshot is not None:
+                    self._snapshots[pair] = pending.snapshot
+            pending.done.set()
+        return pending.snapshot.book(pair, limit)
+
+    def invalidate(self, pair: Optional[str] = None):
+        """
+        Drops the snapshot of pair, of every pair when None
+        """
+        with self._lock:
+            if pair is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(pair, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            requests = self.hits + self.misses + self.coalesced
+            return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced,
+                    'hit_rate': (self.hits + self.coalesced) / requests if requests else 0.0,
+                    'pairs': len(self._snapshots)}
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (f"order book cache: {stats['hits']} hits, {stats['coalesced']} coalesced, "
+                f"{stats['misses']} fetched ({stats['hit_rate']:.1%} served from cache), "
+                f"{stats['pairs']} pairs")
+
+    def report_due(self):
+        """
+        Logs the counters when report_interval has passed
+        """
+        if self.report_interval and self._clock() - self._last_report >= self.report_interval:
+            self._last_report = self._clock()
+            logger.info('%s', self.report())
+
+
+def order_book_cache(strategy) -> Optional[OrderBookCache]:
+    """
+    The strategy's OrderBookCache in front of dp.orderbook, created from its config on
+    the first call in live / dry-run, None when not configured
+    """
+    try:
+        return strategy.__dict__['_order_book_cache']
+    except KeyError:
+        pass
+    settings = strategy.config.get('order_book_cache')
+    dp = getattr(strategy, 'dp', None)
+    result = None
+    if settings is not None and dp is not None and dp.runmode.value in CACHED_RUNMODES:
+        result = OrderBookCache(dp.orderbook,
+                                ttl=settings.get('ttl', 5.0),
+                                depth=settings.get('depth', 5),
+                                pair_ttl=settings.get('pair_ttl'),
+                                report_interval=settings.get('report_interval', 3600))
+    strategy.__dict__['_order_book_cache'] = result
+    return result
+
+
+def order_book(strategy, pair: str, maximum: int) -> dict:
+    """
+    dp.orderbook(pair, maximum), from the cache when the config has one
+    """
+    cache = order_book_cache(strategy)
+    if cache is None:
+        return strategy.dp.orderbook(pair, maximum)
+    cache.report_due()
+    return cache.fetch(pair, maximum)
@@ -0,0 +1,158 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Parallel hyperopt evaluator with the candles in shared memory.
+
+The OHLCV and precomputed indicator columns of every pair are copied once into a single
+multiprocessing.shared_memory block. Worker processes attach to it and build their
+DataFrames as zero-copy views, so N workers cost one copy of the data instead of N
+pickled ones. Epochs (parameter dicts) are fanned out over the pool and the objective
+runs against those views.
+
+    frames = {pair: BBRSI_ETH_OPT.compute_indicators(df) for pair, df in data.items()}
+    with ParallelEvaluator(frames, bbrsi_objective, workers=8) as evaluator:
+        losses = evaluator.evaluate(list_of_param_dicts)
+
+objective(frames, params) -> float has to be a module level function (it is pickled).
+"""
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+from crossover import crossed_below
+from exit_sim import ExitResult, simulate_exits
+from shared_frames import Layout, SharedFrames
+from variants import load_strategy_class
+
+_worker: dict = {}
+
+
+def _init_worker(name: str, layout: Layout, objective: Callable):
+    shared = SharedFrames.attach(name, layout)
+    _worker['shared'] = shared
+    _worker['frames'] = shared.frames()
+    _worker['objective'] = objective
+
+
+def _run(params: dict) -> float:
+    return _worker['objective'](_worker['frames'], params)
+
+
+class ParallelEvaluator:
+
+    def __init__(self, frames: Dict[str, DataFrame], objective: Callable[[Dict, dict], float],
+                 workers: int = 4):
+        self.shared = SharedFrames.create(frames)
+        self.pool = Pool(workers, initializer=_init_worker,
+                         initargs=(self.shared.shm.name, self.shared.layout, objective))
+
+    def evaluate(self, epochs: List[dict], chunksize: int = 1) -> List[float]:
+        """
+        :param epochs: one parameter dict per epoch
+        :return: objective value per epoch, in order
+        """
+        return self.pool.map(_run, epochs, chunksize=chunksize)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.shared.close()
+
+    def __enter__(self) -> 'ParallelEvaluator':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# the strategies the objectives replay, their triggers and ROI tables come from them
+STRATEGY_DIR = Path(__file__).resolve().parent / 'strats and configs 2021-06-24'
+BBRSI_ETH_OPT = load_strategy_class('BBRSI_ETH_OPT', STRATEGY_DIR)
+Low_BB_ETH = load_strategy_class('Low_BB_ETH', STRATEGY_DIR)
+
+
+def _trades(strategy_cls, dataframe: DataFrame, signal: np.ndarray, params: dict,
+            sell: Optional[np.ndarray] = None) -> Optional[ExitResult]:
+    # freqtrade opens on the candle after the signal
+    entries = np.flatnonzero(signal[:-1]) + 1
+    if not len(entries):
+        return None
+    if sell is not None:
+        # should_sell() ignores a sell signal on a candle that has a buy signal as well
+        sell = sell & ~signal
+    # the minimal_roi hyperopt builds of the roi_t1..3 / roi_p1..3 parameters
+    roi = strategy_cls.generate_roi_table(params)
+    result = simulate_exits(entries, dataframe['open'].values, dataframe['high'].values,
+                            dataframe['low'].values, dataframe['close'].values,
+                            roi, params['stoploss'], params['timeframe_minutes'],
+                            sell=sell, fee=params.get('fee', 0.0))
+    return result.non_overlapping()
+
+
+def bbrsi_trades(frames: Dict[str, DataFrame], params: dict) -> Dict[str, ExitResult]:
+    """
+    Trades of one BBRSI_ETH_OPT epoch per pair (pairs without any left out), buy and sell
+    signals plus the ROI / stoploss spaces, exits from exit_sim.
+    params: buy_rsi, buy_rsi_enabled, buy_trigger, stoploss, roi_t1..3, roi_p1..3,
+            timeframe_minutes, use_sell_signal (default True, ask_strategy's) and with it
+            sell_rsi, sell_rsi_enabled, sell_trigger
+    """
+    use_sell_signal = params.get('use_sell_signal', True)
+    buy_band = BBRSI_ETH_OPT.buy_trigger_bands[params['buy_trigger']]
+    sell_band = BBRSI_ETH_OPT.sell_trigger_bands.get(params.get('sell_trigger'))
+    trades = {}
+    for pair, dataframe in frames.items():
+        close = dataframe['close'].values
+        sell = None
+        with np.errstate(invalid='ignore'):
+            signal = close < dataframe[buy_band].values
+            signal &= dataframe['volume'].values > 0
+            if params['buy_rsi_enabled']:
+                signal &= dataframe['rsi'].values > params['buy_rsi']
+            if use_sell_signal:
+                sell = close > dataframe[sell_band].values
+                if params['sell_rsi_enabled']:
+                    sell &= dataframe['rsi'].values > params['sell_rsi']
+        result = _trades(BBRSI_ETH_OPT, dataframe, signal, params, sell)
+        if result is not None:
+            trades[pair] = result
+    return trades
+
+
+def low_bb_trades(frames: Dict[str, DataFrame], params: dict) -> Dict[str, ExitResult]:
+    """
+    Trades of one Low_BB_ETH epoch per pair, as bbrsi_trades. Low_BB_ETH never signals a
+    sell, the trades end by ROI or stoploss.
+    params: bb_factor, buy_trigger, stoploss, roi_t1..3, roi_p1..3, timeframe_minutes
+    """
+    band = Low_BB_ETH.buy_trigger_bands[params['buy_trigger']]
+    trades = {}
+    for pair, dataframe in frames.items():
+        signal = crossed_below(dataframe['close'].values, dataframe[band].values,
+                               factor=params['bb_factor'])
+        result = _trades(Low_BB_ETH, dataframe, signal, params)
+        if result is not None:
+            trades[pair] = result
+    return trades
+
+
+def total_profit(trades: Dict[str, ExitResult], fee: float = 0.0) -> float:
+    return float(sum(result.profit_ratio(fee).sum() for result in trades.values()))
+
+
+def bbrsi_objective(frames: Dict[str, DataFrame], params: dict) -> float:
+    """
+    Loss (negative total profit ratio) of one BBRSI_ETH_OPT epoch, see bbrsi_trades.
+    params: those of bbrsi_trades, fee (optional)
+    """
+    return -total_profit(bbrsi_trades(frames, params), params.get('fee', 0.0))
+
+
+def low_bb_objective(frames: Dict[str, DataFrame], params: dict) -> float:
+    """
+    Loss (negative total profit ratio) of one Low_BB_ETH epoch, see low_bb_trades.
+    params: those of low_bb_trades, fee (optional)
+    """
+    return -total_profit(low_bb_trades(frames, params), params.get('fee', 0.0))
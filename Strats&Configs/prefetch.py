@@ -0,0 +1,223 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Candle fetching overlapped with the indicator work.
+
+A bot loop first fetches the candles of every pair (all requests in flight together)
+and only then runs populate_indicators pair by pair, so the analysis of every pair
+waits for the slowest response. CandlePipeline starts on a pair as soon as its candles
+are in: an asyncio loop keeps up to `concurrency` requests in flight and puts each
+response into a bounded queue, `workers` threads take pairs off the queue and run the
+analysis. When the workers fall behind the queue fills up and the fetching waits,
+at most queue_size + concurrency fetched frames wait for a worker.
+
+    pipeline = CandlePipeline(FakeExchange.from_store(store, '5m', latency=0.3), workers=4)
+    analyzed = pipeline.run(pairs, '5m',
+                            lambda pair, frame: strategy.populate_indicators(frame,
+                                                                            {'pair': pair}))
+    print(pipeline.stats)
+
+A feed is anything with `async fetch(pair, timeframe, since=None, limit=1000)` returning
+the candles as a DataFrame: FakeExchange serves recorded candles (candle_store.py or
+DataFrames) after a configurable latency, CCXTAsyncFeed an exchange through
+ccxt.async_support. CandlePipeline.run_serial() is the fetch-everything-first order for
+comparison, benchmarks/bench_prefetch.py times both.
+
+The analysis runs in threads: the talib / NumPy parts release the GIL, the pandas
+parts mostly don't, the gain is the time spent waiting for the exchange.
+
+The pipeline stands on its own, next to the bot rather than inside its loop. freqtrade
+2021.5 refreshes the candles of all pairs (DataProvider.refresh) before it analyzes the
+first one, and neither bot_loop_start nor the DataProvider has a place to hand it
+candles as they arrive. It is meant for scripts analyzing a whole whitelist from the
+exchange outside a bot, benchmarks/bench_prefetch.py measures what it gains.
+"""
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from pandas import DataFrame, Timedelta, Timestamp, to_datetime
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+
+class FakeExchange:
+    """
+    Serves recorded candles the way fetch_ohlcv does, each request answered after
+    latency +- jitter seconds. The clock `now` decides which candles are closed.
+    """
+
+    def __init__(self, frames: Dict[str, DataFrame], latency: float = 0.2,
+                 jitter: float = 0.0, now: Optional[Timestamp] = None, seed: int = 0):
+        """
+        :param frames: candles per pair
+        :param latency: seconds per request
+        :param jitter: latency varies uniformly by up to this many seconds
+        :param now: the exchange's clock, all candles when None
+        """
+        self.frames = frames
+        self.latency = latency
+        self.jitter = jitter
+        self.now = now
+        self.requests = 0
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_store(cls, store, timeframe: str, pairs: Optional[Sequence[str]] = None,
+                   **kwargs) -> 'FakeExchange':
+        """
+        :param store: candle_store.CandleStore holding the recorded candles
+        """
+        return cls({pair: store.load(pair, timeframe)
+                    for pair in pairs or store.pairs(timeframe)}, **kwargs)
+
+    async def fetch(self, pair: str, timeframe: str, since: Optional[Timestamp] = None,
+                    limit: int = 1000) -> DataFrame:
+        """
+        :param since: candles from this open time on, the newest `limit` when None
+        """
+        self.requests += 1
+        await asyncio.sleep(max(0.0, self.latency
+                                + self._random.uniform(-self.jitter, self.jitter)))
+        dataframe = self.frames[pair]
+        dates = dataframe['date']
+        last = len(dataframe) if self.now is None else int(
+            dates.searchsorted(self.now - Timedelta(timeframe.replace('m', 'min')), 'right'))
+        first = max(0, last - limit) if since is None else int(dates.searchsorted(since))
+        return dataframe.iloc[first:min(last, first + limit)].reset_index(drop=True)
+
+
+class CCXTAsyncFeed:
+    """
+    fetch() through ccxt.async_support, the candles as a DataFrame like FakeExchange's
+    """
+
+    def __init__(self, exchange: str, config: Optional[dict] = None):
+        import ccxt.async_support as ccxt_async
+        self.exchange = getattr(ccxt_async, exchange)(config or {'enableRateLimit': True})
+
+    async def fetch(self, pair: str, timeframe: str, since: Optional[Timestamp] = None,
+                    limit: int = 1000) -> DataFrame:
+        rows = await self.exchange.fetch_ohlcv(
+            pair, timeframe, since=None if since is None else since.value // 1_000_000,
+            limit=limit)
+        rows = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        dataframe = DataFrame({column: rows[:, i] for i, column in enumerate(OHLCV, 1)})
+        dataframe.insert(0, 'date', to_datetime(rows[:, 0].astype(np.int64), unit='ms',
+                                                utc=True))
+        return dataframe
+
+    async def close(self):
+        await self.exchange.close()
+
+
+class CandlePipeline:
+
+    def __init__(self, feed, workers: int = 4, queue_size: int = 16, concurrency: int = 16,
+                 limit: int = 1000):
+        """
+        :param feed: FakeExchange, CCXTAsyncFeed or anything with the same fetch()
+        :param workers: analysis threads
+        :param queue_size: fetched frames waiting for a worker at most
+        :param concurrency: requests in flight at most
+        :param limit: candles per request
+        """
+        self.feed = feed
+        self.workers = workers
+        self.queue_size = queue_size
+        self.concurrency = concurrency
+        self.limit = limit
+        self.stats: Dict[str, float] = {}
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='candle-pipeline')
+
+    def run(self, pairs: Sequence[str], timeframe: str,
+            analyze: Callable[[str, DataFrame], Any],
+            since: Optional[Dict[str, Timestamp]] = None) -> Dict[str, Any]:
+        """
+        Fetches the candles of every pair and analyzes each pair as it arrives
+        :param analyze: function(pair, candles), run in a worker thread
+        :param since: per pair, fetch from this open time on
+        :return: pair -> what analyze returned, in the order of pairs
+        """
+        return asyncio.run(self._run(pairs, timeframe, analyze, since or {}))
+
+    async def _run(self, pairs: Sequence[str], timeframe: str,
+                   analyze: Callable[[str, DataFrame], Any],
+                   since: Dict[str, Timestamp]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: Dict[str, Any] = {}
+        errors: List[BaseException] = []
+        started = time.perf_counter()
+        fetched: List[float] = []
+
+        async def produce(pair: str):
+            # the request slot is held until the frame is queued, so a full queue
+            # stops the fetching
+            async with semaphore:
+                frame = await self.feed.fetch(pair, timeframe, since=since.get(pair),
+                                              limit=self.limit)
+                fetched.append(time.perf_counter() - started)
+                await queue.put((pair, frame))
+
+        async def consume():
+            while True:
+                pair, frame = await queue.get()
+                try:
+                    results[pair] = await loop.run_in_executor(self._executor, analyze,
+                                                               pair, frame)
+                except Exception as error:
+                    # the worker goes on, a dead one would leave the queue unemptied
+                    errors.append(error)
+                finally:
+                    queue.task_done()
+
+        consumers = [asyncio.create_task(consume()) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*(produce(pair) for pair in pairs))
+            await queue.join()
+        finally:
+            for consumer in consumers:
+                consumer.cancel()
+        if errors:
+            raise errors[0]
+        self.stats = {'pairs': len(pairs), 'fetched_s': max(fetched, default=0.0),
+                      'total_s': time.perf_counter() - started}
+        return {pair: results[pair] for pair in pairs}
+
+    def run_serial(self, pairs: Sequence[str], timeframe: str,
+                   analyze: Callable[[str, DataFrame], Any],
+                   since: Optional[Dict[str, Timestamp]] = None) -> Dict[str, Any]:
+        """
+        All candles first, then every pair in turn, the order of a bot loop
+        """
+        since = since or {}
+
+        async def fetch_all() -> List[DataFrame]:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def fetch(pair: str) -> DataFrame:
+                async with semaphore:
+                    return await self.feed.fetch(pair, timeframe, since=since.get(pair),
+                                                 limit=self.limit)
+            return await asyncio.gather(*(fetch(pair) for pair in pairs))
+
+        started = time.perf_counter()
+        frames = asyncio.run(fetch_all())
+        fetched = time.perf_counter() - started
+        results = {pair: analyze(pair, frame) for pair, frame in zip(pairs, frames)}
+        self.stats = {'pairs': len(pairs), 'fetched_s': fetched,
+                      'total_s': time.perf_counter() - started}
+        return results
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self) -> 'CandlePipeline':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
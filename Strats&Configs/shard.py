@@ -0,0 +1,306 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+One bot config run as N freqtrade processes, each trading a slice of the whitelist.
+
+A bot evaluates its pairs one after the other, config_usdt.json's 99 pairs on 5m make a
+loop of 99 populate_indicators calls on one core. The launcher splits
+exchange.pair_whitelist by a stable hash of the pair name (crc32, a pair lands in the
+same shard on every start, whatever the order of the whitelist) and starts one
+`freqtrade trade` per shard with the same strategy:
+
+    python shard.py config_usdt.json --shards 4 --strategy Low_BB
+    python shard.py config/config_bbrsi_live.json --shards 2 --strategy BBRSI \\
+        --budget 0.05 -- --logfile user_data/logs/bbrsi.log
+
+Every shard runs on a copy of the config (resolved and validated by config_compiler.py),
+written to --directory without the credentials (config_secrets.py hands the shard its
+config with them on stdin), with
+ - its pairs as pair_whitelist
+ - its own db_url, shards must not share a trade database
+ - bot_name suffixed and the api_server port offset by the shard number
+ - telegram on the first shard only, a bot token can only be polled by one process
+ - a "sharding" section, read by the strategies decorated with @sharded
+
+The stake budget is shared through a JSON state file. On every loop (bot_loop_start) a
+shard writes the stake of its open trades, confirm_trade_entry reserves the stake of a
+new trade (amount * rate) out of what the budget leaves after all shards' stakes and
+turns the trade down when less is left, until the shard's next loop writes the real
+figure again. The file is read and written under an exclusive flock. A shard that has
+not written for stale_after seconds no longer counts. The budget is --budget, or
+stake_amount * max_open_trades when both are numbers. With neither, the shards only
+share the pairs.
+
+A strategy opts in with the class decorator, which takes effect when a bot is started
+with a budget in its "sharding" section: only then are bot_loop_start and
+confirm_trade_entry of that instance wrapped, every other bot runs the strategy's own
+methods.
+
+    @sharded
+    @profiled
+    class BBRSI(IStrategy):
+        ...
+
+The launcher reads the config through config_compiler.py, the strategies importing
+this module for @sharded do not load it.
+"""
+import argparse
+import copy
+import fcntl
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import zlib
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+SHARD_DIRECTORY = Path('user_data/shards')
+
+
+def shard_of(pair: str, shards: int) -> int:
+    return zlib.crc32(pair.encode()) % shards
+
+
+def partition(pairs: List[str], shards: int) -> List[List[str]]:
+    """
+    The pairs of every shard, in whitelist order
+    """
+    result: List[List[str]] = [[] for _ in range(shards)]
+    for pair in pairs:
+        result[shard_of(pair, shards)].append(pair)
+    return result
+
+
+class StakeBudget:
+
+    def __init__(self, path: Path, shard: int, budget: float, stale_after: float = 600):
+        """
+        :param path: state file shared by the shards
+        :param shard: number of this shard
+        :param budget: stake all shards together may have in open trades
+        :param stale_after: seconds after which a silent shard no longer counts
+        """
+        self.path = Path(path)
+        self.shard = str(shard)
+        self.budget = budget
+        self.stale_after = stale_after
+
+    def _update(self, change: Callable[[Dict[str, dict]], float]) -> float:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a+') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            handle.seek(0)
+            text = handle.read()
+            state = json.loads(text) if text else {}
+            result = change(state)
+            handle.seek(0)
+            handle.truncate()
+            json.dump(state, handle)
+            handle.flush()
+        return result
+
+    def _in_use(self, state: Dict[str, dict]) -> float:
+        now = time.time()
+        return sum(entry['stake'] for shard, entry in state.items()
+                   if shard == self.shard or now - entry['updated'] < self.stale_after)
+
+    def publish(self, stake: float):
+        """
+        Sets the stake of this shard, the stake of its open trades
+        """
+        def change(state):
+            state[self.shard] = {'stake': stake, 'updated': time.time()}
+            return stake
+        self._update(change)
+
+    def available(self) -> float:
+        return self._update(lambda state: self.budget - self._in_use(state))
+
+    def reserve(self, amount: float, minimum: float = 0.0) -> float:
+        """
+        Takes up to amount out of the budget
+        :param minimum: smallest stake worth reserving
+        :return: the stake reserved, 0 when less than minimum is left
+        """
+        def change(state):
+            granted = min(amount, self.budget - self._in_use(state))
+            if granted <= 0 or granted < minimum:
+                return 0.0
+            entry = state.setdefault(self.shard, {'stake': 0.0, 'updated': time.time()})
+            entry['stake'] += granted
+            return granted
+        return self._update(change)
+
+
+def stake_budget(strategy) -> Optional[StakeBudget]:
+    """
+    The strategy's StakeBudget, created from its config on the first call, None when
+    the bot is not a shard or has no budget
+    """
+    try:
+        return strategy.__dict__['_stake_budget']
+    except KeyError:
+        pass
+    settings = strategy.config.get('sharding', {})
+    result = None
+    if settings.get('budget') is not None:
+        result = StakeBudget(Path(settings['state']), settings['shard'], settings['budget'],
+                             settings.get('stale_after', 600))
+    strategy.__dict__['_stake_budget'] = result
+    return result
+
+
+def _bot_loop_start(loop_start, budget: StakeBudget):
+
+    @wraps(loop_start)
+    def bot_loop_start(*args, **kwargs):
+        from freqtrade.persistence import Trade
+        budget.publish(sum(trade.stake_amount for trade in Trade.get_open_trades()))
+        return loop_start(*args, **kwargs)
+    return bot_loop_start
+
+
+def _confirm_trade_entry(confirm, budget: StakeBudget):
+
+    # the explicit signature, freqtrade passes these by keyword
+    @wraps(confirm)
+    def confirm_trade_entry(pair: str, order_type: str, amount: float, rate: float,
+                            time_in_force: str, **kwargs) -> bool:
+        if not confirm(pair=pair, order_type=order_type, amount=amount, rate=rate,
+                       time_in_force=time_in_force, **kwargs):
+            return False
+        stake = amount * rate
+        return budget.reserve(stake, stake) > 0
+    return confirm_trade_entry
+
+
+def sharded(cls):
+    """
+    Class decorator sharing the stake budget between the shards, see the module. The
+    methods of a bot without a budget in its "sharding" section are left as they are.
+    """
+    init = cls.__init__
+
+    @wraps(init)
+    def __init__(self, config: dict, *args, **kwargs):
+        init(self, config, *args, **kwargs)
+        budget = stake_budget(self)
+        if budget is not None:
+            self.bot_loop_start = _bot_loop_start(self.bot_loop_start, budget)
+            self.confirm_trade_entry = _confirm_trade_entry(self.confirm_trade_entry, budget)
+
+    cls.__init__ = __init__
+    return cls
+
+
+def default_budget(config: dict) -> Optional[float]:
+    stake = config.get('stake_amount')
+    trades = config.get('max_open_trades', -1)
+    if isinstance(stake, (int, float)) and isinstance(trades, int) and trades > 0:
+        return stake * trades
+    return None
+
+
+def shard_config(config: dict, name: str, shard: int, shards: int, pairs: List[str],
+                 state: Path, budget: Optional[float], directory: Path) -> dict:
+    """
+    The config of one shard, see the module
+    """
+    result = copy.deepcopy(config)
+    result['exchange']['pair_whitelist'] = pairs
+    suffix = '.dryrun' if config.get('dry_run') else ''
+    result['db_url'] = f'sqlite:///{directory / f"tradesv3-{name}-shard{shard}{suffix}.sqlite"}'
+    result['bot_name'] = f"{config.get('bot_name', name)}-shard{shard}"
+    api_server = result.get('api_server')
+    if api_server and api_server.get('enabled'):
+        api_server['listen_port'] = api_server.get('listen_port', 8080) + shard
+    if shard and 'telegram' in result:
+        result['telegram']['enabled'] = False
+    result['sharding'] = {'shard': shard, 'shards': shards, 'state': str(state),
+                          'budget': budget}
+    return result
+
+
+def launch(processes: List[subprocess.Popen]) -> int:
+    """
+    Runs the shards until one exits or the launcher is stopped, then stops all
+    :return: exit code of the first shard to exit
+    """
+
+    def stop(*_):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    code = 0
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+        code = next(process.returncode for process in processes if process.poll() is not None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+        for process in processes:
+            try:
+                process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('config', type=Path)
+    parser.add_argument('--shards', type=int, default=os.cpu_count())
+    parser.add_argument('--strategy', required=True)
+    parser.add_argument('--strategy-path', type=Path)
+    parser.add_argument('--budget', type=float,
+                        help='stake of all shards, stake_amount * max_open_trades by default')
+    parser.add_argument('--directory', type=Path, default=SHARD_DIRECTORY,
+                        help='where the shard configs, databases and the state file go')
+    parser.add_argument('--write-only', action='store_true',
+                        help='write the shard configs without starting the bots')
+    parser.add_argument('freqtrade_args', nargs='*',
+                        help='passed on to freqtrade trade, after --')
+    args = parser.parse_args()
+
+    from config_compiler import load_config
+    from config_secrets import apply_secrets, freqtrade
+    config = load_config(args.config)
+    shards = partition(config['exchange']['pair_whitelist'], args.shards)
+    budget = args.budget if args.budget is not None else default_budget(config)
+    args.directory.mkdir(parents=True, exist_ok=True)
+    name = args.config.stem
+    state = args.directory / f'{name}-stake.json'
+    # a fresh budget, the shards write their open trades on their first loop
+    state.write_text('{}')
+
+    configs = []
+    for shard, pairs in enumerate(shards):
+        path = args.directory / f'{name}-shard{shard}.json'
+        configs.append(shard_config(config, name, shard, args.shards, pairs, state, budget,
+                                    args.directory))
+        # written with the placeholders, the shards get the credentials on stdin
+        path.write_text(json.dumps(configs[-1], indent=4))
+        print(f'shard {shard}: {len(pairs)} pairs -> {path}')
+    print(f'stake budget: {budget if budget is not None else "not shared"}')
+    if not args.write_only:
+        # a missing secret stops the launcher before any shard has started
+        try:
+            apply_secrets(config)
+        except ValueError as error:
+            raise SystemExit(str(error))
+        arguments = ['trade', '--strategy', args.strategy]
+        if args.strategy_path:
+            arguments += ['--strategy-path', str(args.strategy_path)]
+        sys.exit(launch([freqtrade(shard, arguments + args.freqtrade_args)
+                         for shard in configs]))
+
+
+if __name__ == '__main__':
+    main()
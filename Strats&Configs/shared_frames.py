@@ -0,0 +1,88 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Candle DataFrames in one multiprocessing.shared_memory block.
+
+The owner copies the frames in once, other processes attach by name and get DataFrames
+viewing the block, nothing is copied or pickled per process.
+
+    shared = SharedFrames.create(frames)
+    # other process
+    frames = SharedFrames.attach(shared.shm.name, shared.layout).frames()
+"""
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Tuple
+
+import numpy as np
+from pandas import DataFrame, to_datetime
+
+# pair -> (offset in 8 byte words, rows, value columns)
+Layout = Dict[str, Tuple[int, int, Tuple[str, ...]]]
+
+
+class SharedFrames:
+    """
+    Candle DataFrames in one shared memory block, per pair:
+    the dates (int64 ns) followed by the value columns (float64, column by column).
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Layout, owner: bool):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+
+    @classmethod
+    def create(cls, frames: Dict[str, DataFrame]) -> 'SharedFrames':
+        layout: Layout = {}
+        words = 0
+        for pair, dataframe in frames.items():
+            columns = tuple(column for column in dataframe.columns if column != 'date')
+            layout[pair] = (words, len(dataframe), columns)
+            words += len(dataframe) * (1 + len(columns))
+
+        shm = shared_memory.SharedMemory(create=True, size=max(words, 1) * 8)
+        shared = cls(shm, layout, owner=True)
+        for pair, dataframe in frames.items():
+            dates, values = shared._arrays(pair)
+            dates[:] = dataframe['date'].values.astype('datetime64[ns]').view(np.int64)
+            for i, column in enumerate(layout[pair][2]):
+                values[i] = dataframe[column].values
+        return shared
+
+    @classmethod
+    def attach(cls, name: str, layout: Layout, track: bool = True) -> 'SharedFrames':
+        """
+        :param track: False for processes that are not children of the owner. Pool workers
+                      share the owner's resource tracker, attaching registers the same name
+                      again and the block stays. An unrelated process has its own tracker,
+                      which would unlink the block when that process exits.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if not track:
+            # _name is the registered name (with the leading slash)
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, layout, owner=False)
+
+    def _arrays(self, pair: str) -> Tuple[np.ndarray, np.ndarray]:
+        offset, rows, columns = self.layout[pair]
+        dates = np.ndarray((rows,), dtype=np.int64, buffer=self.shm.buf, offset=offset * 8)
+        values = np.ndarray((len(columns), rows), dtype=np.float64, buffer=self.shm.buf,
+                            offset=(offset + rows) * 8)
+        return dates, values
+
+    def frames(self) -> Dict[str, DataFrame]:
+        """
+        DataFrames viewing the shared block, the values are not copied
+        """
+        result = {}
+        for pair, (_, _, columns) in self.layout.items():
+            dates, values = self._arrays(pair)
+            # (columns x rows) transposed is the column-major block pandas stores anyway
+            dataframe = DataFrame(values.T, columns=list(columns), copy=False)
+            dataframe.insert(0, 'date', to_datetime(dates, utc=True))
+            result[pair] = dataframe
+        return result
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,16 +1,22 @@
 # pragma pylint: disable=missing-docstring, invalid-name, pointless-string-statement
-from functools import reduce
+import sys
+from pathlib import Path
 from typing import Dict, Any, Callable, List
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
-import talib.abstract as ta
 
 from freqtrade.strategy import IStrategy
 from freqtrade.strategy import CategoricalParameter, IntParameter, RealParameter
 from skopt.space import Dimension, Integer, Real
 
-import freqtrade.vendor.qtpylib.indicators as qtpylib
+# the helper modules, see indicators.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from compact import compact_signals
+from indicator_cache import cached_indicators
+from indicators import bollinger_bands
+from mask_cache import MaskCache
+from rsi import wilder_rsi
 
 
 class BBRSI_ETH_OPT(IStrategy):
@@ -60,6 +66,22 @@ class BBRSI_ETH_OPT(IStrategy):
         'sell': 'gtc',
     }
 
+    # The trigger masks only depend on the parameter values, build each one once
+    masks = MaskCache()
+
+    # trigger -> the band the close is compared with
+    buy_trigger_bands = {
+        'bb_lower1': 'bb_lowerband1',
+        'bb_lower2': 'bb_lowerband2',
+        'bb_lower3': 'bb_lowerband3',
+    }
+    sell_trigger_bands = {
+        #'sell-bb_lower2': 'bb_lowerband2',
+        'sell-bb_lower1': 'bb_lowerband1',
+        'sell-bb_middle1': 'bb_middleband1',
+        'sell-bb_upper1': 'bb_upperband1',
+    }
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         """
         Adds several different TA indicators to the given DataFrame
@@ -71,27 +93,33 @@ class BBRSI_ETH_OPT(IStrategy):
         :param metadata: Additional information, like the currently traded pair
         :return: a Dataframe with all mandatory indicators for the strategies
         """
+        # Every epoch uses the same bands, only the triggers change
+        return cached_indicators(self, dataframe, metadata, self.compute_indicators)
+
+    @staticmethod
+    def compute_indicators(dataframe: DataFrame) -> DataFrame:
 
         # Momentum Indicator
         # -----------------------------------
         # RSI
-        dataframe['rsi'] = ta.RSI(dataframe)
+        dataframe['rsi'] = wilder_rsi(dataframe['close'].values)
 
         # Overlap Studies
         # ------------------------------------
 
         # Bollinger bands
-        bollinger3 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=3)
+        bollinger = bollinger_bands(dataframe, window=20, stds=(1, 2, 3))
+        bollinger3 = bollinger[3]
         dataframe['bb_lowerband3'] = bollinger3['lower']
         dataframe['bb_middleband3'] = bollinger3['mid']
         dataframe['bb_upperband3'] = bollinger3['upper']
 
-        bollinger2 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=2)
+        bollinger2 = bollinger[2]
         dataframe['bb_lowerband2'] = bollinger2['lower']
         dataframe['bb_middleband2'] = bollinger2['mid']
         dataframe['bb_upperband2'] = bollinger2['upper']
 
-        bollinger1 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=1)
+        bollinger1 = bollinger[1]
         dataframe['bb_lowerband1'] = bollinger1['lower']
         dataframe['bb_middleband1'] = bollinger1['mid']
         dataframe['bb_upperband1'] = bollinger1['upper']
@@ -102,24 +130,23 @@ class BBRSI_ETH_OPT(IStrategy):
         """
         Buy strategy Hyperopt will build and use
         """
-        conditions = []
+        masks = []
         # GUARDS AND TRENDS
         if self.buy_rsi_enabled.value:
-            conditions.append(dataframe['rsi'] > self.buy_rsi.value)
+            masks.append(self.masks.get(dataframe, metadata, 'rsi>', self.buy_rsi.value,
+                                        lambda: dataframe['rsi'] > self.buy_rsi.value))
 
         # TRIGGERS
 
-        if self.buy_trigger.value == 'bb_lower1':
-            conditions.append(dataframe['close'] < dataframe['bb_lowerband1'])
-        if self.buy_trigger.value == 'bb_lower2':
-            conditions.append(dataframe['close'] < dataframe['bb_lowerband2'])
-        if self.buy_trigger.value == 'bb_lower3':
-            conditions.append(dataframe['close'] < dataframe['bb_lowerband3'])
+        band = self.buy_trigger_bands[self.buy_trigger.value]
+        masks.append(self.masks.get(dataframe, metadata, 'close<', band,
+                                    lambda: dataframe['close'] < dataframe[band]))
 
-        conditions.append(dataframe['volume'] > 0)
+        masks.append(self.masks.get(dataframe, metadata, 'volume>', 0,
+                                    lambda: dataframe['volume'] > 0))
 
         dataframe.loc[
-            reduce(lambda x, y: x & y, conditions),
+            self.masks.combine(masks, len(dataframe)),
             'buy'] = 1
 
         return dataframe
@@ -128,26 +155,22 @@ class BBRSI_ETH_OPT(IStrategy):
         """
         Buy strategy Hyperopt will build and use
         """
-        conditions = []
+        masks = []
         # GUARDS AND TRENDS
         if self.sell_rsi_enabled.value:
-            conditions.append(dataframe['rsi'] > self.sell_rsi.value)
+            masks.append(self.masks.get(dataframe, metadata, 'rsi>', self.sell_rsi.value,
+                                        lambda: dataframe['rsi'] > self.sell_rsi.value))
 
         # TRIGGERS
 
-        if self.sell_trigger.value == 'sell-bb_lower1':
-            conditions.append(dataframe['close'] > dataframe['bb_lowerband1'])
-        if self.sell_trigger.value == 'sell-bb_middle1':
-            conditions.append(dataframe['close'] > dataframe['bb_middleband1'])
-        if self.sell_trigger.value == 'sell-bb_upper1':
-            conditions.append(dataframe['close'] > dataframe['bb_upperband1'])
-        #if self.sell_trigger.value == 'sell-bb_lower2':
-        #    conditions.append(dataframe['close'] > dataframe['bb_lowerband2'])
+        band = self.sell_trigger_bands[self.sell_trigger.value]
+        masks.append(self.masks.get(dataframe, metadata, 'close>', band,
+                                    lambda: dataframe['close'] > dataframe[band]))
 
         dataframe.loc[
-            reduce(lambda x, y: x & y, conditions),
+            self.masks.combine(masks, len(dataframe)),
             'sell'] = 1
-        return dataframe
+        return compact_signals(self, dataframe)
 
     @staticmethod
     def generate_roi_table(params: Dict) -> Dict[int, float]:
@@ -1,4 +1,6 @@
 # pragma pylint: disable=missing-docstring, invalid-name, pointless-string-statement
+import sys
+from pathlib import Path
 from functools import reduce
 from typing import Dict, List
 
@@ -9,6 +11,11 @@ import freqtrade.vendor.qtpylib.indicators as qtpylib
 from freqtrade.strategy import IStrategy, CategoricalParameter, IntParameter
 from freqtrade.strategy import RealParameter
 
+# the helper modules, see indicators.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from indicator_cache import cached_indicators
+from indicators import bollinger_bands
+
 
 class Low_BB_ETH(IStrategy):
     """
@@ -24,6 +31,12 @@ class Low_BB_ETH(IStrategy):
     buy_trigger = CategoricalParameter(['bb_lower1',
                                         'bb_lower2',
                                         'bb_lower3'], default="bb_lower2", space="buy")
+    # trigger -> the band the close crosses below, times bb_factor
+    buy_trigger_bands = {
+        'bb_lower1': 'bb_lowerband1',
+        'bb_lower2': 'bb_lowerband2',
+        'bb_lower3': 'bb_lowerband3',
+    }
 
     # Minimal ROI designed for the strategy.
     # This attribute will be overridden if the config file contains "minimal_roi"
@@ -56,15 +69,18 @@ class Low_BB_ETH(IStrategy):
     }
 
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        # Every epoch uses the same bands, only bb_factor / buy_trigger change
+        return cached_indicators(self, dataframe, metadata, self.compute_indicators)
+
+    @staticmethod
+    def compute_indicators(dataframe: DataFrame) -> DataFrame:
         ##################################################################################
         # buy and sell indicators
 
-        bollinger1 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=1)
-        dataframe['bb_lowerband1'] = bollinger1['lower']
-        bollinger2 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=2)
-        dataframe['bb_lowerband2'] = bollinger2['lower']
-        bollinger3 = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=3)
-        dataframe['bb_lowerband3'] = bollinger3['lower']
+        bollinger = bollinger_bands(dataframe, window=20, stds=(1, 2, 3))
+        dataframe['bb_lowerband1'] = bollinger[1]['lower']
+        dataframe['bb_lowerband2'] = bollinger[2]['lower']
+        dataframe['bb_lowerband3'] = bollinger[3]['lower']
 
         #dataframe['ema50'] = ta.EMA(dataframe, timeperiod=20)
 
@@ -85,13 +101,8 @@ class Low_BB_ETH(IStrategy):
             )
             ,
             'buy'] = 1"""
-        conditions = []
-        if self.buy_trigger.value == 'bb_lower1':
-            conditions = [qtpylib.crossed_below(dataframe['close'], self.bb_factor.value * dataframe['bb_lowerband1'])]
-        if self.buy_trigger.value == 'bb_lower2':
-            conditions = [qtpylib.crossed_below(dataframe['close'], self.bb_factor.value * dataframe['bb_lowerband2'])]
-        if self.buy_trigger.value == 'bb_lower3':
-            conditions = [qtpylib.crossed_below(dataframe['close'], self.bb_factor.value * dataframe['bb_lowerband3'])]
+        band = self.buy_trigger_bands[self.buy_trigger.value]
+        conditions = [qtpylib.crossed_below(dataframe['close'], self.bb_factor.value * dataframe[band])]
         dataframe.loc[
             reduce(lambda x, y: x & y, conditions),
             'buy'] = 1
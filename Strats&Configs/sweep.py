@@ -0,0 +1,191 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Threshold sweeps over one parameter in a single pass.
+
+buy_rsi / sell_rsi / bb_factor only move a threshold, so for every candle the set of
+threshold values that make the condition true is one contiguous range of the (sorted)
+threshold grid. Those ranges are computed once per pair with binary searches, the signal
+count of every threshold follows from a cumulative sum and the signal candles of any
+threshold are read off without re-evaluating the condition: the candles are sorted once
+by where their range starts and by where it ends, a threshold's candles are then within
+the shorter of two prefixes of those orders, found by binary search (or, when that is a
+large part of all candles, one pass over them).
+
+    rsi_sweep = sweep_greater(dataframe['rsi'].values, range(5, 51), where=trigger_mask)
+    for buy_rsi, entries in rsi_sweep:
+        ...
+
+The comparisons are the ones the strategies make (including rounding of
+bb_factor * band), the index sets are identical to evaluating each threshold.
+
+It is a tool for looking at a whole threshold range at once (signal counts per buy_rsi
+to choose an IntParameter range, the entries of every bb_factor on a grid) and is not
+called by parallel_hyperopt.py / walkforward.py: an epoch there asks for one threshold
+among several other parameters, and building a SweepResult (a binary search per candle,
+the sorts) costs more than the one comparison it would replace.
+"""
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+# indices() scans every candle when more than 1 / DENSE of them are candidates
+DENSE = 16
+
+
+class SweepResult:
+    """
+    Candle t signals for thresholds[lo[t]:hi[t]]
+    """
+
+    def __init__(self, thresholds: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+        empty = lo >= hi
+        self.thresholds = thresholds
+        self.lo = np.where(empty, 0, lo)
+        self.hi = np.where(empty, 0, hi)
+        size = len(thresholds) + 1
+        self.counts = np.cumsum(np.bincount(self.lo, minlength=size)
+                                - np.bincount(self.hi, minlength=size))[:-1]
+        # every range a prefix of the grid (sweep_greater), the lo side needs no check
+        self._prefixes = not self.lo.any()
+        # candles by lo and by hi, sorted on the first indices() call
+        self._orders: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.thresholds)
+
+    def mask(self, i: int) -> np.ndarray:
+        if self._prefixes:
+            return i < self.hi
+        return (self.lo <= i) & (i < self.hi)
+
+    def indices(self, i: int) -> np.ndarray:
+        """
+        Signal candles for thresholds[i], ascending
+        """
+        if self._orders is None:
+            by_lo = np.argsort(self.lo, kind='stable')
+            by_hi = np.argsort(self.hi, kind='stable')
+            self._orders = by_lo, self.lo[by_lo], by_hi, self.hi[by_hi]
+        by_lo, sorted_lo, by_hi, sorted_hi = self._orders
+        # lo <= i: a prefix of by_lo, hi > i: a suffix of by_hi. The signal candles are
+        # in both, filter the shorter one (empty ranges are (0, 0), never in the second)
+        starts = int(np.searchsorted(sorted_lo, i, side='right'))
+        ends = int(np.searchsorted(sorted_hi, i, side='right'))
+        if min(starts, len(by_hi) - ends) * DENSE > len(by_hi):
+            # sorting that many candles back costs more than one pass over all of them
+            return np.flatnonzero(self.mask(i))
+        if starts <= len(by_hi) - ends:
+            candles = by_lo[:starts]
+            candles = candles[self.hi[candles] > i]
+        else:
+            candles = by_hi[ends:]
+            candles = candles[self.lo[candles] <= i]
+        return np.sort(candles)
+
+    def __iter__(self) -> Iterator[Tuple[float, np.ndarray]]:
+        for i, threshold in enumerate(self.thresholds):
+            yield threshold, self.indices(i)
+
+
+def _grid(thresholds: Iterable[float]) -> np.ndarray:
+    return np.sort(np.asarray(list(thresholds), dtype=np.float64))
+
+
+def _apply_where(lo: np.ndarray, hi: np.ndarray, where: Optional[np.ndarray]):
+    if where is not None:
+        where = np.asarray(where, dtype=bool)
+        lo = np.where(where, lo, 0)
+        hi = np.where(where, hi, 0)
+    return lo, hi
+
+
+def sweep_greater(values: np.ndarray, thresholds: Iterable[float],
+                  where: Optional[np.ndarray] = None) -> SweepResult:
+    """
+    values > threshold for every threshold
+    :param where: other conditions that have to hold as well
+    """
+    grid = _grid(thresholds)
+    values = np.asarray(values, dtype=np.float64)
+    # thresholds below the value
+    hi = np.searchsorted(grid, values, side='left')
+    hi[np.isnan(values)] = 0
+    lo, hi = _apply_where(np.zeros_like(hi), hi, where)
+    return SweepResult(grid, lo, hi)
+
+
+def sweep_less(values: np.ndarray, thresholds: Iterable[float],
+               where: Optional[np.ndarray] = None) -> SweepResult:
+    """
+    values < threshold for every threshold
+    :param where: other conditions that have to hold as well
+    """
+    grid = _grid(thresholds)
+    values = np.asarray(values, dtype=np.float64)
+    lo = np.searchsorted(grid, values, side='right')
+    hi = np.full_like(lo, len(grid))
+    hi[np.isnan(values)] = 0
+    lo, hi = _apply_where(lo, hi, where)
+    return SweepResult(grid, lo, hi)
+
+
+def _first_true(predicate, size: int, count: int) -> np.ndarray:
+    """
+    Per candle the first grid index where a predicate, monotone in the grid index, holds
+    (count when it never does). Vectorized bisection over all candles at once.
+    """
+    lo = np.zeros(size, dtype=np.int64)
+    hi = np.full(size, count, dtype=np.int64)
+    active = lo < hi
+    while active.any():
+        mid = np.minimum((lo + hi) // 2, count - 1)
+        holds = predicate(mid)
+        hi = np.where(active & holds, mid, hi)
+        lo = np.where(active & ~holds, mid + 1, lo)
+        active = lo < hi
+    return lo
+
+
+def _less_than_scaled(series1: np.ndarray, series2: np.ndarray,
+                      grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Grid range where series1 < factor * series2, that's a suffix of the grid for a
+    positive series2 and a prefix for a negative one.
+    :return: lo, hi, valid (False where either side is NaN)
+    """
+    count = len(grid)
+    valid = ~(np.isnan(series1) | np.isnan(series2))
+    with np.errstate(invalid='ignore'):
+        first = _first_true(lambda g: series1 < grid[g] * series2, len(series1), count)
+        last = _first_true(lambda g: ~(series1 < grid[g] * series2), len(series1), count)
+        zero = series1 < 0
+    lo = np.where(series2 > 0, first, 0)
+    hi = np.where(series2 > 0, count, np.where(series2 < 0, last, np.where(zero, count, 0)))
+    return np.where(valid, lo, 0), np.where(valid, hi, 0), valid
+
+
+def sweep_crossed_below(series1: np.ndarray, series2: np.ndarray, factors: Iterable[float],
+                        where: Optional[np.ndarray] = None) -> SweepResult:
+    """
+    crossed_below(series1, factor * series2) for every factor, e.g. Low_BB's
+    crossed_below(close, bb_factor * bb_lowerband)
+    :param where: other conditions that have to hold as well
+    """
+    grid = _grid(factors)
+    count = len(grid)
+    series1 = np.asarray(series1, dtype=np.float64)
+    series2 = np.asarray(series2, dtype=np.float64)
+    now_lo, now_hi, valid = _less_than_scaled(series1, series2, grid)
+
+    # previous candle: series1 >= factor * series2, the complement of the range above
+    # (a prefix becomes a suffix and the other way around, NaN stays empty), one back
+    starts_at_zero = now_lo == 0
+    prev_lo = np.where(valid & starts_at_zero, now_hi, 0)
+    prev_hi = np.where(valid, np.where(starts_at_zero, count, now_lo), 0)
+    prev_lo = np.concatenate(([0], prev_lo[:-1]))
+    prev_hi = np.concatenate(([0], prev_hi[:-1]))
+
+    lo = np.maximum(now_lo, prev_lo)
+    hi = np.minimum(now_hi, prev_hi)
+    lo, hi = _apply_where(lo, hi, where)
+    return SweepResult(grid, lo, hi)
@@ -0,0 +1,36 @@
+"""
+The modules under test live in the strategy directory, next to the strategies.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pandas import DataFrame, date_range
+
+STRATEGY_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(STRATEGY_DIR))
+
+
+def synthetic_ohlcv(candles: int, seed: int = 0, freq: str = '5min') -> DataFrame:
+    """
+    Random walk candles, the same for a seed
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, candles)))
+    spread = np.abs(rng.normal(0, 0.005, candles)) * close
+    return DataFrame({
+        'date': date_range('2021-01-01', periods=candles, freq=freq, tz='UTC'),
+        'open': np.roll(close, 1),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(1, 1000, candles),
+    })
+
+
+@pytest.fixture
+def candles() -> DataFrame:
+    return synthetic_ohlcv(500)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from batch import CandleBatch, evaluate
+from bbrsi import BBRSI
+from conftest import synthetic_ohlcv
+from low_bb import Low_BB
+from MACD import MACDStrategy
+from MACDcross import MACDStrategyCrossed
+from MACDRSI import MACDRSI
+
+STRATEGIES = [BBRSI, MACDStrategy, MACDStrategyCrossed, MACDRSI, Low_BB]
+
+
+@pytest.fixture(scope='module')
+def dataframes():
+    # histories of different lengths, the shorter ones padded in the batch
+    return {'ETH/BTC': synthetic_ohlcv(3000, seed=1), 'LTC/BTC': synthetic_ohlcv(2500, seed=2),
+            'XRP/BTC': synthetic_ohlcv(40, seed=3), 'ADA/BTC': synthetic_ohlcv(3000, seed=4)}
+
+
+def per_pair(strategy, dataframe, pair):
+    metadata = {'pair': pair}
+    dataframe = strategy.populate_indicators(dataframe.copy(), metadata)
+    dataframe = strategy.populate_buy_trend(dataframe, metadata)
+    dataframe = strategy.populate_sell_trend(dataframe, metadata)
+    return {column: (dataframe[column].fillna(0).values == 1) if column in dataframe
+            else np.zeros(len(dataframe), dtype=bool) for column in ('buy', 'sell')}
+
+
+@pytest.mark.parametrize('strategy_class', STRATEGIES, ids=lambda cls: cls.__name__)
+def test_batch_signals_equal_per_pair(strategy_class, dataframes):
+    strategy = strategy_class({})
+    batched = evaluate(strategy, dataframes)
+    assert list(batched) == list(dataframes)
+    buys = 0
+    for pair, dataframe in dataframes.items():
+        expected = per_pair(strategy, dataframe, pair)
+        assert batched[pair].index.equals(dataframe.index)
+        for column in ('buy', 'sell'):
+            np.testing.assert_array_equal(batched[pair][column].values == 1, expected[column],
+                                          err_msg=f'{pair} {column}')
+        buys += int(expected['buy'].sum())
+    # not equal by both being empty
+    assert buys > 0
+
+
+def test_split_removes_padding():
+    dataframes = {'ETH/BTC': synthetic_ohlcv(50), 'LTC/BTC': synthetic_ohlcv(30, seed=1)}
+    batch = CandleBatch.from_dataframes(dataframes)
+    assert batch['close'].shape == (2, 50)
+    assert np.isnan(batch['close'][1, :20]).all()
+    for pair, frame in batch.split(('close',)).items():
+        np.testing.assert_array_equal(frame['close'].values, dataframes[pair]['close'].values)
@@ -0,0 +1,79 @@
+import gzip
+import json
+
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+
+from candle_store import CandleStore, import_json
+from conftest import synthetic_ohlcv
+
+
+def synthetic(*args, **kwargs):
+    # the store loads ns dates, like freqtrade's own loaders
+    return synthetic_ohlcv(*args, **kwargs).astype({'date': 'datetime64[ns, UTC]'})
+
+
+def freqtrade_rows(dataframe) -> list:
+    # freqtrade's JSON layout, [[ms, open, high, low, close, volume], ...]
+    dates = dataframe['date'].values.astype('datetime64[ms]').astype(np.int64)
+    return [[int(date)] + values for date, values in
+            zip(dates, dataframe[['open', 'high', 'low', 'close', 'volume']].values.tolist())]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(tmp_path / 'store')
+
+
+def test_write_load_round_trip(store):
+    candles = synthetic(500)
+    store.write('ETH/BTC', '5m', candles)
+    assert store.pairs('5m') == ['ETH/BTC']
+    assert_frame_equal(store.load('ETH/BTC', '5m'), candles)
+
+
+def test_load_range(store):
+    candles = synthetic(500)
+    store.write('ETH/BTC', '5m', candles)
+    start, end = candles['date'][100], candles['date'][200]
+    assert_frame_equal(store.load('ETH/BTC', '5m', start=start, end=end),
+                       candles.iloc[100:200].reset_index(drop=True))
+    # naive strings are UTC, ms since epoch as freqtrade stores them
+    assert_frame_equal(store.load('ETH/BTC', '5m', start=str(start.tz_localize(None)),
+                                  end=int(end.value // 1_000_000)),
+                       candles.iloc[100:200].reset_index(drop=True))
+    assert len(store.load('ETH/BTC', '5m', start='2030-01-01')) == 0
+
+
+def test_append_merges_newer_wins(store):
+    candles = synthetic(500)
+    store.write('ETH/BTC', '5m', candles.iloc[:300])
+    before = store.load('ETH/BTC', '5m')
+    # overlapping download: candles 250..499, 250 revised
+    update = candles.iloc[250:].copy()
+    update.loc[250, 'close'] = 1.0
+    store.write('ETH/BTC', '5m', update)
+    expected = candles.copy()
+    expected.loc[250, 'close'] = 1.0
+    assert_frame_equal(store.load('ETH/BTC', '5m'), expected)
+    # a frame loaded before the write keeps its values
+    assert_frame_equal(before, candles.iloc[:300])
+
+
+def test_import_json(tmp_path, store):
+    source = tmp_path / 'binance'
+    source.mkdir()
+    eth, ltc = synthetic(300), synthetic(200, seed=1, freq='1h')
+    (source / 'ETH_BTC-5m.json').write_text(json.dumps(freqtrade_rows(eth)))
+    with gzip.open(source / 'LTC_BTC-1h.json.gz', 'wt') as handle:
+        json.dump(freqtrade_rows(ltc), handle)
+    # trades files share the pattern but are not candles
+    (source / 'ETH_BTC-trades.json').write_text(json.dumps(
+        [[1609459200000, '1', None, 'buy', 'limit', 0.03, 1.0, 0.03]]))
+    (source / 'ETH_BTC-trades.json.gz').write_bytes(gzip.compress(b'[]'))
+
+    assert import_json(source, store) == ['ETH_BTC-5m.json', 'LTC_BTC-1h.json.gz']
+    assert_frame_equal(store.load('ETH/BTC', '5m'), eth)
+    assert_frame_equal(store.load('LTC/BTC', '1h'), ltc)
+    assert store.pairs('5m') == ['ETH/BTC'] and store.pairs('1h') == ['LTC/BTC']
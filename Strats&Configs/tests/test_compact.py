@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import numpy as np
+from pandas.testing import assert_series_equal
+
+import macd_cci
+from compact import compact, compact_signals, pack_signals, unpack_signals
+from conftest import synthetic_ohlcv
+from freqtrade.state import RunMode
+from MACD import MACDStrategy
+
+
+def analyzed(config, runmode):
+    macd_cci.clear()
+    strategy = MACDStrategy(config)
+    strategy.dp = SimpleNamespace(runmode=runmode)
+    dataframe = synthetic_ohlcv(2000)
+    metadata = {'pair': 'ETH/BTC'}
+    dataframe = strategy.populate_indicators(dataframe, metadata)
+    dataframe = strategy.populate_buy_trend(dataframe, metadata)
+    result = strategy.populate_sell_trend(dataframe, metadata)
+    macd_cci.clear()
+    return result
+
+
+def test_flags_and_close_unchanged():
+    dataframe = synthetic_ohlcv(100)
+    dataframe['rsi'] = np.linspace(0, 100, 100)
+    dataframe.loc[dataframe['close'] > dataframe['open'], 'buy'] = 1
+    dataframe.loc[dataframe['close'] < dataframe['open'], 'sell'] = 1
+    compacted = compact(dataframe)
+    for column in ('buy', 'sell', 'close'):
+        assert_series_equal(compacted[column], dataframe[column])
+    assert compacted['buy'].isna().any()
+    for column in ('open', 'high', 'low', 'volume', 'rsi'):
+        assert compacted[column].dtype == np.float32
+    assert compacted.memory_usage().sum() < dataframe.memory_usage().sum()
+
+
+def test_compact_only_live_when_enabled():
+    compacted = analyzed({'compact_dataframes': True}, RunMode.DRY_RUN)
+    assert compacted['cci'].dtype == np.float32
+    for config, runmode in (({'compact_dataframes': True}, RunMode.BACKTEST),
+                            ({}, RunMode.LIVE)):
+        assert analyzed(config, runmode)['cci'].dtype == np.float64
+    full = analyzed({}, RunMode.DRY_RUN)
+    assert full['buy'].eq(1).any() or full['sell'].eq(1).any()
+    for column in ('buy', 'sell'):
+        if column in full:
+            assert_series_equal(compacted[column], full[column])
+
+
+def test_compact_signals_without_dataprovider():
+    strategy = SimpleNamespace(config={'compact_dataframes': True}, dp=None)
+    dataframe = synthetic_ohlcv(10)
+    assert compact_signals(strategy, dataframe) is dataframe
+
+
+def test_pack_roundtrip():
+    dataframe = synthetic_ohlcv(50)
+    dataframe.loc[::3, 'buy'] = 1
+    dataframe.loc[::5, 'sell'] = 1
+    flags = unpack_signals(pack_signals(dataframe))
+    assert set(flags) == {'buy', 'sell'}
+    np.testing.assert_array_equal(flags['buy'], dataframe['buy'].values == 1)
+    np.testing.assert_array_equal(flags['sell'], dataframe['sell'].values == 1)
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+import config_compiler
+from conftest import STRATEGY_DIR
+from config_compiler import compile_config, load_config, merge, problems, resolve
+
+BASE = {
+    'exchange': {'name': 'binance', 'key': '${BINANCE_KEY}', 'secret': '${BINANCE_SECRET}',
+                 'pair_whitelist': ['ETH/BTC', 'LTC/BTC'], 'pair_blacklist': []},
+    'max_open_trades': 3,
+    'stake_currency': 'BTC',
+    'stake_amount': 0.01,
+    'dry_run': True,
+    'timeframe': '5m',
+    'bid_strategy': {'price_side': 'bid', 'ask_last_balance': 0.0, 'use_order_book': True,
+                     'order_book_top': 1},
+    'ask_strategy': {'price_side': 'ask', 'use_order_book': False},
+    'unfilledtimeout': {'buy': 10, 'sell': 30},
+    'internals': {'process_throttle_secs': 5},
+}
+
+
+def write(path, config):
+    path.write_text(json.dumps(config))
+    return path
+
+
+def test_merge():
+    base = {'a': 1, 'exchange': {'name': 'binance', 'pair_whitelist': ['ETH/BTC']}}
+    overlay = {'exchange': {'pair_whitelist': ['LTC/BTC']}, 'b': 2}
+    assert merge(base, overlay) == {'a': 1, 'b': 2, 'exchange': {
+        'name': 'binance', 'pair_whitelist': ['LTC/BTC']}}
+    assert base['exchange']['pair_whitelist'] == ['ETH/BTC']
+
+
+def test_extends_in_order(tmp_path):
+    write(tmp_path / 'base.json', BASE)
+    (tmp_path / 'bots').mkdir()
+    write(tmp_path / 'bots' / 'usdt.json',
+          {'stake_currency': 'USDT', 'exchange': {'pair_whitelist': ['ETH/USDT']}})
+    path = write(tmp_path / 'bots' / 'bot.json', {
+        'extends': ['../base.json', 'usdt.json'], 'max_open_trades': 5})
+    config, sources = resolve(path)
+    assert config['stake_currency'] == 'USDT'
+    assert config['max_open_trades'] == 5
+    assert config['exchange']['name'] == 'binance'
+    assert config['exchange']['pair_whitelist'] == ['ETH/USDT']
+    assert 'extends' not in config
+    assert [source.rsplit('/', 1)[1] for source, _ in sources] == [
+        'bot.json', 'base.json', 'usdt.json']
+    assert compile_config(path)[0] == config
+
+
+def test_extends_cycle(tmp_path):
+    write(tmp_path / 'a.json', {'extends': 'b.json'})
+    write(tmp_path / 'b.json', {'extends': 'a.json'})
+    with pytest.raises(ValueError, match='extends itself'):
+        resolve(tmp_path / 'a.json')
+
+
+def test_problems_all_at_once():
+    assert problems(BASE) == []
+    config = merge(BASE, {
+        'exchange': {'key': 'abc', 'pair_whitelist': ['ETH/BTC', 'ETH/USDT', 'LTC/BTC'],
+                     'pair_blacklist': ['LTC/BTC']},
+        'ticker_interval': '1h',
+        'profiling': {'enabled': 'yes'},
+    })
+    del config['dry_run']
+    found = problems(config)
+    assert len(found) == 6
+    text = '\n'.join(found)
+    for expected in ("'dry_run' is a required property", 'profiling.enabled',
+                     'exchange.key: not a placeholder', 'ETH/USDT is not quoted in BTC',
+                     'LTC/BTC is blacklisted as well', 'timeframe and ticker_interval disagree'):
+        assert expected in text
+
+
+def test_invalid_config_raises(tmp_path):
+    path = write(tmp_path / 'bot.json', merge(BASE, {'max_open_trades': 'many'}))
+    with pytest.raises(ValueError, match='max_open_trades'):
+        load_config(path, tmp_path / 'cache')
+
+
+def test_snapshot(tmp_path, monkeypatch):
+    base = write(tmp_path / 'base.json', BASE)
+    path = write(tmp_path / 'bot.json', {'extends': 'base.json', 'max_open_trades': 4})
+    cache = tmp_path / 'cache'
+    config = load_config(path, cache)
+    snapshots = list(cache.glob('*.json'))
+    assert len(snapshots) == 1
+    assert json.loads(snapshots[0].read_text())['config'] == config
+
+    compiled = []
+    compile_config = config_compiler.compile_config
+    monkeypatch.setattr(config_compiler, 'compile_config',
+                        lambda path: compiled.append(path) or compile_config(path))
+    assert load_config(path, cache) == config
+    assert compiled == []
+    # a changed base is compiled again
+    write(base, merge(BASE, {'stake_amount': 0.02}))
+    assert load_config(path, cache)['stake_amount'] == 0.02
+    assert len(compiled) == 1
+    # as is everything after a change of the compiler
+    monkeypatch.setattr(config_compiler, '_version', lambda: (0, '', ''))
+    config = load_config(path, cache)
+    assert len(compiled) == 2
+    # and a snapshot that is not one
+    for snapshot in cache.glob('*.json'):
+        snapshot.write_text('{"version": [0, "", ""]}')
+    assert load_config(path, cache) == config
+    assert len(compiled) == 3
+
+
+def test_repo_configs_compile():
+    paths = sorted(STRATEGY_DIR.glob('config*.json')) + sorted(STRATEGY_DIR.glob('config/*.json'))
+    assert paths
+    for path in paths:
+        config, sources = compile_config(path)
+        assert 'extends' not in config
+    # the bot configs in config/ share their base
+    for path in sorted(STRATEGY_DIR.glob('config/*.json')):
+        assert 'binance_btc.json' in '\n'.join(source for source, _ in resolve(path)[1])
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from config_secrets import SecretResolver, inline_secrets, placeholder
+from conftest import STRATEGY_DIR
+
+CONFIG = {
+    'exchange': {'name': 'binance', 'key': '${BINANCE_KEY}', 'secret': '${BINANCE_SECRET}',
+                 'pair_whitelist': ['ETH/BTC']},
+    'telegram': {'enabled': True, 'token': '${TELEGRAM_TOKEN}', 'chat_id': '${CHAT_ID}'},
+    'stake_amount': 0.01,
+}
+
+
+def test_placeholder():
+    assert placeholder('${BINANCE_KEY}') == 'BINANCE_KEY'
+    for value in ('BINANCE_KEY', '$BINANCE_KEY', '${BINANCE KEY}', 'x${A}', '', None, 5):
+        assert placeholder(value) is None
+
+
+def test_inline_secrets():
+    assert inline_secrets(CONFIG) == []
+    config = json.loads(json.dumps(CONFIG))
+    config['exchange']['key'] = 'abc'
+    config['telegram']['chat_id'] = ''
+    config['api_server'] = {'password': None}
+    assert inline_secrets(config) == ['exchange.key', 'telegram.chat_id', 'api_server.password']
+
+
+def test_repo_configs_have_placeholders_only():
+    paths = sorted(STRATEGY_DIR.glob('config*.json')) + sorted(STRATEGY_DIR.glob('config/*.json'))
+    paths += sorted(STRATEGY_DIR.glob('config/base/*.json'))
+    paths += sorted(STRATEGY_DIR.glob('strats and configs 2021-06-24/*.json'))
+    assert paths
+    for path in paths:
+        assert inline_secrets(json.loads(path.read_text())) == [], path
+
+
+def test_resolution_order(tmp_path):
+    secrets = tmp_path / 'secrets.json'
+    secrets.write_text(json.dumps({'BINANCE_KEY': 'file-key', 'BINANCE_SECRET': 'file-secret',
+                                   'TELEGRAM_TOKEN': 123, 'CHAT_ID': '42'}))
+    os.chmod(secrets, 0o600)
+    resolver = SecretResolver(secrets, environ={'BINANCE_KEY': 'env-key'})
+    resolved = resolver.apply(CONFIG)
+    assert resolved['exchange']['key'] == 'env-key'
+    assert resolved['exchange']['secret'] == 'file-secret'
+    assert resolved['telegram']['token'] == '123'
+    assert resolved['exchange']['pair_whitelist'] == ['ETH/BTC']
+    # the config itself keeps its placeholders
+    assert CONFIG['exchange']['key'] == '${BINANCE_KEY}'
+
+
+def test_secrets_file_from_environment(tmp_path):
+    secrets = tmp_path / 'other.json'
+    secrets.write_text(json.dumps({'BINANCE_KEY': 'k'}))
+    resolver = SecretResolver(environ={'FT_SECRETS_FILE': str(secrets)})
+    assert resolver.path == secrets
+    assert resolver.get('BINANCE_KEY') == 'k'
+
+
+def test_missing_secrets_named(tmp_path):
+    resolver = SecretResolver(tmp_path / 'none.json', environ={'BINANCE_KEY': 'k'})
+    with pytest.raises(ValueError) as error:
+        resolver.apply(CONFIG)
+    message = str(error.value)
+    for name in ('BINANCE_SECRET', 'TELEGRAM_TOKEN', 'CHAT_ID'):
+        assert name in message
+    assert 'BINANCE_KEY' not in message
+
+
+def test_secrets_file_must_be_an_object(tmp_path):
+    secrets = tmp_path / 'secrets.json'
+    secrets.write_text('["BINANCE_KEY"]')
+    with pytest.raises(ValueError, match='JSON object'):
+        SecretResolver(secrets, environ={}).get('BINANCE_KEY')
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import freqtrade.vendor.qtpylib.indicators as qtpylib
+
+from conftest import synthetic_ohlcv
+from crossover import ABOVE, BELOW, CrossoverEvents, CrossoverStream, crossed_above, crossed_below
+
+
+@pytest.fixture
+def frame():
+    dataframe = synthetic_ohlcv(2000)
+    dataframe['mean'] = dataframe['close'].rolling(20, min_periods=1).mean()
+    return dataframe
+
+
+@pytest.mark.parametrize('factor', [1.0, 0.98])
+def test_equals_qtpylib(frame, factor):
+    close, mean = frame['close'], frame['mean']
+    for ours, theirs in ((crossed_above, qtpylib.crossed_above),
+                         (crossed_below, qtpylib.crossed_below)):
+        expected = theirs(close, factor * mean).values
+        assert expected.any()
+        np.testing.assert_array_equal(ours(close, mean, factor=factor), expected)
+        np.testing.assert_array_equal(ours(close.values, mean.values, factor=factor), expected)
+
+
+def test_scalar_and_pairs(frame):
+    level = float(frame['close'].median())
+    np.testing.assert_array_equal(crossed_above(frame['close'].values, level),
+                                  qtpylib.crossed_above(frame['close'], level).values)
+    closes = np.vstack([synthetic_ohlcv(500, seed)['close'].values for seed in range(3)])
+    means = np.vstack([np.convolve(row, np.ones(5) / 5, 'same') for row in closes])
+    out = np.empty(closes.shape, dtype=bool)
+    assert crossed_below(closes, means, out=out) is out
+    for row in range(3):
+        np.testing.assert_array_equal(out[row], crossed_below(closes[row], means[row]))
+
+
+def test_series_and_pairs_equal_qtpylib(frame):
+    close, mean = frame['close'], frame['close'].rolling(20).mean()
+    for ours, theirs in ((crossed_above, qtpylib.crossed_above),
+                         (crossed_below, qtpylib.crossed_below)):
+        expected = theirs(close, mean).values
+        np.testing.assert_array_equal(ours(close, mean), expected)
+        batched = ours(np.vstack([close.values] * 2), np.vstack([mean.values] * 2))
+        np.testing.assert_array_equal(batched[1], expected)
+        np.testing.assert_array_equal(ours(close, 100.), theirs(close, 100.).values)
+
+
+def test_stream(frame):
+    stream = CrossoverStream(0.98)
+    events = [stream.update(a, b) for a, b in frame[['close', 'mean']].values.tolist()]
+    np.testing.assert_array_equal(np.array(events) == ABOVE,
+                                  crossed_above(frame['close'], frame['mean'], 0.98))
+    np.testing.assert_array_equal(np.array(events) == BELOW,
+                                  crossed_below(frame['close'], frame['mean'], 0.98))
+
+
+def test_events_on_sliding_frame(frame):
+    crossings = CrossoverEvents()
+    for end in list(range(1000, 1100)) + [1500]:
+        window = frame.iloc[end - 1000:end].reset_index(drop=True)
+        events = crossings.events(window, 'ETH/BTC', 'close', 'mean', factor=0.98)
+        close, mean = window['close'], window['mean']
+        expected = np.where(crossed_above(close, mean, 0.98), ABOVE,
+                            np.where(crossed_below(close, mean, 0.98), BELOW, 0))
+        # the first candle of a window has no previous one in it, only the history has
+        np.testing.assert_array_equal(events[1:], expected[1:], err_msg=str(end))
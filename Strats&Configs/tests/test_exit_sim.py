@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from exit_sim import (EXIT_FORCE, EXIT_ROI, EXIT_SELL_SIGNAL, EXIT_STOPLOSS, roi_by_offset,
+                      simulate_exits)
+
+# open, high, low, close of 1h candles
+CANDLES = np.array([
+    [100.0, 101.0, 99.0, 100.0],
+    [100.0, 101.0, 99.0, 100.0],    # trade 1 opens at 100
+    [100.0, 102.0, 99.5, 101.0],    # 1h old: 10% (110) not reached
+    [101.0, 106.0, 100.0, 105.0],   # 2h old: 5% (105) reached, sold at 105
+    [104.0, 105.0, 103.0, 104.0],   # trade 2 opens at 104, stop at 98.8
+    [97.0, 99.0, 96.0, 98.0],       # opens below the stop, still sold at the stop 98.8
+    [98.0, 99.0, 97.5, 98.5],       # trade 3 opens at 98
+    [98.5, 99.0, 98.0, 98.7],       # still open at the last candle, closed at its open
+])
+MINIMAL_ROI = {'0': 0.10, '120': 0.05, '240': 0}
+
+
+@pytest.mark.parametrize('chunk', [1, 32])
+def test_hand_computed_trades(chunk):
+    open_, high, low, close = CANDLES.T
+    result = simulate_exits(np.array([1, 4, 6]), open_, high, low, close, MINIMAL_ROI,
+                            stoploss=-0.05, timeframe_minutes=60, chunk=chunk)
+    np.testing.assert_array_equal(result.exits, [3, 5, 7])
+    np.testing.assert_array_equal(result.reason, [EXIT_ROI, EXIT_STOPLOSS, EXIT_FORCE])
+    np.testing.assert_array_equal(result.open_rate, [100.0, 104.0, 98.0])
+    np.testing.assert_allclose(result.close_rate, [105.0, 98.8, 98.5])
+    np.testing.assert_allclose(result.profit_ratio(), [0.05, 98.8 / 104 - 1, 98.5 / 98 - 1])
+    np.testing.assert_allclose(result.profit_ratio(fee=0.001)[0],
+                               105 * 0.999 / (100 * 1.001) - 1)
+
+
+def test_roi_with_fees():
+    open_, high, low, close = CANDLES.T
+    result = simulate_exits(np.array([1]), open_, high, low, close, MINIMAL_ROI,
+                            stoploss=-0.05, timeframe_minutes=60, fee=0.001)
+    # 5% after both fees: 100 * 1.051 / 0.999, still inside candle 3
+    assert result.exits[0] == 3
+    assert result.close_rate[0] == pytest.approx(100 * 1.051 / 0.999)
+    # a 5.5% high is 4.9% after 0.3% fees per side, below the 5% step
+    high = high.copy()
+    high[3] = 105.5
+    result = simulate_exits(np.array([1]), open_, high, low, close, MINIMAL_ROI,
+                            stoploss=-0.05, timeframe_minutes=60, fee=0.003)
+    assert result.reason[0] == EXIT_FORCE
+
+
+def test_roi_close_rate_on_a_gap():
+    # opens above the target on the candle its ROI step starts: sold at the open
+    open_ = np.array([100.0, 100.0, 108.0])
+    high = np.array([100.0, 101.0, 112.0])
+    low = np.array([100.0, 99.0, 107.0])
+    result = simulate_exits(np.array([0]), open_, high, low, open_, {'0': 0.1, '120': 0.05},
+                            -0.5, 60)
+    assert result.reason[0] == EXIT_ROI and result.close_rate[0] == 108.0
+    # the same candle within a step: the target, raised to the low of the candle
+    result = simulate_exits(np.array([0]), open_, high, low, open_, {'0': 0.05}, -0.5, 60)
+    assert result.exits[0] == 2 and result.close_rate[0] == 107.0
+    # roi -1 sells at the open of the step's candle
+    result = simulate_exits(np.array([0]), open_, high, low, open_, {'0': 0.5, '60': -1},
+                            -0.5, 60)
+    assert result.exits[0] == 1 and result.close_rate[0] == 100.0
+
+
+def test_stop_above_the_candle():
+    # the stop is above the whole candle (freqtrade: a cancelled exit), sold at the open
+    open_ = np.array([100.0, 90.0])
+    high = np.array([100.0, 91.0])
+    low = np.array([100.0, 89.0])
+    result = simulate_exits(np.array([0]), open_, high, low, open_, {'0': 1.0}, -0.05, 60)
+    assert result.reason[0] == EXIT_STOPLOSS and result.close_rate[0] == 90.0
+
+
+def test_stoploss_before_roi():
+    # one candle reaching both the ROI target and the stop
+    open_ = np.array([100.0, 100.0])
+    high = np.array([100.0, 120.0])
+    low = np.array([100.0, 90.0])
+    result = simulate_exits(np.array([0]), open_, high, low, open_, {'0': 0.1}, -0.05, 60)
+    assert result.reason[0] == EXIT_STOPLOSS
+    assert result.close_rate[0] == pytest.approx(95.0)
+
+
+def test_sell_signal():
+    open_, high, low, close = CANDLES.T
+    sell = np.zeros(len(CANDLES), dtype=bool)
+    # trade 1: the sell of candle 2 is due on candle 3, where ROI comes first
+    sell[2] = True
+    # trade 2: the sell of candle 4 is acted on at candle 5, where the stop is hit as well
+    sell[4] = True
+    # trade 3: sold at the open of the last candle
+    sell[6] = True
+    result = simulate_exits(np.array([1, 4, 6]), open_, high, low, close, MINIMAL_ROI,
+                            stoploss=-0.05, timeframe_minutes=60, sell=sell)
+    np.testing.assert_array_equal(result.exits, [3, 5, 7])
+    np.testing.assert_array_equal(result.reason, [EXIT_ROI, EXIT_SELL_SIGNAL, EXIT_SELL_SIGNAL])
+    np.testing.assert_allclose(result.close_rate, [105.0, 97.0, 98.5])
+
+
+def test_one_trade_per_pair():
+    open_, high, low, close = CANDLES.T
+    result = simulate_exits(np.array([1, 2, 4]), open_, high, low, close, MINIMAL_ROI,
+                            stoploss=-0.05, timeframe_minutes=60)
+    # the entry on candle 2 comes while trade 1 is open
+    np.testing.assert_array_equal(result.non_overlapping().entries, [1, 4])
+
+
+def test_roi_by_offset():
+    np.testing.assert_array_equal(roi_by_offset(MINIMAL_ROI, 60, np.arange(6)),
+                                  [0.10, 0.10, 0.05, 0.05, 0.0, 0.0])
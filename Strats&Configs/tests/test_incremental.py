@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+import talib.abstract as ta
+
+import freqtrade.vendor.qtpylib.indicators as qtpylib
+
+from conftest import synthetic_ohlcv
+from incremental import (BollingerState, EMAState, IncrementalIndicators, IndicatorState,
+                         MACDState, RSIState)
+
+
+def full_frame(dataframe):
+    result = {'rsi': ta.RSI(dataframe).values, 'ema': ta.EMA(dataframe, timeperiod=30).values}
+    macd = ta.MACD(dataframe)
+    result.update({column: macd[column].values
+                   for column in ('macd', 'macdsignal', 'macdhist')})
+    bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=2)
+    result.update({'bb_lowerband2': bollinger['lower'].values,
+                   'bb_middleband2': bollinger['mid'].values,
+                   'bb_upperband2': bollinger['upper'].values})
+    return result
+
+
+def states():
+    return [RSIState(14), EMAState(30), MACDState(), BollingerState(20, (2,))]
+
+
+def test_indicator_state_is_abstract():
+    with pytest.raises(TypeError):
+        IndicatorState()
+
+
+def test_warm_equals_full_frame():
+    dataframe = synthetic_ohlcv(500)
+    result = IncrementalIndicators(states).populate(dataframe.copy(), 'ETH/BTC')
+    for column, expected in full_frame(dataframe).items():
+        np.testing.assert_array_equal(result[column].values, expected, err_msg=column)
+
+
+def test_sliding_frame_advances():
+    # freqtrade's live frame: the last 300 candles, one more every loop
+    candles = synthetic_ohlcv(400)
+    incremental = IncrementalIndicators(states)
+    for end in range(300, 320):
+        frame = candles.iloc[end - 300:end].reset_index(drop=True)
+        result = incremental.populate(frame.copy(), 'ETH/BTC')
+        # the values over every candle fed since the first frame
+        expected = full_frame(candles.iloc[:end])
+        for column in ('rsi', 'ema', 'macd', 'macdsignal', 'macdhist'):
+            np.testing.assert_array_equal(result[column].values, expected[column][-300:],
+                                          err_msg=f'{column} at {end}')
+        for column in ('bb_lowerband2', 'bb_middleband2', 'bb_upperband2'):
+            np.testing.assert_allclose(result[column].values, expected[column][-300:],
+                                       rtol=1e-12, err_msg=f'{column} at {end}')
+    assert (incremental.warmed, incremental.advanced) == (1, 19)
+
+
+def test_gap_warms_again():
+    candles = synthetic_ohlcv(400)
+    incremental = IncrementalIndicators(states)
+    incremental.populate(candles.iloc[:300].copy(), 'ETH/BTC')
+    # candle 300 missing
+    frame = candles.iloc[301:].reset_index(drop=True)
+    result = incremental.populate(frame.copy(), 'ETH/BTC')
+    assert (incremental.warmed, incremental.advanced) == (2, 0)
+    np.testing.assert_array_equal(result['rsi'].values, full_frame(frame)['rsi'])
+
+
+def test_exact_on_growing_frame():
+    # long enough for EMA steps where talib's fused multiply-add rounds differently
+    candles = synthetic_ohlcv(800)
+    incremental = IncrementalIndicators(lambda: [RSIState(14), EMAState(30), MACDState()])
+    for end in range(300, 800):
+        frame = candles.iloc[:end]
+        result = incremental.populate(frame.copy(), 'ETH/BTC')
+        expected = full_frame(frame)
+        for column in ('rsi', 'ema', 'macd', 'macdsignal', 'macdhist'):
+            np.testing.assert_array_equal(result[column].values, expected[column],
+                                          err_msg=f'{column} at {end}')
+    assert (incremental.warmed, incremental.advanced) == (1, 499)
+
+
+def test_sliding_frame_keeps_history():
+    candles = synthetic_ohlcv(400)
+    incremental = IncrementalIndicators(lambda: [RSIState(14)])
+    incremental.populate(candles.iloc[:300].copy(), 'ETH/BTC')
+    frame = candles.iloc[1:301].reset_index(drop=True)
+    result = incremental.populate(frame.copy(), 'ETH/BTC')
+    # the value of candle 300 over all 301 candles, not over the window
+    np.testing.assert_array_equal(result['rsi'].values[-1],
+                                  ta.RSI(candles.iloc[:301]).values[-1])
+    # a backtest over the window warms up from its first candle
+    assert result['rsi'].values[-1] != ta.RSI(frame).values[-1]
+    incremental.reset('ETH/BTC')
+    result = incremental.populate(frame.copy(), 'ETH/BTC')
+    np.testing.assert_array_equal(result['rsi'].values, ta.RSI(frame).values)
+
+
+def test_bollinger_updates_after_warm():
+    candles = synthetic_ohlcv(400)
+    state = BollingerState(20, (1, 3))
+    state.warm(candles['high'].values[:300], candles['low'].values[:300],
+               candles['close'].values[:300])
+    pushed = np.array([state.update(*candle) for candle in
+                       candles[['high', 'low', 'close']].values[300:].tolist()])
+    typical = qtpylib.typical_price(candles)
+    for i, n in enumerate((1, 3)):
+        bollinger = qtpylib.bollinger_bands(typical, window=20, stds=n)
+        for j, band in enumerate(('lower', 'mid', 'upper')):
+            np.testing.assert_allclose(pushed[:, 3 * i + j], bollinger[band].values[300:],
+                                       rtol=1e-12)
@@ -0,0 +1,38 @@
+import numpy as np
+
+import indicator_cache
+from conftest import synthetic_ohlcv
+from indicator_cache import IndicatorCache, _used_modules, code_hash
+from indicators import bollinger_bands
+from rsi import wilder_rsi
+
+
+def compute(dataframe):
+    dataframe['rsi'] = wilder_rsi(dataframe['close'].values)
+    dataframe['bb_lowerband1'] = bollinger_bands(dataframe, stds=(1,))[1]['lower']
+    return dataframe
+
+
+def test_code_hash_covers_the_modules_used():
+    found = {}
+    _used_modules(compute, found)
+    assert {'indicators', 'rsi'} <= set(found)
+
+
+def test_code_hash_changes_with_the_version(monkeypatch):
+    before = code_hash(compute)
+    code_hash.cache_clear()
+    monkeypatch.setattr(indicator_cache, 'CACHE_VERSION', indicator_cache.CACHE_VERSION + 1)
+    assert code_hash(compute) != before
+    code_hash.cache_clear()
+
+
+def test_store_and_load(tmp_path):
+    dataframe = synthetic_ohlcv(200)
+    cache = IndicatorCache(tmp_path)
+    key = cache.key('ETH/BTC', '5m', dataframe, code_hash(compute))
+    assert cache.load(key) is None
+    columns = {'rsi': wilder_rsi(dataframe['close'].values)}
+    cache.store(key, columns)
+    loaded = cache.load(key)
+    np.testing.assert_array_equal(loaded['rsi'], columns['rsi'])
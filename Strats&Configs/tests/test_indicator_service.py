@@ -0,0 +1,191 @@
+import logging
+import socket
+import threading
+import time
+from multiprocessing.connection import Listener
+
+import numpy as np
+import pytest
+from pandas import DataFrame, Timestamp, to_datetime
+
+import config_secrets
+import indicator_service
+from config_secrets import SecretResolver
+from conftest import synthetic_ohlcv
+from indicator_service import (OHLCV, FakeCandleFeed, IndicatorClient, IndicatorService,
+                               authkey, query_service, service_client)
+from indicators import bollinger_bands
+from rsi import wilder_rsi
+
+INDICATORS = [('rsi', {'timeperiod': 14})]
+KEY = 'not-the-real-key'
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(indicator_service, '_clients', {})
+    monkeypatch.setattr(indicator_service, '_retry_at', {})
+    monkeypatch.setattr(config_secrets, '_resolver',
+                        SecretResolver(environ={'INDICATOR_SERVICE_AUTHKEY': KEY}))
+
+
+@pytest.fixture
+def service():
+    service = IndicatorService()
+    threading.Thread(target=service.serve_forever, args=(KEY.encode(), ('127.0.0.1', 0)),
+                     daemon=True).start()
+    assert service.listening.wait(5)
+    yield service
+    service.close()
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def feed_frame(feed: FakeCandleFeed, pair: str, timeframe: str) -> DataFrame:
+    # the candles a bot fetching from the same exchange has
+    dates, values = feed.fetch(pair, timeframe)
+    frame = DataFrame({column: values[i] for i, column in enumerate(OHLCV)})
+    frame.insert(0, 'date', to_datetime(dates, utc=True))
+    return frame
+
+
+def wait_for(condition, timeout: float = 5.):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_authkey():
+    assert authkey() == KEY.encode()
+    assert authkey('${INDICATOR_SERVICE_AUTHKEY}') == KEY.encode()
+    # a config resolved by config_secrets.py holds the key itself
+    assert authkey('resolved') == b'resolved'
+    for value in ('${OTHER_KEY}', ''):
+        with pytest.raises(ValueError, match='authkey'):
+            authkey(value)
+
+
+def test_no_authkey_no_service(monkeypatch):
+    monkeypatch.setattr(config_secrets, '_resolver', SecretResolver(environ={}))
+    with pytest.raises(ValueError, match='INDICATOR_SERVICE_AUTHKEY'):
+        authkey()
+    with pytest.raises(ValueError):
+        IndicatorService().serve_forever(b'', ('127.0.0.1', 0))
+    with pytest.raises(ValueError):
+        service_client({'indicator_service': {'address': '127.0.0.1:6543'}})
+
+
+def test_no_service_configured():
+    assert service_client({}) is None
+    assert query_service({}, synthetic_ohlcv(50), 'ETH/BTC', '5m', INDICATORS) is None
+
+
+def test_unreachable_service_falls_back(caplog):
+    config = {'indicator_service': {'address': f'127.0.0.1:{free_port()}'}}
+    with caplog.at_level(logging.WARNING, logger='indicator_service'):
+        assert query_service(config, synthetic_ohlcv(50), 'ETH/BTC', '5m', INDICATORS) is None
+    assert 'computing locally' in caplog.text
+    caplog.clear()
+    # not tried again before RETRY_AFTER
+    with caplog.at_level(logging.WARNING, logger='indicator_service'):
+        assert service_client(config) is None
+    assert caplog.text == ''
+
+
+def test_service_going_away_falls_back(caplog):
+    listener = Listener(('127.0.0.1', 0), authkey=KEY.encode())
+    host, port = listener.address
+
+    def accept_and_close():
+        listener.accept().close()
+        listener.close()
+
+    thread = threading.Thread(target=accept_and_close)
+    thread.start()
+    config = {'indicator_service': {'address': f'{host}:{port}'}}
+    assert service_client(config) is not None
+    thread.join()
+    with caplog.at_level(logging.WARNING, logger='indicator_service'):
+        assert query_service(config, synthetic_ohlcv(50), 'ETH/BTC', '5m', INDICATORS) is None
+    assert 'computing locally' in caplog.text
+    assert indicator_service._clients == {}
+
+
+def test_wrong_authkey_is_refused(service, caplog):
+    host, port = service.address
+    config = {'indicator_service': {'address': f'{host}:{port}', 'authkey': 'guessed'}}
+    with caplog.at_level(logging.WARNING, logger='indicator_service'):
+        assert service_client(config) is None
+    assert 'AuthenticationError' in caplog.text
+
+
+def test_fake_feed_end_to_end(service):
+    feed = FakeCandleFeed(now=Timestamp('2021-01-02', tz='UTC'))
+    pairs = ['ETH/BTC', 'LTC/BTC']
+    service.follow(feed, pairs, ['5m'], interval=0.01)
+    wait_for(lambda: all(service.last_date(pair, '5m') is not None for pair in pairs))
+
+    host, port = service.address
+    config = {'indicator_service': {'address': f'{host}:{port}',
+                                    'authkey': '${INDICATOR_SERVICE_AUTHKEY}'}}
+    indicators = [('rsi', {'timeperiod': 14}), ('bollinger', {'window': 20, 'stds': (1, 3)})]
+    for pair in pairs:
+        dataframe = feed_frame(feed, pair, '5m')
+        # a day of 5m candles, all of them closed
+        assert len(dataframe) == 288
+        populated = query_service(config, dataframe.copy(), pair, '5m', indicators)
+        np.testing.assert_allclose(populated['rsi'], wilder_rsi(dataframe['close'].values),
+                                   rtol=1e-12)
+        for std, bands in bollinger_bands(dataframe, window=20, stds=(1, 3)).items():
+            np.testing.assert_allclose(populated[f'bb_lowerband{std}'], bands['lower'],
+                                       rtol=1e-12)
+            np.testing.assert_allclose(populated[f'bb_upperband{std}'], bands['upper'],
+                                       rtol=1e-12)
+    computed = service.computed
+
+    # the bot's next loop: nothing new, nothing computed again
+    query_service(config, feed_frame(feed, 'ETH/BTC', '5m'), 'ETH/BTC', '5m', indicators)
+    assert service.computed == computed
+    # the next candle closes, the feed brings it in, the bot sees its values
+    feed.now += dataframe['date'][1] - dataframe['date'][0]
+    wait_for(lambda: service.last_date('ETH/BTC', '5m')
+             == feed_frame(feed, 'ETH/BTC', '5m')['date'].iloc[-1].value)
+    dataframe = feed_frame(feed, 'ETH/BTC', '5m')
+    populated = query_service(config, dataframe.copy(), 'ETH/BTC', '5m', indicators)
+    assert len(populated) == 289 and not np.isnan(populated['rsi'].values[-1])
+    assert service.computed == computed + 2
+
+
+def test_client_sends_the_candles_the_service_lacks(service):
+    candles = synthetic_ohlcv(100)
+    client = IndicatorClient(KEY.encode(), service.address)
+    try:
+        populated = client.populate(candles.copy(), 'ETH/BTC', '5m', INDICATORS)
+        np.testing.assert_allclose(populated['rsi'], wilder_rsi(candles['close'].values),
+                                   rtol=1e-12)
+        assert service.last_date('ETH/BTC', '5m') == candles['date'].iloc[-1].value
+    finally:
+        client.close()
+
+
+def test_feed_errors_are_logged_and_retried(service, caplog):
+    class Flaky(FakeCandleFeed):
+        failures = 2
+
+        def fetch(self, pair, timeframe, since=None, limit=1000):
+            if self.failures:
+                self.failures -= 1
+                raise OSError('exchange unreachable')
+            return super().fetch(pair, timeframe, since, limit)
+
+    feed = Flaky(now=Timestamp('2021-01-02', tz='UTC'))
+    with caplog.at_level(logging.ERROR, logger='indicator_service'):
+        thread = service.follow(feed, ['ETH/BTC'], ['5m'], interval=0.01)
+        wait_for(lambda: service.last_date('ETH/BTC', '5m') is not None)
+    assert thread.is_alive()
+    assert caplog.text.count('fetching ETH/BTC 5m failed') == 2
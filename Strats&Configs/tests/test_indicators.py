@@ -0,0 +1,24 @@
+import numpy as np
+from pandas import Series
+
+import freqtrade.vendor.qtpylib.indicators as qtpylib
+
+from conftest import synthetic_ohlcv
+from indicators import bollinger_bands, shift
+
+
+def test_bollinger_bands_equal_qtpylib():
+    for seed in range(5):
+        dataframe = synthetic_ohlcv(1000, seed)
+        bands = bollinger_bands(dataframe, window=20, stds=(1, 2, 3))
+        for n in (1, 2, 3):
+            expected = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe),
+                                               window=20, stds=n)
+            for band in ('lower', 'mid', 'upper'):
+                np.testing.assert_array_equal(bands[n][band], expected[band].values)
+
+
+def test_shift():
+    values = np.arange(6, dtype=np.float64)
+    np.testing.assert_array_equal(shift(values, 2), Series(values).shift(2).values)
+    np.testing.assert_array_equal(shift(values, -1), Series(values).shift(-1).values)
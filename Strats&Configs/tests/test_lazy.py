@@ -0,0 +1,75 @@
+import pickle
+
+import numpy as np
+import pytest
+import talib.abstract as ta
+
+import freqtrade.vendor.qtpylib.indicators as qtpylib
+
+import macd_cci
+from conftest import synthetic_ohlcv
+from lazy import LazyIndicators
+from MACD import MACDStrategy
+from MACDcross import MACDStrategyCrossed
+
+
+@pytest.fixture
+def counted():
+    calls = []
+
+    def rolling(dataframe):
+        calls.append('rolling')
+        typical = qtpylib.typical_price(dataframe)
+        rolling = typical.rolling(window=20, min_periods=1)
+        return rolling.mean().values, rolling.std().values
+
+    lazy = (LazyIndicators()
+            .add('ema', lambda dataframe: calls.append('ema') or ta.EMA(dataframe, 30))
+            .add_group(rolling, {'lower': lambda bands: bands[0] - 2 * bands[1],
+                                 'upper': lambda bands: bands[0] + 2 * bands[1]}))
+    return lazy, calls
+
+
+def test_only_asked_columns(counted):
+    lazy, calls = counted
+    dataframe = lazy.ensure(synthetic_ohlcv(100), ['close', 'lower'])
+    assert 'lower' in dataframe and 'upper' not in dataframe and 'ema' not in dataframe
+    assert calls == ['rolling']
+
+
+def test_group_computed_once_and_kept(counted):
+    lazy, calls = counted
+    dataframe = lazy.ensure(synthetic_ohlcv(100), ['lower', 'upper'])
+    assert calls == ['rolling']
+    lazy.ensure(dataframe, ['lower', 'upper', 'ema'])
+    assert calls == ['rolling', 'ema']
+
+
+def test_undeclared_column(counted):
+    with pytest.raises(KeyError):
+        counted[0].ensure(synthetic_ohlcv(100), ['rsi'])
+
+
+def test_plain_frame_after_ensure(counted):
+    lazy = counted[0]
+    dataframe = lazy.ensure(synthetic_ohlcv(100), ['lower'])
+    bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=2)
+    np.testing.assert_array_equal(dataframe.loc[10:, 'lower'].values,
+                                  bollinger['lower'].values[10:])
+    assert 'lower' in dataframe.copy()
+    restored = pickle.loads(pickle.dumps(dataframe))
+    assert list(restored.columns) == list(dataframe.columns)
+    np.testing.assert_array_equal(restored['lower'].values, dataframe['lower'].values)
+
+
+@pytest.mark.parametrize('strategy_class', [MACDStrategy, MACDStrategyCrossed])
+def test_macdhist_equals_talib(strategy_class):
+    macd_cci.clear()
+    dataframe = synthetic_ohlcv(1000)
+    strategy = strategy_class({})
+    analyzed = strategy.populate_indicators(dataframe.copy(), {'pair': 'ETH/BTC'})
+    assert 'macdhist' not in analyzed
+    analyzed = strategy.lazy.ensure(analyzed, ['macdhist'])
+    np.testing.assert_array_equal(analyzed['macdhist'].values,
+                                  ta.MACD(dataframe)['macdhist'].values)
+    macd_cci.clear()
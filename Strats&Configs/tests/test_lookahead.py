@@ -0,0 +1,71 @@
+import numpy as np
+from pandas import DataFrame
+
+from bbrsi import BBRSI
+from conftest import synthetic_ohlcv
+from incremental import IncrementalIndicators, RSIState
+from lookahead import check_lookahead, negative_shifts, signal_window
+from MACDRSI import MACDRSI
+
+
+class Peeking:
+    """
+    Buys when the next close is higher, sells two candles after a drop
+    """
+    incremental = IncrementalIndicators(lambda: [RSIState(14)])
+
+    def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        return self.incremental.populate(dataframe, metadata['pair'])
+
+    def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        dataframe.loc[dataframe['close'].shift(-1) > dataframe['close'], 'buy'] = 1
+        return dataframe
+
+    def populate_sell_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        dataframe.loc[(dataframe['close'].shift(3) > dataframe['close'])
+                      & (dataframe['rsi'] < 50), 'sell'] = 1
+        return dataframe
+
+
+def test_signal_window():
+    assert signal_window(Peeking()) == 4
+
+
+def test_check_lookahead_on_populate_trend():
+    strategy = Peeking()
+    report = check_lookahead(strategy, synthetic_ohlcv(3000), {'pair': 'ETH/BTC'})
+    assert not len(report.divergence['rsi'])
+    # the sell only looks back, streamed and full-frame agree
+    assert not len(report.divergence['sell'])
+    # every buy of the full-frame run needs the next candle
+    assert report.backtest_only['buy'] > 0
+    assert len(report.divergence['buy']) == report.backtest_only['buy']
+    assert not report.ok
+    assert [call for _, call in negative_shifts(strategy)] == ["dataframe['close'].shift(-1)"]
+
+
+def test_window_too_short_is_reported():
+    report = check_lookahead(Peeking(), synthetic_ohlcv(500), {'pair': 'ETH/BTC'}, window=2)
+    # shift(3) reads NaN padding on a 2 candle window, the sells go missing
+    assert len(report.divergence['sell'])
+    np.testing.assert_array_equal(report.divergence['rsi'], [])
+
+
+def test_bbrsi_streams_like_its_backtest():
+    report = check_lookahead(BBRSI({}), synthetic_ohlcv(1000), {'pair': 'ETH/BTC'})
+    # the bands the signals did not ask for are computed from the lazy declarations
+    assert set(report.divergence) == {'rsi', 'buy', 'sell'} | {
+        f'bb_{band}band{std}' for band in ('lower', 'middle', 'upper') for std in (1, 3)}
+    assert report.ok, str(report)
+    assert report.unchecked == []
+
+
+def test_macdrsi_buy_reads_the_next_candles():
+    report = check_lookahead(MACDRSI({}), synthetic_ohlcv(1000), {'pair': 'ETH/BTC'})
+    for column in ('macd1', 'macdsignal1', 'macdhist1', 'macdhist2', 'rsi', 'sell'):
+        np.testing.assert_array_equal(report.divergence[column], [], err_msg=column)
+    assert report.backtest_only['buy'] > 0
+    assert len(report.divergence['buy']) == report.backtest_only['buy']
+    assert {call for _, call in report.shifts} == {
+        "shift(dataframe['macdhist1'], -1)", "shift(dataframe['macdhist2'], -1)",
+        "shift(dataframe['macdhist2'], -2)"}
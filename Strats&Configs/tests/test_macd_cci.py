@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import talib.abstract as ta
+
+import macd_cci
+from conftest import synthetic_ohlcv
+from macd_cci import COLUMNS, populate_macd_cci
+
+
+def full_frame(dataframe):
+    macd = ta.MACD(dataframe)
+    return {'macd': macd['macd'].values, 'macdsignal': macd['macdsignal'].values,
+            'macdhist': macd['macdhist'].values, 'cci': ta.CCI(dataframe).values}
+
+
+@pytest.fixture(autouse=True)
+def clear():
+    macd_cci.clear()
+    yield
+    macd_cci.clear()
+
+
+def check(result, dataframe, message=''):
+    for column, expected in full_frame(dataframe).items():
+        np.testing.assert_array_equal(result[column].values, expected,
+                                      err_msg=f'{column} {message}')
+
+
+def test_full_frame():
+    dataframe = synthetic_ohlcv(1000)
+    check(populate_macd_cci(dataframe.copy(), 'ETH/BTC', '5m'), dataframe)
+
+
+@pytest.mark.parametrize('sliding', [True, False])
+def test_bot_loops(sliding):
+    candles = synthetic_ohlcv(600)
+    kernel = buffer = None
+    for end in range(400, 430):
+        frame = candles.iloc[end - 400 if sliding else 0:end].reset_index(drop=True)
+        result = populate_macd_cci(frame.copy(), 'ETH/BTC', '5m', live=True)
+        # the values over every candle fed since the first frame
+        expected = full_frame(candles.iloc[:end])
+        for column in COLUMNS:
+            np.testing.assert_array_equal(result[column].values, expected[column][-len(frame):],
+                                          err_msg=f'{column} at {end}')
+        # one kernel and one buffer, advanced in place
+        kernel = kernel or macd_cci._kernels[('ETH/BTC', '5m')]
+        buffer = buffer if buffer is not None else kernel.buffer.values
+        assert macd_cci._kernels[('ETH/BTC', '5m')] is kernel
+        assert kernel.buffer.values is buffer
+
+
+def test_gap_warms_a_new_kernel():
+    candles = synthetic_ohlcv(600)
+    populate_macd_cci(candles.iloc[:400].copy(), 'ETH/BTC', '5m', live=True)
+    kernel = macd_cci._kernels[('ETH/BTC', '5m')]
+    frame = candles.iloc[401:].reset_index(drop=True)
+    check(populate_macd_cci(frame.copy(), 'ETH/BTC', '5m', live=True), frame)
+    assert macd_cci._kernels[('ETH/BTC', '5m')] is not kernel
+
+
+def test_nothing_kept_outside_live():
+    candles = synthetic_ohlcv(600)
+    for end in (400, 401):
+        frame = candles.iloc[:end]
+        check(populate_macd_cci(frame.copy(), 'ETH/BTC', '5m'), frame)
+    assert macd_cci._kernels == {}
+
+
+def test_columns_subset():
+    dataframe = synthetic_ohlcv(200)
+    result = populate_macd_cci(dataframe.copy(), 'ETH/BTC', '5m', columns=('cci',))
+    assert 'macd' not in result
+    assert set(COLUMNS) - {'cci'} == {'macd', 'macdsignal', 'macdhist'}
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from conftest import synthetic_ohlcv
+from mask_cache import MaskCache
+
+METADATA = {'pair': 'ETH/BTC'}
+
+
+def close_above(dataframe, value):
+    return lambda: dataframe['close'] > value
+
+
+def test_hits_and_misses():
+    masks = MaskCache()
+    dataframe = synthetic_ohlcv(500)
+    first = masks.get(dataframe, METADATA, 'close>', 100, close_above(dataframe, 100))
+    assert masks.get(dataframe, METADATA, 'close>', 100, close_above(dataframe, 100)) is first
+    assert (masks.hits, masks.misses) == (1, 1)
+
+    # every part of the key on its own builds a new mask
+    masks.get(dataframe, {'pair': 'LTC/BTC'}, 'close>', 100, close_above(dataframe, 100))
+    masks.get(dataframe, METADATA, 'close>', 101, close_above(dataframe, 101))
+    masks.get(dataframe, METADATA, 'close<', 100, lambda: dataframe['close'] < 100)
+    shorter = dataframe.iloc[:499]
+    masks.get(shorter, METADATA, 'close>', 100, close_above(shorter, 100))
+    # same length, one candle later
+    later = synthetic_ohlcv(501).iloc[1:].reset_index(drop=True)
+    masks.get(later, METADATA, 'close>', 100, close_above(later, 100))
+    assert (masks.hits, masks.misses) == (1, 6)
+
+
+def test_build_runs_on_misses_only():
+    masks = MaskCache()
+    dataframe = synthetic_ohlcv(500)
+    built = []
+
+    def build():
+        built.append(1)
+        return dataframe['close'] > 100
+
+    for _ in range(3):
+        masks.get(dataframe, METADATA, 'close>', 100, build)
+    assert len(built) == 1
+
+
+def test_oldest_dropped_at_maxsize():
+    masks = MaskCache(maxsize=2)
+    dataframe = synthetic_ohlcv(100)
+    for value in (99, 100, 101):
+        masks.get(dataframe, METADATA, 'close>', value, close_above(dataframe, value))
+    masks.get(dataframe, METADATA, 'close>', 101, close_above(dataframe, 101))
+    masks.get(dataframe, METADATA, 'close>', 99, close_above(dataframe, 99))
+    assert (masks.hits, masks.misses) == (1, 4)
+
+
+@pytest.mark.parametrize('length', [1, 7, 8, 9, 500])
+def test_packbits_round_trip(length):
+    masks = MaskCache()
+    dataframe = synthetic_ohlcv(length)
+    above = dataframe['close'].values > 100
+    volume = dataframe['volume'].values > 300
+    packed_above = masks.get(dataframe, METADATA, 'close>', 100, lambda: above)
+    packed_volume = masks.get(dataframe, METADATA, 'volume>', 300, lambda: volume)
+    assert len(packed_above) == (length + 7) // 8
+    np.testing.assert_array_equal(MaskCache.combine([packed_above], length), above)
+    combined = MaskCache.combine([packed_above, packed_volume], length)
+    assert combined.dtype == bool
+    np.testing.assert_array_equal(combined, above & volume)
+    # combining does not touch the cached masks
+    np.testing.assert_array_equal(MaskCache.combine([packed_above], length), above)
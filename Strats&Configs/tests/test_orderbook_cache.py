@@ -0,0 +1,108 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from freqtrade.state import RunMode
+
+from orderbook_cache import OrderBookCache, order_book
+
+
+class Exchange:
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def orderbook(self, pair, maximum):
+        self.calls.append((pair, maximum))
+        self.release.wait()
+        levels = [[100.0 - i, 1.0 + i] for i in range(maximum)]
+        return {'symbol': pair, 'timestamp': len(self.calls), 'bids': levels,
+                'asks': [[200.0 - price, amount] for price, amount in levels]}
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_served_for_ttl_and_depth():
+    exchange, clock = Exchange(), Clock()
+    cache = OrderBookCache(exchange.orderbook, ttl=5, depth=5, pair_ttl={'BTC/USDT': 1},
+                           clock=clock)
+    book = cache.fetch('ETH/USDT', 1)
+    assert book['bids'] == [[100.0, 1.0]]
+    # deeper than asked for, up to depth from the same snapshot
+    assert cache.fetch('ETH/USDT', 5)['bids'] == exchange.orderbook('ETH/USDT', 5)['bids']
+    exchange.calls.clear()
+    cache.fetch('ETH/USDT', 10)
+    assert exchange.calls == [('ETH/USDT', 10)]
+    cache.fetch('BTC/USDT', 1)
+    clock.now = 2
+    cache.fetch('ETH/USDT', 3)
+    cache.fetch('BTC/USDT', 1)
+    assert exchange.calls == [('ETH/USDT', 10), ('BTC/USDT', 5), ('BTC/USDT', 5)]
+    clock.now = 20
+    cache.fetch('ETH/USDT', 3)
+    assert exchange.calls[-1] == ('ETH/USDT', 5)
+    assert cache.stats()['hits'] == 2
+
+
+def test_concurrent_requests_coalesce():
+    exchange = Exchange()
+    exchange.release.clear()
+    cache = OrderBookCache(exchange.orderbook, ttl=5, depth=5)
+    books = []
+    threads = [threading.Thread(target=lambda: books.append(cache.fetch('ETH/USDT', 1)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    exchange.release.set()
+    for thread in threads:
+        thread.join()
+    assert exchange.calls == [('ETH/USDT', 5)]
+    assert cache.stats()['misses'] == 1 and cache.coalesced == 7
+    assert len(books) == 8 and all(book == books[0] for book in books)
+
+
+def test_failed_fetch_is_not_cached():
+    def fetch(pair, limit):
+        raise ConnectionError(pair)
+
+    cache = OrderBookCache(fetch)
+    for _ in range(2):
+        try:
+            cache.fetch('ETH/USDT', 1)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError('no error')
+    assert cache.misses == 2
+
+
+def strategy(config, runmode):
+    exchange = Exchange()
+    dp = SimpleNamespace(runmode=runmode, orderbook=exchange.orderbook)
+    return SimpleNamespace(config=config, dp=dp), exchange
+
+
+def test_order_book_through_dataprovider():
+    cached, exchange = strategy({'order_book_cache': {'ttl': 60}}, RunMode.DRY_RUN)
+    order_book(cached, 'ETH/USDT', 1)
+    order_book(cached, 'ETH/USDT', 1)
+    assert exchange.calls == [('ETH/USDT', 5)]
+
+    for config, runmode in (({}, RunMode.LIVE),
+                            ({'order_book_cache': {'ttl': 60}}, RunMode.BACKTEST)):
+        uncached, exchange = strategy(config, runmode)
+        order_book(uncached, 'ETH/USDT', 1)
+        order_book(uncached, 'ETH/USDT', 1)
+        assert exchange.calls == [('ETH/USDT', 1)] * 2
@@ -0,0 +1,73 @@
+import numpy as np
+
+import parallel_hyperopt
+from conftest import synthetic_ohlcv
+from exit_sim import EXIT_SELL_SIGNAL
+from indicators import bollinger_bands
+from parallel_hyperopt import (BBRSI_ETH_OPT, ParallelEvaluator, bbrsi_objective, bbrsi_trades,
+                               low_bb_objective)
+from rsi import wilder_rsi
+
+PARAMS = {
+    'buy_rsi': 20, 'buy_rsi_enabled': False, 'buy_trigger': 'bb_lower1',
+    'sell_rsi': 60, 'sell_rsi_enabled': True, 'sell_trigger': 'sell-bb_middle1',
+    'stoploss': -0.2, 'roi_t1': 600, 'roi_t2': 300, 'roi_t3': 120,
+    'roi_p1': 0.05, 'roi_p2': 0.05, 'roi_p3': 0.05, 'timeframe_minutes': 60,
+}
+
+
+def frames():
+    dataframe = synthetic_ohlcv(2000, freq='1h')
+    dataframe['rsi'] = wilder_rsi(dataframe['close'].values)
+    bands = bollinger_bands(dataframe, stds=(1,))[1]
+    dataframe['bb_lowerband1'] = bands['lower']
+    dataframe['bb_middleband1'] = bands['mid']
+    return {'ETH/BTC': dataframe}
+
+
+def test_bbrsi_trades_sell_signal():
+    data = frames()
+    dataframe = data['ETH/BTC']
+    with_sells = bbrsi_trades(data, PARAMS)['ETH/BTC']
+    without = bbrsi_trades(data, {**PARAMS, 'use_sell_signal': False})['ETH/BTC']
+    assert not (without.reason == EXIT_SELL_SIGNAL).any()
+    sold = with_sells.reason == EXIT_SELL_SIGNAL
+    assert sold.any()
+    # sold at the open after a candle with close > middle band and rsi > 60, no buy
+    previous = with_sells.exits[sold] - 1
+    assert (dataframe['close'].values[previous]
+            > dataframe['bb_middleband1'].values[previous]).all()
+    assert (dataframe['rsi'].values[previous] > 60).all()
+    np.testing.assert_array_equal(with_sells.close_rate[sold],
+                                  dataframe['open'].values[with_sells.exits[sold]])
+
+
+def attached(frames, params) -> float:
+    # 1. when the value columns of the worker's frames view the shared block (the dates
+    # are converted to datetimes, a copy)
+    block = np.frombuffer(parallel_hyperopt._worker['shared'].shm.buf, dtype=np.uint8)
+    return float(all(np.shares_memory(dataframe[column].values, block)
+                     for dataframe in frames.values() for column in dataframe.columns
+                     if column != 'date'))
+
+
+def epoch(i: int) -> dict:
+    triggers = list(BBRSI_ETH_OPT.buy_trigger_bands)
+    sells = list(BBRSI_ETH_OPT.sell_trigger_bands)
+    return {**PARAMS, 'buy_trigger': triggers[i % 3], 'sell_trigger': sells[i // 3 % 3],
+            'buy_rsi_enabled': i % 2 == 1, 'stoploss': -0.05 - 0.01 * i,
+            'bb_factor': 0.99 + 0.002 * i, 'timeframe_minutes': 60}
+
+
+def test_parallel_evaluator_matches_serial():
+    frames = {pair: BBRSI_ETH_OPT.compute_indicators(synthetic_ohlcv(3000, seed=seed,
+                                                                      freq='1h'))
+              for seed, pair in enumerate(['ETH/BTC', 'LTC/BTC', 'XRP/BTC'])}
+    epochs = [epoch(i) for i in range(9)]
+    for objective in (bbrsi_objective, low_bb_objective):
+        with ParallelEvaluator(frames, objective, workers=2) as evaluator:
+            losses = evaluator.evaluate(epochs)
+        assert losses == [objective(frames, params) for params in epochs]
+        assert len(set(losses)) > 1
+    with ParallelEvaluator(frames, attached, workers=2) as evaluator:
+        assert evaluator.evaluate([{}] * 4) == [1.] * 4
@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import synthetic_ohlcv
+from prefetch import CandlePipeline, FakeExchange
+
+PAIRS = [f'PAIR{seed}/BTC' for seed in range(6)]
+
+
+@pytest.fixture
+def exchange():
+    return FakeExchange({pair: synthetic_ohlcv(300, seed) for seed, pair in enumerate(PAIRS)},
+                        latency=0.01, jitter=0.005)
+
+
+def last_close(pair, frame):
+    return len(frame), frame['close'].iloc[-1]
+
+
+def test_pipeline_matches_serial(exchange):
+    with CandlePipeline(exchange, workers=2, queue_size=2, concurrency=3, limit=200) as pipeline:
+        piped = pipeline.run(PAIRS, '5m', last_close)
+        assert pipeline.stats['pairs'] == len(PAIRS)
+        serial = pipeline.run_serial(PAIRS, '5m', last_close)
+    assert list(piped) == PAIRS
+    assert piped == serial
+    assert all(candles == 200 for candles, _ in piped.values())
+    assert exchange.requests == 2 * len(PAIRS)
+
+
+def test_since(exchange):
+    since = {PAIRS[0]: exchange.frames[PAIRS[0]]['date'].iloc[250]}
+    with CandlePipeline(exchange) as pipeline:
+        result = pipeline.run(PAIRS[:2], '5m', last_close, since=since)
+    assert result[PAIRS[0]][0] == 50
+
+
+def test_analysis_error_raised(exchange):
+    def analyze(pair, frame):
+        if pair == PAIRS[3]:
+            raise ValueError(pair)
+        return len(frame)
+
+    with CandlePipeline(exchange, workers=2) as pipeline:
+        with pytest.raises(ValueError, match='PAIR3'):
+            pipeline.run(PAIRS, '5m', analyze)
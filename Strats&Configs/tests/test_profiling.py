@@ -0,0 +1,52 @@
+from inspect import getfullargspec
+
+from conftest import synthetic_ohlcv
+from profiling import PHASES, profiled, profiler
+
+
+@profiled
+class Strategy:
+
+    def __init__(self, config: dict):
+        self.config = config
+
+    def populate_indicators(self, dataframe, metadata):
+        dataframe['mid'] = (dataframe['high'] + dataframe['low']) / 2
+        return dataframe
+
+    def populate_buy_trend(self, dataframe, metadata):
+        dataframe.loc[dataframe['close'] < dataframe['mid'], 'buy'] = 1
+        return dataframe
+
+    def populate_sell_trend(self, dataframe, metadata):
+        return dataframe
+
+
+def run(strategy, pairs):
+    for pair in pairs:
+        dataframe = synthetic_ohlcv(100)
+        for phase in PHASES:
+            dataframe = getattr(strategy, phase)(dataframe, {'pair': pair})
+
+
+def test_disabled_leaves_the_methods():
+    strategy = Strategy({'profiling': {'enabled': False}})
+    assert profiler(strategy) is None
+    assert not set(PHASES) & set(vars(strategy))
+    run(strategy, ['ETH/BTC'])
+
+
+def test_enabled_records_every_call():
+    strategy = Strategy({'profiling': {'enabled': True, 'capacity': 4,
+                                       'report_interval': 0}})
+    # freqtrade checks the populate_* signatures
+    assert len(getfullargspec(strategy.populate_indicators).args) == 3
+    run(strategy, ['ETH/BTC', 'LTC/BTC'])
+    recorded = profiler(strategy)
+    assert recorded.count == 6
+    assert recorded.pairs == ['ETH/BTC', 'LTC/BTC']
+    # the ring buffer keeps the last capacity calls
+    assert len(recorded.arrays()['duration']) == 4
+    assert set(recorded.percentiles('populate_buy_trend')) == {50, 90, 99}
+    # other instances are not profiled through this one
+    assert not set(PHASES) & set(vars(Strategy({})))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+import talib.abstract as ta
+
+from conftest import synthetic_ohlcv
+from rsi import WilderRSI, wilder_rsi
+
+
+def test_equals_talib(candles):
+    np.testing.assert_array_equal(wilder_rsi(candles['close'].values), ta.RSI(candles).values)
+    np.testing.assert_array_equal(wilder_rsi(candles['close'].values, 6),
+                                  ta.RSI(candles, timeperiod=6).values)
+
+
+def test_pairs_with_padding():
+    frames = [synthetic_ohlcv(candles, seed) for seed, candles in enumerate((300, 250, 10))]
+    closes = np.full((3, 300), np.nan)
+    for row, frame in enumerate(frames):
+        closes[row, 300 - len(frame):] = frame['close'].values
+    out = np.empty_like(closes)
+    assert wilder_rsi(closes, out=out) is out
+    for row, frame in enumerate(frames):
+        padding = 300 - len(frame)
+        assert np.isnan(out[row, :padding]).all()
+        np.testing.assert_array_equal(out[row, padding:], ta.RSI(frame).values)
+
+
+def test_stream_equals_full_history():
+    frames = [synthetic_ohlcv(600, seed) for seed in range(3)]
+    closes = np.vstack([frame['close'].values for frame in frames])
+    closes[2, :320] = np.nan
+    rsi = WilderRSI(14)
+    values = np.empty_like(closes)
+    rsi.update(closes[:, :300], out=values[:, :300])
+    for column in range(300, 600):
+        rsi.update(closes[:, column:column + 1], out=values[:, column:column + 1])
+    for row in range(3):
+        np.testing.assert_array_equal(values[row], wilder_rsi(closes[row]), err_msg=str(row))
+
+
+def test_stream_keeps_its_rows(candles):
+    rsi = WilderRSI()
+    rsi.update(np.vstack([candles['close'].values] * 2))
+    with pytest.raises(ValueError):
+        rsi.update(candles['close'].values[-1:])
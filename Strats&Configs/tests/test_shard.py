@@ -0,0 +1,76 @@
+from freqtrade.persistence import Trade
+
+from shard import StakeBudget, partition, shard_of, sharded
+
+PAIRS = [f'{coin}/USDT' for coin in ('BTC', 'ETH', 'LTC', 'XRP', 'ADA', 'DOT', 'SOL', 'BNB')]
+
+
+class Strategy:
+
+    def __init__(self, config: dict):
+        self.config = config
+
+    def bot_loop_start(self, **kwargs):
+        pass
+
+    def confirm_trade_entry(self, pair, order_type, amount, rate, time_in_force, **kwargs):
+        return pair != 'XRP/USDT'
+
+
+ShardedStrategy = sharded(Strategy)
+
+
+def test_partition_is_stable():
+    shards = partition(PAIRS, 3)
+    assert sorted(sum(shards, [])) == sorted(PAIRS)
+    # the shard of a pair does not depend on the whitelist order
+    assert partition(PAIRS[::-1], 3) == [pairs[::-1] for pairs in shards]
+    assert all(shard_of(pair, 3) == shard for shard, pairs in enumerate(shards)
+               for pair in pairs)
+
+
+def test_budget_shared_between_shards(tmp_path):
+    state = tmp_path / 'stake.json'
+    first, second = StakeBudget(state, 0, 100.0), StakeBudget(state, 1, 100.0)
+    first.publish(60.0)
+    assert second.available() == 40.0
+    assert second.reserve(30.0) == 30.0
+    # less than asked for, unless it is below the minimum
+    assert first.reserve(30.0) == 10.0
+    assert second.reserve(5.0, minimum=1.0) == 0.0
+    first.publish(0.0)
+    assert second.available() == 70.0
+
+
+def test_silent_shard_no_longer_counts(tmp_path):
+    state = tmp_path / 'stake.json'
+    StakeBudget(state, 0, 100.0).publish(80.0)
+    assert StakeBudget(state, 1, 100.0, stale_after=0).available() == 100.0
+
+
+def test_unsharded_bot_keeps_its_methods():
+    strategy = ShardedStrategy({})
+    assert 'confirm_trade_entry' not in vars(strategy)
+    assert strategy.confirm_trade_entry('BTC/USDT', 'limit', 1.0, 1e6, 'gtc')
+
+
+def test_sharded_bot_reserves_its_stake(tmp_path, monkeypatch):
+    monkeypatch.setattr(Trade, 'get_open_trades', staticmethod(lambda: []))
+    config = {'sharding': {'shard': 0, 'shards': 2, 'state': str(tmp_path / 'stake.json'),
+                           'budget': 10.0}}
+    strategy = ShardedStrategy(config)
+    strategy.bot_loop_start()
+    confirm = strategy.confirm_trade_entry
+    assert confirm(pair='BTC/USDT', order_type='limit', amount=2.0, rate=3.0,
+                   time_in_force='gtc')
+    # turned down by the strategy itself, nothing reserved
+    assert not confirm(pair='XRP/USDT', order_type='limit', amount=1.0, rate=1.0,
+                       time_in_force='gtc')
+    assert not confirm(pair='ETH/USDT', order_type='limit', amount=1.0, rate=5.0,
+                       time_in_force='gtc')
+    assert confirm(pair='ETH/USDT', order_type='limit', amount=1.0, rate=4.0,
+                   time_in_force='gtc')
+    # the next loop publishes the open trades, none here
+    strategy.bot_loop_start()
+    assert confirm(pair='LTC/USDT', order_type='limit', amount=1.0, rate=10.0,
+                   time_in_force='gtc')
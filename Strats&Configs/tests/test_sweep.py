@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from conftest import synthetic_ohlcv
+from crossover import crossed_below
+from rsi import wilder_rsi
+from sweep import SweepResult, sweep_crossed_below, sweep_greater, sweep_less
+
+
+def test_sweep_greater_and_less():
+    dataframe = synthetic_ohlcv(2000)
+    rsi = wilder_rsi(dataframe['close'].values)
+    where = dataframe['volume'].values > 100
+    thresholds = range(5, 96)
+    for sweep, compare in ((sweep_greater, np.greater), (sweep_less, np.less)):
+        result = sweep(rsi, thresholds, where=where)
+        for (threshold, indices), count in zip(result, result.counts):
+            with np.errstate(invalid='ignore'):
+                expected = np.flatnonzero(compare(rsi, threshold) & where)
+            np.testing.assert_array_equal(indices, expected, err_msg=str(threshold))
+            assert count == len(expected)
+
+
+def test_sweep_crossed_below():
+    rng = np.random.default_rng(1)
+    close = synthetic_ohlcv(2000)['close'].values
+    lower = close * rng.uniform(0.95, 1.05, len(close))
+    # signs and NaN, the paths for a negative and a missing band
+    lower[::97] *= -1
+    lower[:20] = np.nan
+    factors = np.round(np.arange(0.9, 1.1, 0.0025), 4)
+    result = sweep_crossed_below(close, lower, factors)
+    for factor, indices in result:
+        expected = np.flatnonzero(crossed_below(close, lower, factor=factor))
+        np.testing.assert_array_equal(indices, expected, err_msg=str(factor))
+
+
+def ranges(shape: str):
+    rng = np.random.default_rng(2)
+    lo = rng.integers(0, 40, 5000)
+    hi = np.where(rng.random(5000) < 0.3, 40, rng.integers(0, 41, 5000))
+    lo[::3] = 0
+    if shape == 'sparse':
+        hi[rng.random(5000) >= 0.01] = 0
+    elif shape == 'suffixes':
+        lo, hi = rng.integers(0, 40, 5000), np.full(5000, 40)
+    return lo, hi
+
+
+@pytest.mark.parametrize('shape', ['mixed', 'sparse', 'suffixes'])
+def test_indices_of_any_ranges(shape):
+    # prefixes, suffixes, ranges in between and empty ones: many signalling candles (one
+    # pass) or few, found from the lo or the hi side
+    lo, hi = ranges(shape)
+    result = SweepResult(np.arange(40.0), lo, hi)
+    for i in range(40):
+        expected = np.flatnonzero((lo <= i) & (i < hi))
+        np.testing.assert_array_equal(result.indices(i), expected, err_msg=str(i))
+        np.testing.assert_array_equal(result.mask(i), (lo <= i) & (i < hi))
+        assert result.counts[i] == len(expected)
@@ -0,0 +1,20 @@
+from pandas import Timedelta, Timestamp
+
+from variants import load_strategy_class
+from walkforward import STRATEGY_DIR, make_folds, search_space
+
+
+def test_search_space_has_buy_and_sell_parameters():
+    names = [dimension.name for dimension in
+             search_space(load_strategy_class('BBRSI_ETH_OPT', STRATEGY_DIR))]
+    assert {'buy_rsi', 'buy_trigger', 'sell_rsi', 'sell_rsi_enabled', 'sell_trigger',
+            'stoploss', 'roi_t1'} <= set(names)
+    assert len(names) == len(set(names))
+
+
+def test_make_folds():
+    start = Timestamp('2021-01-01', tz='UTC')
+    folds = make_folds(start, start + Timedelta(days=100), Timedelta(days=60),
+                       Timedelta(days=20))
+    assert [(fold.train_start - start).days for fold in folds] == [0, 20]
+    assert all(fold.test_end - fold.test_start == Timedelta(days=20) for fold in folds)
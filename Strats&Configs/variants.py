@@ -0,0 +1,173 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Signal variants of one strategy in a single indicator pass.
+
+bbrsi.py / bbrsi_test.py, low_bb.py / low_bb_test.py and the 2021-06-24 low_bb.py /
+low_bb_eth.py only differ in their thresholds. The thresholds are attributes of one
+strategy (plain class attributes or hyperopt parameters) and its `variants` attribute
+maps the other files' names to their values:
+
+    variants = {
+        'BBRSI_TEST': {'buy_rsi': 38, 'buy_std': 2, 'sell_rsi': None, 'sell_band': 'lower',
+                       'sell_std': 2},
+    }
+
+evaluate_variants() runs populate_indicators once, then populate_buy_trend /
+populate_sell_trend once per preset with its values set on the strategy, on shallow
+copies of the analyzed frame. The indicator columns are shared, lazy columns (lazy.py)
+are computed the first time a preset asks for them and kept for the next presets. The
+result holds buy_<variant> / sell_<variant> (uint8 0 / 1) for all variants side by side,
+the strategy's own values as the variant named after its class. ROI / stoploss are not
+part of a preset, they differ between the files as well but don't change the signals.
+
+    signals = evaluate_variants(BBRSI(config), dataframe, {'pair': 'ETH/BTC'})
+    signals = evaluate_variants(strategy, dataframe, metadata,
+                                {'strict': {'buy_rsi': 30}, 'loose': {'buy_rsi': 45}})
+
+    python variants.py BBRSI --store user_data/data/binance-store --timeframe 1h
+    python variants.py Low_BB --strategy-path "strats and configs 2021-06-24" \\
+        --store user_data/data/binance-store --timeframe 1m
+"""
+import argparse
+import importlib.util
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+Preset = Dict[str, Any]
+
+_MISSING = object()
+
+
+def variant_presets(strategy) -> Dict[str, Preset]:
+    """
+    The strategy's own values (an empty preset) and its `variants`
+    """
+    return {type(strategy).__name__: {}, **getattr(strategy, 'variants', {})}
+
+
+@contextmanager
+def applied(strategy, preset: Preset):
+    """
+    Sets the values of a preset on the strategy instance, restored afterwards.
+    Hyperopt parameters get their value set, other attributes are set on the instance.
+    """
+    previous = []
+    try:
+        for name, value in preset.items():
+            current = getattr(strategy, name)
+            if hasattr(current, 'value'):
+                previous.append((name, current, current.value))
+                current.value = value
+            else:
+                previous.append((name, None, strategy.__dict__.get(name, _MISSING)))
+                setattr(strategy, name, value)
+        yield strategy
+    finally:
+        for name, parameter, value in reversed(previous):
+            if parameter is not None:
+                parameter.value = value
+            elif value is _MISSING:
+                delattr(strategy, name)
+            else:
+                setattr(strategy, name, value)
+
+
+def evaluate_variants(strategy, dataframe: DataFrame, metadata: dict,
+                      presets: Optional[Dict[str, Preset]] = None) -> DataFrame:
+    """
+    :param strategy: strategy instance
+    :param dataframe: candle DataFrame of the pair
+    :param metadata: metadata for the populate_* calls
+    :param presets: variant name -> attribute values, variant_presets(strategy) by default
+    :return: date plus buy_<variant> / sell_<variant> columns, on the input's index
+    """
+    if presets is None:
+        presets = variant_presets(strategy)
+    analyzed = strategy.populate_indicators(dataframe.copy(), metadata)
+    result = DataFrame({'date': dataframe['date'].values}, index=dataframe.index)
+    lazy = getattr(strategy, 'lazy', None)
+    for name, preset in presets.items():
+        with applied(strategy, preset):
+            frame = strategy.populate_buy_trend(analyzed.copy(deep=False), metadata)
+            frame = strategy.populate_sell_trend(frame, metadata)
+        if lazy is not None:
+            # what this preset asked the lazy columns for, the next ones reuse it
+            for column in frame.columns.difference(analyzed.columns):
+                if column in lazy:
+                    analyzed[column] = frame[column]
+        for column in ('buy', 'sell'):
+            values = frame[column].values if column in frame.columns else np.zeros(len(frame))
+            result[f'{column}_{name}'] = (values == 1).astype(np.uint8)
+    return result
+
+
+def summary(signals: DataFrame) -> DataFrame:
+    """
+    Per variant the buy / sell counts and the candles where they differ from the first
+    variant
+    """
+    names = [column[len('buy_'):] for column in signals.columns if column.startswith('buy_')]
+    rows = {}
+    for name in names:
+        row = {}
+        for column in ('buy', 'sell'):
+            values = signals[f'{column}_{name}'].values
+            row[column] = int(values.sum())
+            row[f'{column}_differ'] = int(np.count_nonzero(values
+                                                          != signals[f'{column}_{names[0]}'].values))
+        rows[name] = row
+    return DataFrame.from_dict(rows, orient='index')
+
+
+def load_strategy_class(name: str, directory: Path):
+    """
+    The class from the .py file in directory defining it, freqtrade's --strategy-path
+    lookup. Imported under its own module name, two directories can both hold a low_bb.py.
+    """
+    definition = re.compile(rf'^class {re.escape(name)}\(', re.MULTILINE)
+    for path in sorted(directory.glob('*.py')):
+        if definition.search(path.read_text()):
+            spec = importlib.util.spec_from_file_location(f'variants.{path.stem}', path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[spec.name] = module
+            spec.loader.exec_module(module)
+            return getattr(module, name)
+    raise ValueError(f'no class {name} in {directory}')
+
+
+def main():
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('strategy')
+    parser.add_argument('--strategy-path', type=Path, default=Path(__file__).resolve().parent)
+    parser.add_argument('--store', type=Path, required=True, help='candle_store.py directory')
+    parser.add_argument('--timeframe', default='5m')
+    parser.add_argument('--pairs', nargs='*', help='all pairs in the store by default')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    args = parser.parse_args()
+
+    strategy = load_strategy_class(args.strategy, args.strategy_path)(
+        {'stake_currency': 'BTC', 'dry_run': True})
+    # no bot around it, full-frame path
+    strategy.dp = None
+    store = CandleStore(args.store)
+    total = None
+    for pair in args.pairs or store.pairs(args.timeframe):
+        dataframe = store.load(pair, args.timeframe, start=args.start, end=args.end)
+        counts = summary(evaluate_variants(strategy, dataframe, {'pair': pair}))
+        print(f'{pair}\n{counts.to_string()}\n')
+        total = counts if total is None else total + counts
+    if total is not None:
+        print(f'all pairs\n{total.to_string()}')
+
+
+if __name__ == '__main__':
+    main()
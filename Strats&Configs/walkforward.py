@@ -0,0 +1,279 @@
+# pragma pylint: disable=missing-docstring, invalid-name
+"""
+Walk-forward optimisation of BBRSI_ETH_OPT and Low_BB_ETH.
+
+The history is split into rolling folds, a train window followed by the test window
+right after it, each fold starting `step` (the test length by default) after the
+previous one:
+
+    |------ train ------|-- test --|
+               |------ train ------|-- test --|
+                          |------ train ------|-- test --|
+
+Every fold runs the same random sample of epochs (the strategy's buy and sell parameters
+plus its ROI / stoploss spaces) on its train window, scored like parallel_hyperopt.py, and the
+best epoch is then run on the test window it has never seen. The epochs of all folds go
+through one ParallelEvaluator pool, so the folds are optimized side by side.
+
+The indicators are computed once per pair over the whole history and put in shared
+memory, a fold is a candle range of those frames: the candles overlapping train windows
+share are never recomputed, and no fold starts with the NaN warm-up of the bands (a bot
+running the parameters would have the history before the window as well). With a cache
+directory the columns go through indicator_cache.py's IndicatorCache under the key
+cached_indicators uses, a rerun or a backtest over the same candles loads them from disk.
+
+    result = walk_forward('Low_BB_ETH', frames, '5m', make_folds(start, end, train, test))
+
+    python walkforward.py BBRSI_ETH_OPT --store user_data/data/binance-store \\
+        --train 90d --test 30d --epochs 500 --workers 4
+    python walkforward.py Low_BB_ETH --store user_data/data/binance-store --timeframe 5m \\
+        --train 30d --test 7d --output walkforward-lowbb.json
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from pandas import DataFrame, Timedelta, Timestamp
+from skopt.space import Categorical, Dimension, Integer, Real, Space
+
+from freqtrade.exchange import timeframe_to_minutes
+from freqtrade.strategy import CategoricalParameter, IntParameter, RealParameter
+
+from exit_sim import ExitResult
+from indicator_cache import IndicatorCache, code_hash
+from parallel_hyperopt import ParallelEvaluator, bbrsi_trades, low_bb_trades, total_profit
+from variants import load_strategy_class
+
+STRATEGY_DIR = Path(__file__).resolve().parent / 'strats and configs 2021-06-24'
+
+# strategy class -> trades of one epoch, timeframe of its config
+TARGETS = {
+    'BBRSI_ETH_OPT': (bbrsi_trades, '1h'),
+    'Low_BB_ETH': (low_bb_trades, '5m'),
+}
+
+
+class Fold(NamedTuple):
+    train_start: Timestamp
+    test_start: Timestamp
+    test_end: Timestamp
+
+
+def make_folds(start: Timestamp, end: Timestamp, train: Timedelta, test: Timedelta,
+               step: Optional[Timedelta] = None) -> List[Fold]:
+    """
+    Rolling folds within [start, end), windows are half-open
+    :param step: offset between the folds, the test length by default
+    """
+    step = step or test
+    folds = []
+    train_start = start
+    while train_start + train + test <= end:
+        folds.append(Fold(train_start, train_start + train, train_start + train + test))
+        train_start += step
+    return folds
+
+
+def search_space(strategy_cls) -> List[Dimension]:
+    """
+    The buy and sell parameters of the strategy class, its ROI and stoploss spaces
+    """
+    dimensions: List[Dimension] = []
+    for name, parameter in vars(strategy_cls).items():
+        if getattr(parameter, 'category', None) not in ('buy', 'sell'):
+            continue
+        if isinstance(parameter, IntParameter):
+            dimensions.append(Integer(parameter.low, parameter.high, name=name))
+        elif isinstance(parameter, RealParameter):
+            # BBRSI_ETH_OPT's stoploss parameter has its bounds the wrong way around
+            dimensions.append(Real(min(parameter.low, parameter.high),
+                                   max(parameter.low, parameter.high), name=name))
+        elif isinstance(parameter, CategoricalParameter):
+            dimensions.append(Categorical(parameter.opt_range, name=name))
+    return dimensions + strategy_cls.roi_space() + strategy_cls.stoploss_space()
+
+
+def sample_epochs(dimensions: List[Dimension], epochs: int, seed: int = 0) -> List[dict]:
+    space = Space(dimensions)
+    return [{name: value.item() if isinstance(value, np.generic) else value
+             for name, value in zip(space.dimension_names, point)}
+            for point in space.rvs(n_samples=epochs, random_state=seed)]
+
+
+def indicator_frames(strategy_cls, frames: Dict[str, DataFrame], timeframe: str,
+                     cache: Optional[IndicatorCache] = None) -> Dict[str, DataFrame]:
+    """
+    The candles with the strategy's compute_indicators columns, over the whole history
+    """
+    code = code_hash(strategy_cls.compute_indicators)
+    result = {}
+    for pair, dataframe in frames.items():
+        dataframe = dataframe.copy()
+        key = cache.key(pair, timeframe, dataframe, code) if cache and len(dataframe) else None
+        columns = cache.load(key) if key else None
+        if columns is not None:
+            for column, values in columns.items():
+                dataframe[column] = values
+        else:
+            existing = set(dataframe.columns)
+            dataframe = strategy_cls.compute_indicators(dataframe)
+            if key:
+                cache.store(key, {column: dataframe[column].values
+                                  for column in dataframe.columns if column not in existing})
+        result[pair] = dataframe
+    return result
+
+
+def window(frames: Dict[str, DataFrame], start: int, end: int) -> Dict[str, DataFrame]:
+    """
+    The candles with start <= date < end (ns since epoch) of every pair, as views
+    """
+    result = {}
+    for pair, dataframe in frames.items():
+        dates = dataframe['date'].values.astype('datetime64[ns]').view(np.int64)
+        first, last = np.searchsorted(dates, (start, end))
+        result[pair] = dataframe.iloc[first:last]
+    return result
+
+
+def trade_metrics(frames: Dict[str, DataFrame], trades: Dict[str, ExitResult],
+                  fee: float = 0.0) -> dict:
+    """
+    Trade count, total / mean profit ratio, win rate and the largest drop of the summed
+    profit ratios, trades of all pairs in the order they closed
+    """
+    profits = []
+    closed = []
+    for pair, result in trades.items():
+        profits.append(result.profit_ratio(fee))
+        closed.append(frames[pair]['date'].values[result.exits])
+    profits = np.concatenate(profits) if profits else np.empty(0)
+    if len(profits):
+        profits = profits[np.argsort(np.concatenate(closed), kind='stable')]
+    equity = np.concatenate(([0.0], np.cumsum(profits)))
+    return {
+        'trades': len(profits),
+        'profit': float(profits.sum()),
+        'profit_mean': float(profits.mean()) if len(profits) else 0.0,
+        'win_rate': float((profits > 0).mean()) if len(profits) else 0.0,
+        'max_drawdown': float((np.maximum.accumulate(equity) - equity).max()),
+    }
+
+
+def _fold_task(frames: Dict[str, DataFrame], task: tuple):
+    """
+    Runs in the pool: the loss of an epoch on a window, or its trade metrics
+    """
+    trades_function, start, end, params, metrics = task
+    frames = window(frames, start, end)
+    trades = trades_function(frames, params)
+    if metrics:
+        return trade_metrics(frames, trades, params.get('fee', 0.0))
+    return -total_profit(trades, params.get('fee', 0.0))
+
+
+def walk_forward(strategy: str, frames: Dict[str, DataFrame], timeframe: str,
+                 folds: List[Fold], epochs: int = 200, workers: int = 4, seed: int = 0,
+                 fee: float = 0.0, cache: Optional[IndicatorCache] = None,
+                 use_sell_signal: bool = True, strategy_dir: Path = STRATEGY_DIR) -> DataFrame:
+    """
+    :param strategy: a TARGETS class name
+    :param frames: candles per pair covering the folds
+    :param folds: make_folds() of the history
+    :param epochs: random epochs evaluated on every train window
+    :param fee: fee ratio per side
+    :param cache: IndicatorCache for the indicator columns, computed every time when None
+    :param use_sell_signal: ask_strategy.use_sell_signal of the config
+    :return: per fold its windows, the train / test metrics of its best epoch
+             (train_* / test_* columns) and that epoch's parameters
+    """
+    trades_function: Callable = TARGETS[strategy][0]
+    strategy_cls = load_strategy_class(strategy, strategy_dir)
+    shared = {'timeframe_minutes': timeframe_to_minutes(timeframe), 'fee': fee,
+              'use_sell_signal': use_sell_signal}
+    candidates = [{**params, **shared}
+                  for params in sample_epochs(search_space(strategy_cls), epochs, seed)]
+    bounds = [(fold.train_start.value, fold.test_start.value, fold.test_end.value)
+              for fold in folds]
+
+    with ParallelEvaluator(indicator_frames(strategy_cls, frames, timeframe, cache),
+                           _fold_task, workers) as evaluator:
+        tasks = [(trades_function, train_start, test_start, params, False)
+                 for train_start, test_start, _ in bounds for params in candidates]
+        losses = np.array(evaluator.evaluate(
+            tasks, chunksize=max(1, len(tasks) // (workers * 8)))).reshape(len(folds), -1)
+        best = [candidates[i] for i in losses.argmin(axis=1)] if len(folds) else []
+        checks = []
+        for (train_start, test_start, test_end), params in zip(bounds, best):
+            checks.append((trades_function, train_start, test_start, params, True))
+            checks.append((trades_function, test_start, test_end, params, True))
+        results = evaluator.evaluate(checks)
+
+    rows = []
+    for i, (fold, params) in enumerate(zip(folds, best)):
+        row = fold._asdict()
+        row.update({f'train_{name}': value for name, value in results[2 * i].items()})
+        row.update({f'test_{name}': value for name, value in results[2 * i + 1].items()})
+        row['params'] = {name: value for name, value in params.items() if name not in shared}
+        rows.append(row)
+    return DataFrame(rows)
+
+
+def main():
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('strategy', choices=list(TARGETS))
+    parser.add_argument('--store', type=Path, required=True, help='candle_store.py directory')
+    parser.add_argument('--timeframe', help="the strategy's config timeframe by default")
+    parser.add_argument('--pairs', nargs='*', help='all pairs in the store by default')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--train', type=Timedelta, default=Timedelta('90d'))
+    parser.add_argument('--test', type=Timedelta, default=Timedelta('30d'))
+    parser.add_argument('--step', type=Timedelta, help='the test length by default')
+    parser.add_argument('--epochs', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fee', type=float, default=0.001)
+    parser.add_argument('--cache', type=Path, default=Path('user_data/indicator_cache'),
+                        help="indicator cache directory, cached_indicators' by default")
+    parser.add_argument('--no-sell-signal', action='store_true',
+                        help='ask_strategy.use_sell_signal false, exits by ROI / stoploss only')
+    parser.add_argument('--output', type=Path, help='write the folds as JSON')
+    args = parser.parse_args()
+
+    timeframe = args.timeframe or TARGETS[args.strategy][1]
+    store = CandleStore(args.store)
+    frames = {pair: store.load(pair, timeframe, start=args.start, end=args.end)
+              for pair in args.pairs or store.pairs(timeframe)}
+    frames = {pair: dataframe for pair, dataframe in frames.items() if len(dataframe)}
+    if not frames:
+        raise SystemExit('no candles found')
+    start = min(dataframe['date'].iloc[0] for dataframe in frames.values())
+    end = (max(dataframe['date'].iloc[-1] for dataframe in frames.values())
+           + Timedelta(minutes=timeframe_to_minutes(timeframe)))
+    folds = make_folds(start, end, args.train, args.test, args.step)
+    if not folds:
+        raise SystemExit(f'{start} - {end} is shorter than one train and test window')
+
+    result = walk_forward(args.strategy, frames, timeframe, folds, epochs=args.epochs,
+                          workers=args.workers, seed=args.seed, fee=args.fee,
+                          cache=IndicatorCache(args.cache),
+                          use_sell_signal=not args.no_sell_signal)
+    columns = ['train_start', 'test_start', 'test_end', 'train_trades', 'train_profit',
+               'test_trades', 'test_profit', 'test_win_rate', 'test_max_drawdown']
+    print(result[columns].to_string(index=False))
+    print(f"\nout of sample: {int(result['test_trades'].sum())} trades, "
+          f"profit {result['test_profit'].sum():.4f}, "
+          f"{int((result['test_profit'] > 0).sum())} of {len(result)} folds positive")
+    if args.output:
+        args.output.write_text(json.dumps(
+            [{**row, **{name: str(row[name]) for name in Fold._fields}}
+             for row in result.to_dict('records')], indent=2))
+
+
+if __name__ == '__main__':
+    main()